@@ -340,6 +340,15 @@ def step3_plan_validation(state: StockAgentState):
 - get_current_date: 오늘 날짜를 반환합니다.
 - calculate: 수학 계산을 수행합니다. 사칙연산과 기본 수학 함수를 지원합니다.
 - filter_stocks_by_indicator_auto: 주식 데이터를 필터링하여 조건에 맞는 종목을 반환합니다.
+- screen_stocks: 여러 지표(이름별 파라미터/구간)와 하나의 조건식으로 시장 전체 종목을 한 번에 스크리닝합니다. 예: RSI 60 이상이면서 골든크로스 발생
+- get_screen_page: 결과가 많아 핸들과 첫 페이지만 받은 스크리닝 결과의 다음 페이지를 조회합니다.
+- combine_screen_results: 스크리닝 결과 handle(또는 handle 없이 받은 작은 결과 목록)들을 교집합/합집합/차집합/XOR로 합칩니다. 예: RSI 과매도 종목 중 골든크로스가 없는 종목
+- screen_date_comparison: 두 날짜(기준일 prev_*, 대상일 curr_*)의 가격을 비교하는 조건식으로 시장 전체 종목을 스크리닝합니다. 예: 거래량이 전날 대비 3배 이상
+- screen_rolling_window: 최근 N거래일 구간의 등락률/최고/최저/합계/평균/상승일 수 조건으로 시장 전체 종목을 스크리닝합니다. 예: 최근 10일간 등락률 10% 이상, 20일 신고가
+- screen_date_range: 기간 안의 모든 거래일에 조건식을 한 번에 평가해 조건을 만족한 (종목, 날짜) 또는 종목별 처음/마지막 날짜를 찾습니다. 예: 지난 한 달 중 거래량이 급증한 날
+- find_cross_events: 기간 내 이동평균 골든크로스/데드크로스가 발생한 종목과 횟수, 첫 발생일을 반환합니다.
+- scan_candlestick_pattern: 기간 내 연속 양봉/음봉, 적삼병, 흑삼병, 갭, 도지, 장악형 등 캔들 패턴이 나타난 종목과 날짜를 반환합니다.
+- get_streaks: 기준일까지 연속 양봉/음봉, 연속 상승, 연속 거래량 증가가 며칠째인지와 N일 이상 이어진 종목을 반환합니다.
 - get_stock_price_history: 특정 종목의 특정 날짜 거래이력 데이터를 조회합니다.
 
 ## 검증 기준
@@ -398,6 +407,15 @@ def step4_plan_revision(state: StockAgentState):
 - get_current_date: 오늘 날짜를 반환합니다.
 - calculate: 수학 계산을 수행합니다. 사칙연산과 기본 수학 함수를 지원합니다.
 - filter_stocks_by_indicator_auto: 주식 데이터를 필터링하여 조건에 맞는 종목을 반환합니다.
+- screen_stocks: 여러 지표(이름별 파라미터/구간)와 하나의 조건식으로 시장 전체 종목을 한 번에 스크리닝합니다. 예: RSI 60 이상이면서 골든크로스 발생
+- get_screen_page: 결과가 많아 핸들과 첫 페이지만 받은 스크리닝 결과의 다음 페이지를 조회합니다.
+- combine_screen_results: 스크리닝 결과 handle(또는 handle 없이 받은 작은 결과 목록)들을 교집합/합집합/차집합/XOR로 합칩니다. 예: RSI 과매도 종목 중 골든크로스가 없는 종목
+- screen_date_comparison: 두 날짜(기준일 prev_*, 대상일 curr_*)의 가격을 비교하는 조건식으로 시장 전체 종목을 스크리닝합니다. 예: 거래량이 전날 대비 3배 이상
+- screen_rolling_window: 최근 N거래일 구간의 등락률/최고/최저/합계/평균/상승일 수 조건으로 시장 전체 종목을 스크리닝합니다. 예: 최근 10일간 등락률 10% 이상, 20일 신고가
+- screen_date_range: 기간 안의 모든 거래일에 조건식을 한 번에 평가해 조건을 만족한 (종목, 날짜) 또는 종목별 처음/마지막 날짜를 찾습니다. 예: 지난 한 달 중 거래량이 급증한 날
+- find_cross_events: 기간 내 이동평균 골든크로스/데드크로스가 발생한 종목과 횟수, 첫 발생일을 반환합니다.
+- scan_candlestick_pattern: 기간 내 연속 양봉/음봉, 적삼병, 흑삼병, 갭, 도지, 장악형 등 캔들 패턴이 나타난 종목과 날짜를 반환합니다.
+- get_streaks: 기준일까지 연속 양봉/음봉, 연속 상승, 연속 거래량 증가가 며칠째인지와 N일 이상 이어진 종목을 반환합니다.
 - get_stock_price_history: 특정 종목의 특정 날짜 거래이력 데이터를 조회합니다.
 
 ## 의도 분석
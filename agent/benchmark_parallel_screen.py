@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+병렬 스크리닝(ParallelScreener) 속도 비교
+
+가상의 시장(기본 2,700종목 × 500거래일)에서 단일 프로세스 IndicatorEvaluator와
+프로세스 수별 ParallelScreener의 지표 계산 시간을 재고 속도 향상 배율을 출력합니다.
+
+    python benchmark_parallel_screen.py [종목 수] [거래일 수]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from stock_data_models import MarketWindow
+from funcions.indicator_graph import IndicatorEvaluator
+from funcions.parallel_screen import ParallelScreener
+
+INDICATORS = ["detect_stochastic_golden_cross", "detect_atr_breakout", "count_bollinger_lower_touch", "count_golden_cross"]
+REPEAT = 3
+
+
+def _make_window(n_stocks: int, n_days: int) -> MarketWindow:
+    rng = np.random.default_rng(0)
+    closes = 10000 * np.cumprod(1 + rng.normal(0, 0.02, (n_stocks, n_days)), axis=1)
+    arrays = {
+        "open_price": closes * (1 + rng.normal(0, 0.005, closes.shape)),
+        "high_price": closes * 1.02,
+        "low_price": closes * 0.98,
+        "close_price": closes,
+        "volume": rng.integers(1000, 1000000, closes.shape).astype(float),
+    }
+    codes = [f"{i:06d}" for i in range(n_stocks)]
+    dates = [f"d{j:05d}" for j in range(n_days)]
+    # 장기 구간(전체 이력) 지표 계산
+    return MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=n_days)
+
+
+def _best_time(fn) -> float:
+    best = float("inf")
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main():
+    n_stocks = int(sys.argv[1]) if len(sys.argv) > 1 else 2700
+    n_days = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+    window = _make_window(n_stocks, n_days)
+    cpu_count = os.cpu_count() or 1
+    print(f"종목 {n_stocks} × 거래일 {n_days}, CPU {cpu_count}개, 지표 {len(INDICATORS)}개 (최소 시간, {REPEAT}회)")
+
+    serial = _best_time(lambda: [IndicatorEvaluator(window).evaluate(name) for name in INDICATORS])
+    print(f"단일 프로세스: {serial:.3f}s")
+
+    for n_workers in [n for n in (2, 4, 8, 16) if n <= max(cpu_count, 2)]:
+        screener = ParallelScreener(n_workers)
+        try:
+            screener.evaluate(window, 0, INDICATORS[0])  # 풀 기동과 가격 행렬 파일 생성은 저장소 버전마다 한 번
+            elapsed = _best_time(lambda: [screener.evaluate(window, 0, name) for name in INDICATORS])
+            for name in INDICATORS:
+                assert np.array_equal(screener.evaluate(window, 0, name), IndicatorEvaluator(window).evaluate(name), equal_nan=True)
+        finally:
+            screener.close()
+        print(f"프로세스 {n_workers}개: {elapsed:.3f}s (속도 {serial / elapsed:.2f}배)")
+
+
+if __name__ == "__main__":
+    main()
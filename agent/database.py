@@ -1,8 +1,22 @@
-from datetime import datetime, timedelta
+from bisect import bisect_left, bisect_right
+from dataclasses import replace
 import sqlite3
-from stock_data_models import History
+import numpy as np
+from stock_data_models import History, MarketWindow
+from funcions import indicator_batch
+from funcions.rolling import build_prefix_sums, append_prefix_sums
+from funcions.column_buffer import append_column
+from funcions.event_index import build_cross_event_index
+from funcions.streak import build_streak_index
+from funcions.indicator_tables import build_indicator_tables, append_indicator_tables
 
 
+# 가격 행렬로 관리하는 History 필드
+PRICE_FIELDS = ("open_price", "high_price", "low_price", "close_price", "volume")
+
+# 이동평균/표준편차 계산용 누적합을 유지하는 필드
+PREFIX_SUM_FIELDS = ("close_price", "volume")
+
 
 class MemoryDatabase:
     def __init__(self):
@@ -32,7 +46,107 @@ class MemoryDatabase:
                 self.database[stock_code][date] = History.from_dict(data)
 
         self.conn.close()
-    
+
+        self.version = 0
+        self._build_price_arrays()
+
+    def _build_price_arrays(self):
+        """종목 × 거래일 가격 행렬을 구성합니다. 거래가 없는 칸은 NaN으로 채웁니다."""
+        self.stock_codes = list(self.database.keys())
+        self.code_index = {code: i for i, code in enumerate(self.stock_codes)}
+        self.trading_dates = sorted({date for histories in self.database.values() for date in histories})
+        self.date_index = {date: j for j, date in enumerate(self.trading_dates)}
+
+        rows, cols, values = [], [], {field: [] for field in PRICE_FIELDS}
+        for i, stock_code in enumerate(self.stock_codes):
+            for date, history in self.database[stock_code].items():
+                rows.append(i)
+                cols.append(self.date_index[date])
+                for field in PRICE_FIELDS:
+                    values[field].append(getattr(history, field))
+
+        shape = (len(self.stock_codes), len(self.trading_dates))
+        self.price_arrays = {}
+        for field in PRICE_FIELDS:
+            matrix = np.full(shape, np.nan)
+            matrix[rows, cols] = values[field]
+            self.price_arrays[field] = matrix
+
+        self.prefix_sums = {field: build_prefix_sums(self.price_arrays[field]) for field in PREFIX_SUM_FIELDS}
+        self._init_streams()
+        self.indicator_tables = build_indicator_tables(self._full_window())
+        self.version += 1
+
+    def _init_streams(self):
+        """적재 시점에 증분 갱신되는 지표 상태를 전체 이력으로 초기화합니다."""
+        self.streams = {
+            "rsi": indicator_batch.init_market_rsi_state(self.price_arrays["close_price"]),
+            "macd": indicator_batch.init_market_macd_state(self.price_arrays["close_price"]),
+            "ema": indicator_batch.MarketEMAHistory(),
+            "cross_events": build_cross_event_index(self._full_window()),
+            "streaks": build_streak_index(self._full_window())
+        }
+
+    def _full_window(self) -> MarketWindow:
+        """저장소 전체 거래일을 지표 구간으로 하는 가격 행렬을 반환합니다."""
+        return MarketWindow(
+            stock_codes=self.stock_codes,
+            dates=self.trading_dates,
+            arrays=self.price_arrays,
+            start=0,
+            stop=len(self.trading_dates),
+            prefix_sums=self.prefix_sums
+        )
+
+    def ingest_daily_prices(self, date: str, rows: list[dict]):
+        """
+        장 마감 후 수집한 하루치 시세를 저장소에 반영합니다.
+
+        가격 행렬, 누적합, 연속 양봉/음봉 등의 연속 길이, 표준 지표 테이블에는 새 거래일 값만 계산해 한 열씩 추가하고
+        (여유 열이 있는 버퍼에 쓰므로 종목당 분할 상환 O(1)), RSI, MACD 등 증분 지표 상태는 종목당 O(1)로 갱신합니다.
+        이동평균 교차 발생일 색인은 정렬된 키 배열에 새 발생일을 삽입하므로 색인된 발생 건수에 비례합니다.
+        처음 보는 종목이 있으면 가격 행렬과 지표 상태를 다시 구성합니다.
+
+        Args:
+            date: 거래일 (YYYY-MM-DD), 마지막 거래일 이후여야 함
+            rows: stock_code, open_price, high_price, low_price, close_price, volume 키를 가진 딕셔너리 리스트
+        """
+        if self.trading_dates and date <= self.trading_dates[-1]:
+            raise ValueError(f"{date}: 마지막 거래일({self.trading_dates[-1]}) 이후의 시세만 추가할 수 있습니다.")
+
+        has_new_stock = False
+        for data in rows:
+            stock_code = data["stock_code"]
+            if stock_code not in self.database:
+                self.database[stock_code] = {}
+                has_new_stock = True
+            self.database[stock_code][date] = History.from_dict({**data, "date": date})
+
+        if has_new_stock:
+            self._build_price_arrays()
+            return
+
+        column = {field: np.full(len(self.stock_codes), np.nan) for field in PRICE_FIELDS}
+        for data in rows:
+            i = self.code_index[data["stock_code"]]
+            history = self.database[data["stock_code"]][date]
+            for field in PRICE_FIELDS:
+                column[field][i] = getattr(history, field)
+
+        for field in PRICE_FIELDS:
+            self.price_arrays[field] = append_column(self.price_arrays[field], column[field])
+        self.date_index[date] = len(self.trading_dates)
+        self.trading_dates.append(date)
+
+        for field in PREFIX_SUM_FIELDS:
+            self.prefix_sums[field] = append_prefix_sums(self.prefix_sums[field], column[field])
+        indicator_batch.update_market_rsi_state(self.streams["rsi"], column["close_price"])
+        indicator_batch.update_market_macd_state(self.streams["macd"], column["close_price"])
+        self.streams["cross_events"].append_day(self._full_window())
+        self.streams["streaks"].append_day(self._full_window())
+        append_indicator_tables(self.indicator_tables, self._full_window(), self.streams["rsi"])
+        self.version += 1
+
 
     def find_stock_history_by_stock_code_and_date(self, stock_code: str, date: str) -> History:
         try:
@@ -41,11 +155,8 @@ class MemoryDatabase:
             return History(date=date, open_price=0, high_price=0, low_price=0, close_price=0, volume=0)
 
     def _date_range(self, start_date: str, end_date: str) -> list[str]:
-        current = datetime.strptime(start_date, '%Y-%m-%d')
-        end_date = datetime.strptime(end_date, '%Y-%m-%d')
-        while current <= end_date:
-            yield current.strftime('%Y-%m-%d')
-            current += timedelta(days=1)
+        """[start_date, end_date] 구간의 저장소 거래일 목록 (주말/휴장일은 읽지 않음)"""
+        return self.trading_dates[bisect_left(self.trading_dates, start_date):bisect_right(self.trading_dates, end_date)]
 
     def find_stock_history_by_stock_code_and_date_range(self, stock_code: str, start_date: str, end_date: str) -> list[History]:
         result = []
@@ -60,5 +171,47 @@ class MemoryDatabase:
     def find_stock_codes_by_market(self, market: str) -> list[str]:
         return list(self.database.keys())
 
-database = MemoryDatabase()
+    def get_market_window(self, market: str, start_date: str, end_date: str) -> MarketWindow:
+        """[start_date, end_date] 구간의 시장 전체 가격 행렬을 반환합니다."""
+        start = bisect_left(self.trading_dates, start_date)
+        stop = bisect_right(self.trading_dates, end_date)
+        return MarketWindow(
+            stock_codes=self.find_stock_codes_by_market(market),
+            dates=self.trading_dates,
+            arrays=self.price_arrays,
+            start=start,
+            stop=max(start, stop),
+            streams=self.streams,
+            prefix_sums=self.prefix_sums,
+            tables=self.indicator_tables
+        )
 
+    def get_trading_window(self, market: str, end_date: str, lookback_days: int) -> MarketWindow:
+        """
+        end_date(포함)까지 저장소 달력 기준 lookback_days 거래일 구간의 시장 전체 가격 행렬을 반환합니다.
+
+        Args:
+            market: 주식 시장 구분
+            end_date: 구간 마지막 날짜 (YYYY-MM-DD). 거래일이 아니면 그 이전 마지막 거래일까지
+            lookback_days: 구간 길이 (거래일)
+
+        Returns:
+            MarketWindow: 시장 전체 가격 행렬 (저장소 이력이 짧으면 첫 거래일부터)
+        """
+        stop = bisect_right(self.trading_dates, end_date)
+        window = self.get_market_window(market, end_date, end_date)
+        return replace(window, start=max(stop - lookback_days, 0), stop=stop)
+
+    def get_cross_section(self, market: str, date: str, fill_value: float = 0.0) -> dict[str, np.ndarray]:
+        """특정 날짜의 시장 전체 가격 벡터를 반환합니다. 거래가 없는 종목은 fill_value(기본 0)로 채웁니다."""
+        j = self.date_index.get(date)
+        if j is None:
+            return {field: np.full(len(self.stock_codes), fill_value) for field in PRICE_FIELDS}
+        return {field: np.nan_to_num(self.price_arrays[field][:, j], nan=fill_value) for field in PRICE_FIELDS}
+
+    def previous_trading_date(self, date: str, days: int = 1) -> str | None:
+        """date(거래일이 아니면 그 이전 마지막 거래일)로부터 저장소 달력 기준 days 거래일 전 날짜 (이력이 없으면 None)"""
+        j = bisect_right(self.trading_dates, date) - 1 - days
+        return self.trading_dates[j] if j >= 0 else None
+
+database = MemoryDatabase()
@@ -0,0 +1,205 @@
+
+import inspect
+from stock_data_models import MarketWindow
+import numpy as np
+
+# 시가/고가/저가/종가 행렬로 시장 전체의 캔들 패턴을 한 번에 판정합니다.
+# 모든 패턴 함수는 지표 구간의 각 거래일에 패턴이 완성됐는지를 (종목 × 구간 거래일) 불리언 행렬로 반환합니다.
+# 전일/n일 전 봉은 저장소의 이전 거래일 열이며, 거래가 없는 날(NaN)이 끼면 패턴이 성립하지 않습니다.
+
+CONSECUTIVE_DAYS = 3
+DOJI_BODY_RATIO = 0.1
+
+
+def lagged(window: MarketWindow, name: str, lag: int) -> np.ndarray:
+    """지표 구간을 lag 거래일 앞당긴 가격 행렬을 반환합니다. 저장소 첫 거래일 이전 칸은 NaN입니다."""
+    matrix = window.arrays[name]
+    start, stop = window.start - lag, window.stop - lag
+    if start >= 0:
+        return matrix[:, start:stop]
+    padding = np.full((len(matrix), min(-start, stop - start)), np.nan)
+    return np.concatenate([padding, matrix[:, max(start, 0):max(stop, 0)]], axis=1)
+
+
+def _candles(window: MarketWindow, lag: int = 0) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """lag 거래일 전 봉의 (시가, 고가, 저가, 종가) 행렬을 반환합니다."""
+    return tuple(lagged(window, name, lag) for name in ("open_price", "high_price", "low_price", "close_price"))
+
+
+def bullish(window: MarketWindow) -> np.ndarray:
+    """양봉 (종가 > 시가)"""
+    open_price, _, _, close_price = _candles(window)
+    return close_price > open_price
+
+
+def bearish(window: MarketWindow) -> np.ndarray:
+    """음봉 (종가 < 시가)"""
+    open_price, _, _, close_price = _candles(window)
+    return close_price < open_price
+
+
+def _consecutive(window: MarketWindow, days: int, rising: bool) -> np.ndarray:
+    """해당 거래일까지 days 거래일 연속 양봉(rising) 또는 음봉인지 판정합니다."""
+    result = np.ones((len(window.stock_codes), window.stop - window.start), dtype=bool)
+    for lag in range(days):
+        open_price, _, _, close_price = _candles(window, lag)
+        result &= (close_price > open_price) if rising else (close_price < open_price)
+    return result
+
+
+def consecutive_bullish(window: MarketWindow, days: int = CONSECUTIVE_DAYS) -> np.ndarray:
+    """
+    연속 양봉
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        days (int): 연속 거래일 수
+
+    Returns:
+        np.ndarray: (종목 × 구간 거래일) 해당 거래일까지 days일 연속 양봉이면 True
+    """
+    return _consecutive(window, days, rising=True)
+
+
+def consecutive_bearish(window: MarketWindow, days: int = CONSECUTIVE_DAYS) -> np.ndarray:
+    """
+    연속 음봉
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        days (int): 연속 거래일 수
+
+    Returns:
+        np.ndarray: (종목 × 구간 거래일) 해당 거래일까지 days일 연속 음봉이면 True
+    """
+    return _consecutive(window, days, rising=False)
+
+
+def _three_soldiers(window: MarketWindow, rising: bool) -> np.ndarray:
+    """적삼병/흑삼병: 3일 연속 같은 방향 봉, 종가가 계속 오르거나(내리거나) 시가가 전일 몸통 안에서 시작"""
+    result = _consecutive(window, 3, rising)
+    for lag in range(2):
+        open_price, _, _, close_price = _candles(window, lag)
+        prev_open, _, _, prev_close = _candles(window, lag + 1)
+        if rising:
+            result &= (close_price > prev_close) & (open_price >= prev_open) & (open_price <= prev_close)
+        else:
+            result &= (close_price < prev_close) & (open_price <= prev_open) & (open_price >= prev_close)
+    return result
+
+
+def three_white_soldiers(window: MarketWindow) -> np.ndarray:
+    """적삼병: 3일 연속 양봉이며 종가가 매일 오르고, 시가가 전일 몸통 안에서 시작"""
+    return _three_soldiers(window, rising=True)
+
+
+def three_black_crows(window: MarketWindow) -> np.ndarray:
+    """흑삼병: 3일 연속 음봉이며 종가가 매일 내리고, 시가가 전일 몸통 안에서 시작"""
+    return _three_soldiers(window, rising=False)
+
+
+def gap_up(window: MarketWindow) -> np.ndarray:
+    """갭 상승: 당일 저가가 전일 고가보다 높음"""
+    _, _, low_price, _ = _candles(window)
+    _, prev_high, _, _ = _candles(window, 1)
+    return low_price > prev_high
+
+
+def gap_down(window: MarketWindow) -> np.ndarray:
+    """갭 하락: 당일 고가가 전일 저가보다 낮음"""
+    _, high_price, _, _ = _candles(window)
+    _, _, prev_low, _ = _candles(window, 1)
+    return high_price < prev_low
+
+
+def doji(window: MarketWindow, body_ratio: float = DOJI_BODY_RATIO) -> np.ndarray:
+    """
+    도지: 몸통(|종가 - 시가|)이 하루 변동폭(고가 - 저가)의 body_ratio 이하
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        body_ratio (float): 변동폭 대비 최대 몸통 비율
+
+    Returns:
+        np.ndarray: (종목 × 구간 거래일) 도지이면 True
+    """
+    open_price, high_price, low_price, close_price = _candles(window)
+    return np.abs(close_price - open_price) <= body_ratio * (high_price - low_price)
+
+
+def bullish_engulfing(window: MarketWindow) -> np.ndarray:
+    """상승 장악형: 전일 음봉의 몸통을 당일 양봉 몸통이 감쌈"""
+    open_price, _, _, close_price = _candles(window)
+    prev_open, _, _, prev_close = _candles(window, 1)
+    return (prev_close < prev_open) & (close_price > open_price) & (open_price <= prev_close) & (close_price >= prev_open)
+
+
+def bearish_engulfing(window: MarketWindow) -> np.ndarray:
+    """하락 장악형: 전일 양봉의 몸통을 당일 음봉 몸통이 감쌈"""
+    open_price, _, _, close_price = _candles(window)
+    prev_open, _, _, prev_close = _candles(window, 1)
+    return (prev_close > prev_open) & (close_price < open_price) & (open_price >= prev_close) & (close_price <= prev_open)
+
+
+# 패턴 이름 → 판정 함수
+CANDLE_PATTERNS = {
+    "bullish": bullish,
+    "bearish": bearish,
+    "consecutive_bullish": consecutive_bullish,
+    "consecutive_bearish": consecutive_bearish,
+    "three_white_soldiers": three_white_soldiers,
+    "three_black_crows": three_black_crows,
+    "gap_up": gap_up,
+    "gap_down": gap_down,
+    "doji": doji,
+    "bullish_engulfing": bullish_engulfing,
+    "bearish_engulfing": bearish_engulfing,
+}
+
+
+def check_pattern_params(pattern: str, params: dict):
+    """
+    캔들 패턴 파라미터가 패턴 함수가 받는 이름과 값인지 검사합니다.
+
+    days는 1 이상의 정수, body_ratio는 0보다 크고 1보다 작은 숫자여야 합니다.
+
+    Args:
+        pattern: CANDLE_PATTERNS의 패턴 이름
+        params: 패턴 파라미터
+
+    Raises:
+        ValueError: 알 수 없는 패턴 이름, 패턴 함수가 받지 않는 파라미터 또는 범위를 벗어난 값
+    """
+    if pattern not in CANDLE_PATTERNS:
+        raise ValueError(f"알 수 없는 캔들 패턴입니다: {pattern} (사용 가능: {', '.join(CANDLE_PATTERNS)})")
+    if not isinstance(params, dict):
+        raise ValueError(f"패턴 파라미터는 이름 → 값 형식이어야 합니다: {params!r}")
+    accepted = list(inspect.signature(CANDLE_PATTERNS[pattern]).parameters)[1:]
+    for key, value in params.items():
+        if key not in accepted:
+            raise ValueError(f"{pattern}이(가) 받지 않는 파라미터입니다: {key} (사용 가능: {', '.join(accepted) or '없음'})")
+        if key == "days" and (not isinstance(value, int) or isinstance(value, bool) or value < 1):
+            raise ValueError(f"{pattern}의 days는 1 이상의 정수여야 합니다: {value!r}")
+        if key == "body_ratio" and (
+            not isinstance(value, (int, float)) or isinstance(value, bool) or not 0 < value < 1
+        ):
+            raise ValueError(f"{pattern}의 body_ratio는 0보다 크고 1보다 작아야 합니다: {value!r}")
+
+
+def scan_pattern(window: MarketWindow, pattern: str, **params) -> np.ndarray:
+    """
+    이름으로 캔들 패턴을 판정합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        pattern (str): CANDLE_PATTERNS의 패턴 이름
+        **params: 패턴 함수 파라미터 (consecutive_*의 days, doji의 body_ratio)
+
+    Returns:
+        np.ndarray: (종목 × 구간 거래일) 패턴 완성 여부
+
+    Raises:
+        ValueError: 알 수 없는 패턴 이름 또는 올바르지 않은 파라미터 (check_pattern_params)
+    """
+    check_pattern_params(pattern, params)
+    return CANDLE_PATTERNS[pattern](window, **params)
@@ -0,0 +1,52 @@
+
+import weakref
+import numpy as np
+
+# 적재 시점에 (종목 × 거래일) 행렬 끝에 새 거래일 열을 이어 붙이는 함수입니다.
+# 행렬을 여유 열이 있는 버퍼 앞부분의 뷰로 두고 새 열은 여유 열에 바로 쓰며,
+# 버퍼가 찼을 때만 더 큰 버퍼로 옮겨 담습니다. 버퍼를 일정 비율로 늘리므로 열 추가는 종목당 분할 상환 O(1)입니다.
+
+# 버퍼가 찼을 때 늘리는 비율과 최소 여유 열 수
+GROWTH = 1.25
+MIN_SPARE = 64
+
+# id(버퍼) → 마지막으로 돌려준 뷰의 열 수 (그 뷰에 이어 붙일 때만 버퍼를 재사용)
+_filled: dict[int, int] = {}
+
+
+def _register(buffer: np.ndarray, n_cols: int):
+    if id(buffer) not in _filled:
+        weakref.finalize(buffer, _filled.pop, id(buffer), None)
+    _filled[id(buffer)] = n_cols
+
+
+def append_column(matrix: np.ndarray, column: np.ndarray) -> np.ndarray:
+    """
+    (행 × 열) 행렬 끝에 한 열을 붙인 행렬을 반환합니다.
+
+    matrix가 이 함수가 마지막으로 돌려준 행렬이고 버퍼에 여유 열이 있으면 여유 열에 값을 쓰고 한 열 넓은 뷰를 돌려줍니다.
+    그 외에는 여유 열을 둔 새 버퍼로 옮겨 담습니다. 어느 경우든 이전에 돌려준 행렬의 값은 바뀌지 않습니다.
+
+    Args:
+        matrix: (행 × 열) 행렬
+        column: 행별 새 값
+
+    Returns:
+        np.ndarray: (행 × (열 + 1)) 행렬
+    """
+    n_rows, n_cols = matrix.shape
+    column = np.asarray(column)
+    dtype = np.result_type(matrix, column)
+    buffer = matrix.base
+    reusable = (
+        isinstance(buffer, np.ndarray) and buffer.ndim == 2
+        and _filled.get(id(buffer)) == n_cols and buffer.shape[0] == n_rows and buffer.shape[1] > n_cols
+        and buffer.dtype == dtype and matrix.ctypes.data == buffer.ctypes.data and matrix.strides == buffer.strides
+    )
+    if not reusable:
+        capacity = n_cols + 1 + max(int(n_cols * (GROWTH - 1)), MIN_SPARE)
+        buffer = np.empty((n_rows, capacity), dtype=dtype)
+        buffer[:, :n_cols] = matrix
+    buffer[:, n_cols] = column
+    _register(buffer, n_cols + 1)
+    return buffer[:, :n_cols + 1]
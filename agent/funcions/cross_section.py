@@ -0,0 +1,107 @@
+
+import numpy as np
+
+# 같은 날짜의 시장 전체 종목을 서로 비교하는 횡단면 변환(순위, 백분위, 표준점수)입니다.
+# 모든 함수는 종목 축(axis 0)을 기준으로 계산하므로 종목 벡터(한 날짜) 또는 (종목 × 거래일) 행렬(날짜별)을 받습니다.
+# 값이 없는 종목(NaN)은 비교 대상에서 빠지고 결과도 NaN입니다.
+
+
+def _count_at_most(values: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """종목 벡터의 각 값 이하인 유효 종목 수와 유효 종목 수를 반환합니다."""
+    valid = np.sort(values[~np.isnan(values)])
+    counts = np.searchsorted(valid, values, side="right").astype(float)
+    counts[np.isnan(values)] = np.nan
+    return counts, len(valid)
+
+
+def _by_date(fn, values: np.ndarray) -> np.ndarray:
+    """종목 벡터 함수 fn을 행렬의 날짜(열)마다 적용합니다."""
+    values = np.asarray(values, dtype=float)
+    if values.ndim == 1:
+        return fn(values)
+    return np.stack([fn(values[:, j]) for j in range(values.shape[1])], axis=1) if values.shape[1] else values.copy()
+
+
+def _rank(values: np.ndarray) -> np.ndarray:
+    counts, n_valid = _count_at_most(values)
+    # 자신보다 큰 값의 개수 + 1 (동점은 같은 순위)
+    return n_valid - counts + 1
+
+
+def _percentile(values: np.ndarray) -> np.ndarray:
+    counts, n_valid = _count_at_most(values)
+    return 100.0 * counts / n_valid if n_valid else counts
+
+
+def _zscore(values: np.ndarray) -> np.ndarray:
+    valid = values[~np.isnan(values)]
+    if len(valid) == 0:
+        return np.full(len(values), np.nan)
+    std = valid.std()
+    return (values - valid.mean()) / std if std > 0 else np.where(np.isnan(values), np.nan, 0.0)
+
+
+def cross_rank(values: np.ndarray) -> np.ndarray:
+    """
+    날짜별 내림차순 순위 (가장 큰 값이 1위, 동점은 같은 순위)
+
+    Args:
+        values (np.ndarray): 종목 벡터 또는 (종목 × 거래일) 행렬
+
+    Returns:
+        np.ndarray: 같은 모양의 순위
+    """
+    return _by_date(_rank, values)
+
+
+def cross_percentile(values: np.ndarray) -> np.ndarray:
+    """
+    날짜별 백분위 (0~100, 값이 자신 이하인 유효 종목 비율. 가장 큰 값이 100)
+
+    "상위 10%"는 백분위 >= 90입니다.
+
+    Args:
+        values (np.ndarray): 종목 벡터 또는 (종목 × 거래일) 행렬
+
+    Returns:
+        np.ndarray: 같은 모양의 백분위
+    """
+    return _by_date(_percentile, values)
+
+
+def cross_zscore(values: np.ndarray) -> np.ndarray:
+    """
+    날짜별 표준점수 ((값 - 시장 평균) / 시장 표준편차). 모든 값이 같으면 0
+
+    Args:
+        values (np.ndarray): 종목 벡터 또는 (종목 × 거래일) 행렬
+
+    Returns:
+        np.ndarray: 같은 모양의 표준점수
+    """
+    return _by_date(_zscore, values)
+
+
+# 변환 이름 → 함수. 수식 변수명은 "{원래 변수명}_{변환 이름}" 입니다. (예: indicator_value_percentile, volume_rank)
+CROSS_SECTION_TRANSFORMS = {
+    "rank": cross_rank,
+    "percentile": cross_percentile,
+    "zscore": cross_zscore,
+}
+
+
+def cross_section_variables(columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
+    """
+    시장 전체 변수 벡터마다 횡단면 변환 변수를 만듭니다.
+
+    Args:
+        columns: 변수명 → 종목 벡터 (값이 없는 종목은 NaN)
+
+    Returns:
+        dict[str, np.ndarray]: "{변수명}_{변환 이름}" → 종목 벡터
+    """
+    return {
+        f"{name}_{kind}": transform(values)
+        for name, values in columns.items()
+        for kind, transform in CROSS_SECTION_TRANSFORMS.items()
+    }
@@ -0,0 +1,155 @@
+
+from dataclasses import replace
+from stock_data_models import MarketWindow
+from funcions.indicator_batch import cross_matrix
+import numpy as np
+
+# 저장소 적재 시점에 만들어 두는 이동평균 교차 발생일 색인입니다.
+# 발생일은 (종목 행 × KEY_STRIDE + 거래일 위치) 정렬 키로 보관하므로
+# 임의 기간의 존재/횟수/첫 발생일 조회가 종목마다 이진 탐색 두 번으로 끝납니다.
+
+# 기본으로 색인하는 (단기, 장기) 이동평균 쌍
+CROSS_WINDOW_PAIRS = ((5, 20), (20, 60), (60, 120))
+
+# 종목 행마다 확보하는 키 공간 (거래일 수보다 충분히 커야 함)
+KEY_STRIDE = 1 << 32
+
+CROSS_KINDS = ("golden", "dead")
+
+
+class CrossEventIndex:
+    """종목별 골든/데드 크로스 발생일 색인"""
+
+    def __init__(self, n_stocks: int, pairs: tuple[tuple[int, int], ...] = CROSS_WINDOW_PAIRS):
+        """
+        Args:
+            n_stocks: 종목 수 (저장소 행 수)
+            pairs: 색인할 (단기, 장기) 이동평균 길이 쌍
+        """
+        self.n_stocks = n_stocks
+        self.pairs = tuple(pairs)
+        self._keys = {(kind, pair): np.zeros(0, dtype=np.int64) for kind in CROSS_KINDS for pair in self.pairs}
+
+    def has_pair(self, short_period: int, long_period: int) -> bool:
+        """해당 이동평균 쌍이 색인되어 있는지 여부"""
+        return (short_period, long_period) in self.pairs
+
+    def add_events(self, kind: str, pair: tuple[int, int], crosses: np.ndarray, first_day: int):
+        """
+        교차 발생 행렬을 색인에 추가합니다.
+
+        Args:
+            kind: "golden" 또는 "dead"
+            pair: (단기, 장기) 이동평균 길이
+            crosses: (종목 × 거래일) 교차 발생 여부
+            first_day: crosses 첫 열의 저장소 거래일 위치
+        """
+        rows, days = np.nonzero(crosses)
+        new_keys = rows.astype(np.int64) * KEY_STRIDE + (days + first_day)
+        keys = self._keys[(kind, pair)]
+        self._keys[(kind, pair)] = np.insert(keys, np.searchsorted(keys, new_keys), new_keys)
+
+    def _bounds(self, kind: str, pair: tuple[int, int], start: int, stop: int) -> tuple[np.ndarray, np.ndarray]:
+        """[start, stop) 거래일 구간에 해당하는 종목별 키 위치 범위를 이진 탐색으로 구합니다."""
+        keys = self._keys[(kind, pair)]
+        base = np.arange(self.n_stocks, dtype=np.int64) * KEY_STRIDE
+        return np.searchsorted(keys, base + start), np.searchsorted(keys, base + stop)
+
+    def count(self, kind: str, short_period: int, long_period: int, start: int, stop: int) -> np.ndarray:
+        """
+        [start, stop) 거래일 구간의 종목별 교차 발생 횟수를 반환합니다.
+
+        Args:
+            kind: "golden" 또는 "dead"
+            short_period: 단기 이동평균 길이
+            long_period: 장기 이동평균 길이
+            start: 첫 거래일 위치
+            stop: 끝 거래일 위치 (미포함)
+
+        Returns:
+            np.ndarray: 종목별 교차 발생 횟수
+        """
+        lo, hi = self._bounds(kind, (short_period, long_period), start, stop)
+        return hi - lo
+
+    def first_occurrence(self, kind: str, short_period: int, long_period: int, start: int, stop: int) -> np.ndarray:
+        """
+        [start, stop) 거래일 구간에서 종목별 첫 교차 발생일 위치를 반환합니다.
+
+        Returns:
+            np.ndarray: 종목별 거래일 위치 (발생하지 않았으면 -1)
+        """
+        keys = self._keys[(kind, (short_period, long_period))]
+        lo, hi = self._bounds(kind, (short_period, long_period), start, stop)
+        first = keys[np.minimum(lo, len(keys) - 1)] % KEY_STRIDE if len(keys) else np.zeros(self.n_stocks, dtype=np.int64)
+        return np.where(hi > lo, first, -1)
+
+    def stock_events(self, kind: str, short_period: int, long_period: int, row: int, start: int, stop: int) -> np.ndarray:
+        """
+        한 종목의 [start, stop) 거래일 구간 교차 발생일 위치를 반환합니다.
+
+        Returns:
+            np.ndarray: 오름차순 거래일 위치
+        """
+        keys = self._keys[(kind, (short_period, long_period))]
+        lo = np.searchsorted(keys, row * KEY_STRIDE + start)
+        hi = np.searchsorted(keys, row * KEY_STRIDE + stop)
+        return keys[lo:hi] % KEY_STRIDE
+
+    def append_day(self, window: MarketWindow):
+        """
+        저장소에 추가된 마지막 거래일의 교차를 색인에 반영합니다.
+
+        Args:
+            window (MarketWindow): 저장소 전체 구간 (마지막 거래일까지 포함)
+        """
+        last_day = replace(window, start=window.stop - 1)
+        for pair in self.pairs:
+            for kind in CROSS_KINDS:
+                self.add_events(kind, pair, cross_matrix(last_day, *pair, golden=kind == "golden"), last_day.start)
+
+
+def build_cross_event_index(window: MarketWindow, pairs: tuple[tuple[int, int], ...] = CROSS_WINDOW_PAIRS) -> CrossEventIndex:
+    """
+    저장소 전체 이력의 교차 발생일 색인을 만듭니다.
+
+    Args:
+        window (MarketWindow): 저장소 전체 구간
+        pairs: 색인할 (단기, 장기) 이동평균 길이 쌍
+
+    Returns:
+        CrossEventIndex: 교차 발생일 색인
+    """
+    index = CrossEventIndex(len(window.stock_codes), pairs)
+    for pair in pairs:
+        for kind in CROSS_KINDS:
+            index.add_events(kind, pair, cross_matrix(window, *pair, golden=kind == "golden"), window.start)
+    return index
+
+
+def query_cross_events(window: MarketWindow, kind: str, short_period: int, long_period: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    지표 구간의 종목별 교차 발생 횟수와 첫 발생일 위치를 구합니다.
+
+    저장소 색인에 없는 이동평균 쌍이면 교차 행렬을 직접 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        kind: "golden" 또는 "dead"
+        short_period: 단기 이동평균 길이
+        long_period: 장기 이동평균 길이
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 종목별 발생 횟수, 첫 발생 거래일 위치 (발생하지 않았으면 -1)
+    """
+    events = window.streams.get("cross_events")
+    if events is not None and events.has_pair(short_period, long_period) and events.n_stocks == len(window.stock_codes):
+        return (
+            events.count(kind, short_period, long_period, window.start, window.stop),
+            events.first_occurrence(kind, short_period, long_period, window.start, window.stop)
+        )
+
+    crosses = cross_matrix(window, short_period, long_period, golden=kind == "golden")
+    counts = crosses.sum(axis=1)
+    first = np.where(counts > 0, crosses.argmax(axis=1) + window.start, -1) if crosses.shape[1] else np.full(len(counts), -1)
+    return counts, first
@@ -0,0 +1,231 @@
+
+import ast
+from functools import lru_cache
+import numpy as np
+
+# 스크리닝 조건식을 한 번만 파싱해 허용된 구문만 담은 AST로 검사하고,
+# 시장 전체 변수 벡터에 대해 NumPy 연산으로 한 번에 평가합니다. (종목마다 eval하지 않음)
+# 0으로 나누면 NaN이 되어 비교 결과는 False입니다.
+# 상수와 변수는 모두 실수로 평가하므로 음수 거듭제곱은 분수가 되고, 너무 큰 값은 정수처럼 넘치지 않고 inf가 됩니다.
+
+
+class FormulaError(ValueError):
+    """조건식 문법 오류 또는 허용되지 않은 구문/변수"""
+
+
+def _minimum(*args):
+    return np.minimum.reduce(np.broadcast_arrays(*args))
+
+
+def _maximum(*args):
+    return np.maximum.reduce(np.broadcast_arrays(*args))
+
+
+def _round(value, ndigits=0.0):
+    # 자릿수는 검사에서 정수 상수만 허용 (상수는 실수로 평가되므로 다시 정수로)
+    return np.round(value, int(ndigits))
+
+
+# 수식에서 호출할 수 있는 함수 (파이썬 내장 함수와 같은 의미의 원소별 연산)
+FORMULA_FUNCTIONS = {
+    "abs": np.abs,
+    "min": _minimum,
+    "max": _maximum,
+    "round": _round,
+    "pow": np.power,
+}
+
+
+# 함수명 → (최소 인자 수, 최대 인자 수. None이면 제한 없음)
+_FUNCTION_ARITY = {
+    "abs": (1, 1),
+    "min": (1, None),
+    "max": (1, None),
+    "round": (1, 2),  # round(x, 자릿수) 자릿수는 정수 상수
+    "pow": (2, 2),
+}
+
+
+def _divide(left, right, op):
+    with np.errstate(divide="ignore", invalid="ignore"):
+        result = op(left, right)
+    return np.where(np.asarray(right) == 0, np.nan, result)
+
+
+_BINARY_OPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: lambda left, right: _divide(left, right, np.true_divide),
+    ast.FloorDiv: lambda left, right: _divide(left, right, np.floor_divide),
+    ast.Mod: lambda left, right: _divide(left, right, np.mod),
+    ast.Pow: np.power,
+}
+
+_UNARY_OPS = {
+    ast.UAdd: np.positive,
+    ast.USub: np.negative,
+    ast.Not: lambda operand: np.logical_not(np.asarray(operand, dtype=bool)),
+}
+
+_COMPARE_OPS = {
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+
+
+class CompiledFormula:
+    """검사를 마친 조건식. evaluate로 시장 전체 변수 벡터에 대해 평가합니다."""
+
+    def __init__(self, formula: str, tree: ast.Expression, names: frozenset):
+        self.formula = formula
+        self.tree = tree
+        self.names = names
+
+    def evaluate(self, variables: dict[str, np.ndarray]) -> np.ndarray:
+        """
+        조건식을 시장 전체에 대해 한 번에 평가합니다.
+
+        Args:
+            variables: 변수명 → 종목 벡터 (수식에 쓰인 변수는 모두 있어야 함)
+
+        Returns:
+            np.ndarray: 종목별 조건 만족 여부 (불리언 마스크. 값이 수치이면 파이썬 참/거짓 기준)
+
+        Raises:
+            FormulaError: 변수 값이 없거나 평가 중 오류가 난 경우 (예: 변수 벡터 길이가 다름)
+        """
+        missing = self.names - variables.keys()
+        if missing:
+            raise FormulaError(f"수식 변수 값이 없습니다: {', '.join(sorted(missing))}")
+        try:
+            with np.errstate(invalid="ignore", over="ignore", divide="ignore"):
+                result = self._eval(self.tree.body, variables)
+        except (ArithmeticError, TypeError, ValueError) as e:
+            raise FormulaError(f"수식 평가 오류: {self.formula} ({e})") from e
+        size = len(next(iter(variables.values()))) if variables else 1
+        return np.broadcast_to(np.asarray(result, dtype=bool), (size, )).copy()
+
+    def conjuncts(self) -> list["CompiledFormula"]:
+        """
+        최상위 and로 묶인 조건을 하나씩 나눕니다. (a and (b and c) → [a, b, c], and가 아니면 [자신])
+
+        Returns:
+            list[CompiledFormula]: 각 조건식 (모두 만족해야 전체 조건식을 만족)
+        """
+        parts = []
+
+        def split(node: ast.AST):
+            if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+                for value in node.values:
+                    split(value)
+            else:
+                parts.append(node)
+        split(self.tree.body)
+        if len(parts) == 1:
+            return [self]
+        return [
+            CompiledFormula(ast.unparse(part), ast.Expression(body=part),
+                            frozenset(child.id for child in ast.walk(part) if isinstance(child, ast.Name)) & self.names)
+            for part in parts
+        ]
+
+    @property
+    def canonical(self) -> str:
+        """공백/불필요한 괄호를 정리한 정규화 수식 (캐시 키용)"""
+        return ast.unparse(self.tree.body)
+
+    @property
+    def size(self) -> int:
+        """연산 노드 수 (평가 비용 추정용)"""
+        return sum(1 for _ in ast.walk(self.tree.body))
+
+    def _eval(self, node: ast.AST, variables: dict[str, np.ndarray]):
+        if isinstance(node, ast.Constant):
+            return float(node.value)
+        if isinstance(node, ast.Name):
+            return np.asarray(variables[node.id], dtype=float)
+        if isinstance(node, ast.BinOp):
+            return _BINARY_OPS[type(node.op)](self._eval(node.left, variables), self._eval(node.right, variables))
+        if isinstance(node, ast.UnaryOp):
+            return _UNARY_OPS[type(node.op)](self._eval(node.operand, variables))
+        if isinstance(node, ast.BoolOp):
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return combine.reduce([np.asarray(self._eval(value, variables), dtype=bool) for value in node.values])
+        if isinstance(node, ast.Compare):
+            # a < b < c 는 (a < b) and (b < c)
+            result, left = True, self._eval(node.left, variables)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self._eval(comparator, variables)
+                result = np.logical_and(result, _COMPARE_OPS[type(op)](left, right))
+                left = right
+            return result
+        # 남은 노드는 검사를 통과한 함수 호출뿐
+        return FORMULA_FUNCTIONS[node.func.id](*(self._eval(arg, variables) for arg in node.args))
+
+
+def _check(node: ast.AST, variables: frozenset, names: set):
+    """허용된 구문만 있는지 재귀적으로 검사하고 사용한 변수명을 모읍니다."""
+    if isinstance(node, ast.Constant):
+        if not isinstance(node.value, (int, float)):  # bool은 int의 하위 타입
+            raise FormulaError(f"숫자가 아닌 상수는 사용할 수 없습니다: {node.value!r}")
+        return
+    if isinstance(node, ast.Name):
+        if node.id not in variables:
+            raise FormulaError(f"사용할 수 없는 변수입니다: {node.id} (사용 가능: {', '.join(sorted(variables))})")
+        names.add(node.id)
+        return
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.func.id not in FORMULA_FUNCTIONS or node.keywords:
+            raise FormulaError(f"사용할 수 없는 함수 호출입니다: {ast.unparse(node)} (사용 가능: {', '.join(FORMULA_FUNCTIONS)})")
+        low, high = _FUNCTION_ARITY[node.func.id]
+        if len(node.args) < low or (high is not None and len(node.args) > high) or any(isinstance(arg, ast.Starred) for arg in node.args):
+            expected = f"{low}개" if low == high else f"{low}개 이상" if high is None else f"{low}~{high}개"
+            raise FormulaError(f"함수 인자 수가 맞지 않습니다: {ast.unparse(node)} ({node.func.id}는 인자 {expected})")
+        if node.func.id == "round" and len(node.args) == 2:
+            ndigits = node.args[1]
+            if not (isinstance(ndigits, ast.Constant) and type(ndigits.value) is int):
+                raise FormulaError(f"round의 자릿수는 정수 상수여야 합니다: {ast.unparse(node)}")
+        children = node.args
+    elif isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        children = [node.left, node.right]
+    elif isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        children = [node.operand]
+    elif isinstance(node, ast.BoolOp):
+        children = node.values
+    elif isinstance(node, ast.Compare) and all(type(op) in _COMPARE_OPS for op in node.ops):
+        children = [node.left, *node.comparators]
+    else:
+        raise FormulaError(f"허용되지 않는 구문입니다: {ast.unparse(node)}")
+    for child in children:
+        _check(child, variables, names)
+
+
+@lru_cache(maxsize=256)
+def compile_formula(formula: str, variables: frozenset) -> CompiledFormula:
+    """
+    조건식을 파싱하고 허용된 구문(사칙연산, 비교, and/or/not, abs/min/max/round/pow)과 변수만 쓰였는지 검사합니다.
+
+    같은 수식은 캐시된 결과를 재사용합니다.
+
+    Args:
+        formula: 조건식 (예: "close_price / indicator_value > 1.05")
+        variables: 사용할 수 있는 변수명
+
+    Returns:
+        CompiledFormula: 검사를 마친 조건식
+
+    Raises:
+        FormulaError: 문법 오류 또는 허용되지 않은 구문/변수
+    """
+    try:
+        tree = ast.parse(formula.strip(), mode="eval")
+    except SyntaxError as e:
+        raise FormulaError(f"수식 문법 오류: {formula} ({e.msg})") from e
+    names = set()
+    _check(tree.body, variables, names)
+    return CompiledFormula(formula, tree, frozenset(names))
@@ -1,39 +1,86 @@
 
+from dataclasses import dataclass
 from stock_data_models import History
 import numpy as np
 
 
 
-def calculate_rsi(stock_history: list[History]) -> float:
+RSI_PERIOD = 14
+
+
+@dataclass
+class RSIState:
+    """Wilder RSI 계산 상태 (새 종가가 들어오면 O(1)로 갱신)"""
+    avg_gain: float = 0.0
+    avg_loss: float = 0.0
+    last_close: float = float('nan')
+    count: int = 0  # 지금까지 반영한 종가 변화량 개수
+    period: int = RSI_PERIOD
+
+
+def update_rsi_state(state: RSIState, close: float) -> RSIState:
     """
-    주어진 주식 히스토리에서 RSI(Relative Strength Index)를 계산합니다.
+    새 종가 하나를 RSI 상태에 반영합니다.
+
+    처음 period개의 변화량은 단순평균으로 시드하고, 그 뒤로는 Wilder 평활을 적용합니다.
 
     Args:
-        stock_history (List[History]): 주식 가격 데이터 리스트
+        state (RSIState): 갱신할 RSI 상태
+        close (float): 새 종가
 
     Returns:
-        float: RSI 값
+        RSIState: 갱신된 상태 (같은 객체)
     """
-    if len(stock_history) < 15:
-        return float('nan')
+    if not np.isnan(state.last_close):
+        delta = close - state.last_close
+        gain = max(delta, 0.0)
+        loss = max(-delta, 0.0)
+
+        state.count += 1
+        if state.count <= state.period:
+            state.avg_gain += (gain - state.avg_gain) / state.count
+            state.avg_loss += (loss - state.avg_loss) / state.count
+        else:
+            state.avg_gain = (state.avg_gain * (state.period - 1) + gain) / state.period
+            state.avg_loss = (state.avg_loss * (state.period - 1) + loss) / state.period
+
+    state.last_close = close
+    return state
 
-    # 날짜순 정렬
-    stock_history = sorted(stock_history, key=lambda x: x.date)
-    closes = np.array([h.close_price for h in stock_history])
-    deltas = closes[1:] - closes[:-1]
 
-    gains = np.where(deltas > 0, deltas, 0)
-    losses = np.where(deltas < 0, -deltas, 0)
+def rsi_from_state(state: RSIState) -> float:
+    """
+    RSI 상태에서 RSI 값을 계산합니다.
 
-    avg_gain = np.mean(gains[-14:])
-    avg_loss = np.mean(losses[-14:])
+    Args:
+        state (RSIState): RSI 상태
 
-    if avg_loss == 0:
+    Returns:
+        float: RSI 값 (변화량이 period개 미만이면 NaN)
+    """
+    if state.count < state.period:
+        return float('nan')
+    if state.avg_loss == 0:
         return 100.0
 
-    rs = avg_gain / avg_loss
-    rsi = 100 - (100 / (1 + rs))
-    return rsi
+    rs = state.avg_gain / state.avg_loss
+    return 100 - (100 / (1 + rs))
+
+
+def calculate_rsi(stock_history: list[History]) -> float:
+    """
+    주어진 주식 히스토리에서 Wilder 평활 RSI(Relative Strength Index)를 계산합니다.
+
+    Args:
+        stock_history (List[History]): 날짜 오름차순으로 정렬된 주식 가격 데이터 리스트
+
+    Returns:
+        float: RSI 값
+    """
+    state = RSIState()
+    for h in stock_history:
+        update_rsi_state(state, h.close_price)
+    return rsi_from_state(state)
 
 
 def calculate_average_volume(history: list[History]) -> float:
@@ -0,0 +1,1186 @@
+
+from collections import OrderedDict
+from dataclasses import dataclass, replace
+from threading import RLock
+from typing import Callable, Hashable
+from stock_data_models import MarketWindow
+from funcions.indicator import RSI_PERIOD
+from funcions.rolling import PrefixSums, build_prefix_sums, rolling_mean, rolling_std
+import numpy as np
+
+# 시장 전체(종목 × 거래일) 행렬을 한 번에 계산하는 지표 함수들입니다.
+# indicator.py의 종목별 함수와 같은 이름/의미를 가지며, 결과는 window.stock_codes 순서의 벡터입니다.
+# 이동평균 계열은 저장소의 누적합을 사용하므로 구간 시작일 이전 이력도 반영됩니다.
+# 이동평균 계열(이동평균, 골든/데드크로스, 볼린저 밴드)의 기간은 저장소 달력의 거래일 수입니다.
+# 거래정지로 빈 날도 기간에 포함되며, 기간의 유효 봉이 min_periods(기본값: 기간 전체)보다 적으면 값이 NaN입니다.
+# 따라서 거래정지가 있는 종목은 빈 날을 건너뛰고 봉을 이어 붙이는 indicator.py의 종목별 함수와 값이 다를 수 있습니다.
+
+SHORT_WINDOW = 5
+LONG_WINDOW = 20
+BOLLINGER_WINDOW = 20
+BOLLINGER_K = 1.0
+VOLUME_WINDOW = 20
+MACD_FAST = 12
+MACD_SLOW = 26
+MACD_SIGNAL = 9
+ATR_PERIOD = 14
+ATR_BREAKOUT_K = 1.0
+STOCHASTIC_PERIOD = 14
+STOCHASTIC_D_PERIOD = 3
+
+
+def market_prefix_sums(window: MarketWindow, name: str) -> PrefixSums:
+    """저장소가 유지하는 누적합을 반환하고, 없으면 지표 구간 끝까지의 행렬로 계산합니다."""
+    prefix = window.prefix_sums.get(name)
+    if prefix is None:
+        prefix = build_prefix_sums(window.history(name))
+    return prefix
+
+
+def cross_matrix(window: MarketWindow, short_period: int, long_period: int, golden: bool) -> np.ndarray:
+    """
+    지표 구간의 각 거래일에 단기/장기 이동평균 교차가 발생했는지 불리언 행렬로 반환합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        short_period (int): 단기 이동평균 길이
+        long_period (int): 장기 이동평균 길이
+        golden (bool): True면 골든 크로스, False면 데드 크로스
+
+    Returns:
+        np.ndarray: (종목 × 구간 거래일) 교차 발생 여부
+    """
+    if window.start >= window.stop:
+        return np.zeros((len(window.stock_codes), 0), dtype=bool)
+
+    prefix = market_prefix_sums(window, "close_price")
+    # 구간 첫날의 교차 판정을 위해 전날 이동평균까지 함께 계산
+    start = max(window.start - 1, 0)
+    short_ma = rolling_mean(prefix, short_period, start, window.stop)
+    long_ma = rolling_mean(prefix, long_period, start, window.stop)
+
+    prev_short, prev_long = short_ma[:, :-1], long_ma[:, :-1]
+    curr_short, curr_long = short_ma[:, 1:], long_ma[:, 1:]
+    if golden:
+        crosses = (prev_short <= prev_long) & (curr_short > curr_long)
+    else:
+        crosses = (prev_short >= prev_long) & (curr_short < curr_long)
+
+    if window.start == 0:
+        # 저장소 첫 거래일에는 전날 값이 없으므로 교차가 아님
+        crosses = np.concatenate([np.zeros((len(crosses), 1), dtype=bool), crosses], axis=1)
+    # 거래가 없는 날은 교차로 보지 않음
+    return crosses & ~np.isnan(window.field("close_price"))
+
+
+def indexed_cross_counts(window: MarketWindow, short_period: int, long_period: int, golden: bool) -> np.ndarray:
+    """
+    저장소의 교차 발생일 색인으로 종목별 교차 횟수를 구합니다.
+
+    Returns:
+        np.ndarray: 종목별 교차 횟수 (색인이 없거나 해당 이동평균 쌍이 색인되지 않았으면 None)
+    """
+    events = window.streams.get("cross_events")
+    if events is None or not events.has_pair(short_period, long_period) or events.n_stocks != len(window.stock_codes):
+        return None
+    return events.count("golden" if golden else "dead", short_period, long_period, window.start, window.stop)
+
+
+def _cross_counts(window: MarketWindow, short_period: int, long_period: int, golden: bool) -> np.ndarray:
+    """저장소의 교차 발생일 색인이 있으면 이진 탐색으로, 없으면 교차 행렬로 종목별 교차 횟수를 구합니다."""
+    counts = indexed_cross_counts(window, short_period, long_period, golden)
+    if counts is not None:
+        return counts
+    return cross_matrix(window, short_period, long_period, golden).sum(axis=1)
+
+
+@dataclass
+class MarketRSIState:
+    """시장 전체 종목의 Wilder RSI 계산 상태 (indicator.RSIState의 벡터 버전)"""
+    avg_gain: np.ndarray
+    avg_loss: np.ndarray
+    last_close: np.ndarray
+    count: np.ndarray
+    period: int = RSI_PERIOD
+
+
+def update_market_rsi_state(state: MarketRSIState, closes: np.ndarray) -> MarketRSIState:
+    """
+    하루치 시장 전체 종가를 RSI 상태에 반영합니다. 종목마다 O(1)입니다.
+
+    종가가 NaN인 종목(거래정지 등)은 상태를 그대로 유지합니다.
+
+    Args:
+        state (MarketRSIState): 갱신할 RSI 상태
+        closes (np.ndarray): 종목별 새 종가 벡터
+
+    Returns:
+        MarketRSIState: 갱신된 상태 (같은 객체)
+    """
+    has_delta = ~np.isnan(closes) & ~np.isnan(state.last_close)
+    deltas = np.where(has_delta, closes - state.last_close, 0.0)
+    gains = np.maximum(deltas, 0.0)
+    losses = np.maximum(-deltas, 0.0)
+
+    state.count = state.count + has_delta
+    count = np.maximum(state.count, 1)
+    seeding = has_delta & (state.count <= state.period)
+    smoothing = has_delta & (state.count > state.period)
+    period = state.period
+
+    state.avg_gain = np.where(seeding, state.avg_gain + (gains - state.avg_gain) / count, state.avg_gain)
+    state.avg_loss = np.where(seeding, state.avg_loss + (losses - state.avg_loss) / count, state.avg_loss)
+    state.avg_gain = np.where(smoothing, (state.avg_gain * (period - 1) + gains) / period, state.avg_gain)
+    state.avg_loss = np.where(smoothing, (state.avg_loss * (period - 1) + losses) / period, state.avg_loss)
+
+    state.last_close = np.where(np.isnan(closes), state.last_close, closes)
+    return state
+
+
+def init_market_rsi_state(closes: np.ndarray, period: int = RSI_PERIOD) -> MarketRSIState:
+    """
+    (종목 × 거래일) 종가 행렬 전체를 반영한 RSI 상태를 만듭니다.
+
+    Args:
+        closes (np.ndarray): (종목 × 거래일) 종가 행렬
+        period (int): RSI 기간
+
+    Returns:
+        MarketRSIState: 마지막 거래일까지 반영된 RSI 상태
+    """
+    n_stocks = closes.shape[0]
+    state = MarketRSIState(
+        avg_gain=np.zeros(n_stocks),
+        avg_loss=np.zeros(n_stocks),
+        last_close=np.full(n_stocks, np.nan),
+        count=np.zeros(n_stocks, dtype=int),
+        period=period
+    )
+    for j in range(closes.shape[1]):
+        update_market_rsi_state(state, closes[:, j])
+    return state
+
+
+def rsi_matrix(closes: np.ndarray, period: int = RSI_PERIOD) -> np.ndarray:
+    """
+    (종목 × 거래일) 종가 행렬의 거래일별 Wilder RSI 행렬을 계산합니다.
+
+    Args:
+        closes (np.ndarray): (종목 × 거래일) 종가 행렬
+        period (int): RSI 기간
+
+    Returns:
+        np.ndarray: (종목 × 거래일) RSI (변화량이 period개 미만이면 NaN)
+    """
+    state = init_market_rsi_state(closes[:, :0], period)
+    values = np.full(closes.shape, np.nan)
+    for j in range(closes.shape[1]):
+        values[:, j] = market_rsi_from_state(update_market_rsi_state(state, closes[:, j]))
+    return values
+
+
+def market_rsi_from_state(state: MarketRSIState) -> np.ndarray:
+    """
+    RSI 상태에서 종목별 RSI 값을 계산합니다.
+
+    Args:
+        state (MarketRSIState): RSI 상태
+
+    Returns:
+        np.ndarray: 종목별 RSI 값 (변화량이 period개 미만이면 NaN)
+    """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - (100 / (1 + state.avg_gain / state.avg_loss))
+    rsi = np.where(state.avg_loss == 0, 100.0, rsi)
+    return np.where(state.count >= state.period, rsi, np.nan)
+
+
+def calculate_rsi(window: MarketWindow) -> np.ndarray:
+    """
+    시장 전체 종목의 Wilder RSI를 계산합니다.
+
+    Wilder 평활은 이전 값에 누적되므로 저장소 첫 거래일부터 지표 구간 끝까지의 종가를 사용합니다.
+    구간이 마지막 거래일로 끝나면 적재 시점에 갱신된 상태를 그대로 사용합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+
+    Returns:
+        np.ndarray: 종목별 RSI 값 (종가 변화량이 14개 미만이면 NaN)
+    """
+    state = window.streams.get("rsi")
+    if state is None or not window.is_latest:
+        state = init_market_rsi_state(window.history("close_price"))
+    return market_rsi_from_state(state)
+
+
+
+def calculate_average_volume(window: MarketWindow, period: int = None) -> np.ndarray:
+    """
+    시장 전체 종목의 평균 거래량을 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 이동평균 길이 (거래일). 생략하면 지표 구간 전체의 평균
+
+    Returns:
+        np.ndarray: 종목별 평균 거래량 (period를 주면 구간 마지막 거래일 기준, 이력이 부족하면 NaN.
+            생략하면 구간 평균이며 거래 이력이 없으면 0.0)
+    """
+    if period is not None:
+        if window.stop == 0:
+            return np.full(len(window.stock_codes), np.nan)
+        prefix = market_prefix_sums(window, "volume")
+        return rolling_mean(prefix, period, window.stop - 1, window.stop)[:, 0]
+
+    volumes = window.field("volume")
+    counts = (~np.isnan(volumes)).sum(axis=1)
+    totals = np.nansum(volumes, axis=1)
+    return np.divide(totals, counts, out=np.zeros(len(volumes)), where=counts > 0)
+
+
+def calculate_volume_ratio(window: MarketWindow, period: int = VOLUME_WINDOW) -> np.ndarray:
+    """
+    시장 전체 종목의 구간 마지막 거래일 거래량을 직전 period 거래일 평균 거래량으로 나눈 비율을 계산합니다.
+
+    "거래량이 20일 평균 대비 50% 이상 증가"는 비율 1.5 이상입니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 평균 거래량 기간 (거래일, 마지막 거래일 제외)
+
+    Returns:
+        np.ndarray: 종목별 거래량 비율 (마지막 거래일 거래가 없거나 이력이 부족하거나 평균이 0이면 NaN)
+    """
+    if window.stop < 2:
+        return np.full(len(window.stock_codes), np.nan)
+    prefix = market_prefix_sums(window, "volume")
+    average = rolling_mean(prefix, period, window.stop - 2, window.stop - 1)[:, 0]
+    volume = window.arrays["volume"][:, window.stop - 1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(average > 0, volume / average, np.nan)
+
+
+def calculate_moving_average(window: MarketWindow, period: int = None) -> np.ndarray:
+    """
+    시장 전체 종목의 이동평균을 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 이동평균 길이 (거래일). 생략하면 지표 구간 전체의 평균
+
+    Returns:
+        np.ndarray: 종목별 이동평균 값 (period를 주면 구간 마지막 거래일 기준, 이력이 부족하면 NaN)
+    """
+    if period is not None:
+        if window.stop == 0:
+            return np.full(len(window.stock_codes), np.nan)
+        prefix = market_prefix_sums(window, "close_price")
+        return rolling_mean(prefix, period, window.stop - 1, window.stop)[:, 0]
+
+    closes = window.field("close_price")
+    counts = (~np.isnan(closes)).sum(axis=1)
+    totals = np.nansum(closes, axis=1)
+    return np.divide(totals, counts, out=np.full(len(closes), np.nan), where=counts > 0)
+
+
+def detect_golden_cross(window: MarketWindow, short_period: int = SHORT_WINDOW, long_period: int = LONG_WINDOW) -> np.ndarray:
+    """
+    시장 전체 종목의 골든 크로스 발생 여부를 감지합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        short_period (int): 단기 이동평균 길이
+        long_period (int): 장기 이동평균 길이
+
+    Returns:
+        np.ndarray: 종목별 구간 내 골든 크로스 발생 시 1.0, 아니면 0.0
+    """
+    return (_cross_counts(window, short_period, long_period, golden=True) > 0).astype(float)
+
+
+def count_golden_cross(window: MarketWindow, short_period: int = SHORT_WINDOW, long_period: int = LONG_WINDOW) -> np.ndarray:
+    """
+    시장 전체 종목의 골든 크로스 발생 횟수를 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        short_period (int): 단기 이동평균 길이
+        long_period (int): 장기 이동평균 길이
+
+    Returns:
+        np.ndarray: 종목별 구간 내 골든 크로스 발생 횟수
+    """
+    return _cross_counts(window, short_period, long_period, golden=True).astype(float)
+
+
+def detect_dead_cross(window: MarketWindow, short_period: int = SHORT_WINDOW, long_period: int = LONG_WINDOW) -> np.ndarray:
+    """
+    시장 전체 종목의 데드 크로스 발생 여부를 감지합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        short_period (int): 단기 이동평균 길이
+        long_period (int): 장기 이동평균 길이
+
+    Returns:
+        np.ndarray: 종목별 구간 내 데드 크로스 발생 시 1.0, 아니면 0.0
+    """
+    return (_cross_counts(window, short_period, long_period, golden=False) > 0).astype(float)
+
+
+def count_dead_cross(window: MarketWindow, short_period: int = SHORT_WINDOW, long_period: int = LONG_WINDOW) -> np.ndarray:
+    """
+    시장 전체 종목의 데드 크로스 발생 횟수를 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        short_period (int): 단기 이동평균 길이
+        long_period (int): 장기 이동평균 길이
+
+    Returns:
+        np.ndarray: 종목별 구간 내 데드 크로스 발생 횟수
+    """
+    return _cross_counts(window, short_period, long_period, golden=False).astype(float)
+
+
+def bollinger_bands(window: MarketWindow, period: int = BOLLINGER_WINDOW, k: float = BOLLINGER_K) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    지표 구간 각 거래일의 볼린저 밴드를 계산합니다. 저장소 누적합으로 봉당 O(1)입니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 밴드 이동평균 길이
+        k (float): 표준편차 배수
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: (종목 × 구간 거래일) 중심선, 상단, 하단 (이력이 부족하면 NaN)
+    """
+    prefix = market_prefix_sums(window, "close_price")
+    middle = rolling_mean(prefix, period, window.start, window.stop)
+    stddev = rolling_std(prefix, period, window.start, window.stop)
+    return middle, middle + k * stddev, middle - k * stddev
+
+
+def bollinger_touch_matrix(window: MarketWindow, period: int = BOLLINGER_WINDOW, k: float = BOLLINGER_K,
+                           upper: bool = False) -> np.ndarray:
+    """
+    지표 구간 각 거래일의 종가가 볼린저 밴드 상단/하단에 닿았는지 불리언 행렬로 반환합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 밴드 이동평균 길이
+        k (float): 표준편차 배수
+        upper (bool): True면 상단(종가 >= 상단), False면 하단(종가 <= 하단) 터치
+
+    Returns:
+        np.ndarray: (종목 × 구간 거래일) 터치 여부
+    """
+    _, upper_band, lower_band = bollinger_bands(window, period, k)
+    closes = window.field("close_price")
+    if upper:
+        return closes >= upper_band
+    return closes <= lower_band
+
+
+def _bollinger_last_bar(window: MarketWindow, period: int, k: float, upper: bool) -> np.ndarray:
+    """
+    구간 마지막 거래일의 종가가 볼린저 밴드 상단/하단에 닿았는지 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 밴드 이동평균 길이
+        k (float): 표준편차 배수
+        upper (bool): True면 상단, False면 하단 터치를 검사
+
+    Returns:
+        np.ndarray: 종목별 터치 시 1.0, 아니면 0.0
+    """
+    if window.stop == 0:
+        return np.zeros(len(window.stock_codes))
+
+    last_bar = replace(window, start=window.stop - 1)
+    return bollinger_touch_matrix(last_bar, period, k, upper)[:, 0].astype(float)
+
+
+def detect_bollinger_lower_touch(window: MarketWindow, period: int = BOLLINGER_WINDOW, k: float = BOLLINGER_K) -> np.ndarray:
+    """
+    시장 전체 종목의 볼린저 밴드 하단 터치 여부를 감지합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 밴드 이동평균 길이
+        k (float): 표준편차 배수
+
+    Returns:
+        np.ndarray: 종목별 하단 밴드 터치 시 1.0, 아니면 0.0
+    """
+    return _bollinger_last_bar(window, period, k, upper=False)
+
+
+def detect_bollinger_upper_touch(window: MarketWindow, period: int = BOLLINGER_WINDOW, k: float = BOLLINGER_K) -> np.ndarray:
+    """
+    시장 전체 종목의 볼린저 밴드 상단 터치 여부를 감지합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 밴드 이동평균 길이
+        k (float): 표준편차 배수
+
+    Returns:
+        np.ndarray: 종목별 상단 밴드 터치 시 1.0, 아니면 0.0
+    """
+    return _bollinger_last_bar(window, period, k, upper=True)
+
+
+def count_bollinger_lower_touch(window: MarketWindow, period: int = BOLLINGER_WINDOW, k: float = BOLLINGER_K) -> np.ndarray:
+    """
+    시장 전체 종목의 구간 내 볼린저 밴드 하단 터치 일수를 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 밴드 이동평균 길이
+        k (float): 표준편차 배수
+
+    Returns:
+        np.ndarray: 종목별 하단 밴드 터치 일수
+    """
+    return bollinger_touch_matrix(window, period, k, upper=False).sum(axis=1).astype(float)
+
+
+def count_bollinger_upper_touch(window: MarketWindow, period: int = BOLLINGER_WINDOW, k: float = BOLLINGER_K) -> np.ndarray:
+    """
+    시장 전체 종목의 구간 내 볼린저 밴드 상단 터치 일수를 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 밴드 이동평균 길이
+        k (float): 표준편차 배수
+
+    Returns:
+        np.ndarray: 종목별 상단 밴드 터치 일수
+    """
+    return bollinger_touch_matrix(window, period, k, upper=True).sum(axis=1).astype(float)
+
+
+def calculate_bollinger_upper(window: MarketWindow, period: int = BOLLINGER_WINDOW, k: float = BOLLINGER_K) -> np.ndarray:
+    """
+    시장 전체 종목의 볼린저 밴드 상단 값을 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 밴드 이동평균 길이
+        k (float): 표준편차 배수
+
+    Returns:
+        np.ndarray: 종목별 구간 마지막 거래일의 상단 밴드 값
+    """
+    if window.stop == 0:
+        return np.full(len(window.stock_codes), np.nan)
+    return bollinger_bands(replace(window, start=window.stop - 1), period, k)[1][:, 0]
+
+
+def calculate_bollinger_lower(window: MarketWindow, period: int = BOLLINGER_WINDOW, k: float = BOLLINGER_K) -> np.ndarray:
+    """
+    시장 전체 종목의 볼린저 밴드 하단 값을 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 밴드 이동평균 길이
+        k (float): 표준편차 배수
+
+    Returns:
+        np.ndarray: 종목별 구간 마지막 거래일의 하단 밴드 값
+    """
+    if window.stop == 0:
+        return np.full(len(window.stock_codes), np.nan)
+    return bollinger_bands(replace(window, start=window.stop - 1), period, k)[2][:, 0]
+
+
+@dataclass
+class MarketEMAState:
+    """시장 전체 종목의 지수이동평균 계산 상태"""
+    value: np.ndarray  # 아직 값이 없으면 NaN
+    count: np.ndarray  # 지금까지 반영한 유효 값 개수
+    period: int
+
+
+def init_market_ema_state(n_stocks: int, period: int) -> MarketEMAState:
+    """
+    빈 지수이동평균 상태를 만듭니다.
+
+    Args:
+        n_stocks (int): 종목 수
+        period (int): 지수이동평균 기간 (평활 계수 2 / (period + 1))
+
+    Returns:
+        MarketEMAState: 빈 상태
+    """
+    return MarketEMAState(value=np.full(n_stocks, np.nan), count=np.zeros(n_stocks, dtype=int), period=period)
+
+
+def update_market_ema_state(state: MarketEMAState, values: np.ndarray) -> MarketEMAState:
+    """
+    하루치 값 벡터를 지수이동평균 상태에 반영합니다. 첫 값으로 시드하며 NaN인 종목은 그대로 둡니다.
+
+    Args:
+        state (MarketEMAState): 갱신할 상태
+        values (np.ndarray): 종목별 새 값
+
+    Returns:
+        MarketEMAState: 갱신된 상태 (같은 객체)
+    """
+    alpha = 2 / (state.period + 1)
+    has_value = ~np.isnan(values)
+    smoothed = state.value + alpha * (values - state.value)
+    state.value = np.where(has_value, np.where(np.isnan(state.value), values, smoothed), state.value)
+    state.count = state.count + has_value
+    return state
+
+
+def market_ema_from_state(state: MarketEMAState) -> np.ndarray:
+    """유효 값이 period개 이상인 종목의 지수이동평균을, 나머지는 NaN을 반환합니다."""
+    return np.where(state.count >= state.period, state.value, np.nan)
+
+
+# ema_matrix가 닫힌 식 한 번으로 계산하는 거래일 수 ((1-α)^-s가 커지지 않도록 이 길이로 나눠 이어 붙임)
+EMA_BLOCK = 32
+
+
+def _ema_block(block: np.ndarray, ok: np.ndarray, carry: np.ndarray, alpha: float) -> np.ndarray:
+    """
+    블록 시작 전 지수이동평균 carry(값이 없으면 NaN)에 (종목 × 거래일) 블록 값을 반영한 각 거래일의 지수이동평균
+
+    블록 안에서 유효 값 개수를 s라 하면 e_t = (1-α)^s_t × (carry + Σ α (1-α)^-s_i × v_i)이므로 누적합 한 번으로 구합니다.
+    값이 없던 종목은 첫 유효 값으로 시드하고 그 값은 누적합에서 뺍니다.
+    """
+    n_days = block.shape[1]
+    if ok is None:
+        # 빈 칸 없이 이미 시드된 블록 (대부분의 블록): s_t = t + 1
+        powers = (1 - alpha) ** np.arange(1, n_days + 1)
+        return powers * (carry[:, None] + np.cumsum(block * (alpha / powers), axis=1))
+
+    ok = ok.copy()
+    carry = carry.copy()
+    seeded = np.flatnonzero(np.isnan(carry) & ok.any(axis=1))
+    seed_day = ok[seeded].argmax(axis=1)
+    carry[seeded] = block[seeded, seed_day]
+    ok[seeded, seed_day] = False
+
+    if alpha == 1:
+        # period 1: 마지막 유효 값
+        last = np.maximum.accumulate(np.where(ok, np.arange(n_days), -1), axis=1)
+        part = np.where(last >= 0, np.take_along_axis(block, np.maximum(last, 0), axis=1), carry[:, None])
+    else:
+        steps = np.cumsum(ok, axis=1)
+        powers = (1 - alpha) ** np.arange(n_days + 1)
+        scaled = np.where(ok, block, 0.0) * (alpha / powers)[steps]
+        part = powers[steps] * (carry[:, None] + np.cumsum(scaled, axis=1))
+    # 시드 전 거래일은 값 없음
+    part[seeded] = np.where(np.arange(n_days) < seed_day[:, None], np.nan, part[seeded])
+    return part
+
+
+def ema_matrix(values: np.ndarray, period: int, state: MarketEMAState = None) -> tuple[np.ndarray, MarketEMAState]:
+    """
+    (종목 × 거래일) 값 행렬의 각 거래일까지의 지수이동평균을 계산합니다.
+
+    하루씩 update_market_ema_state에 반영한 것과 같은 값을, 거래일 루프 없이 EMA_BLOCK 거래일 단위의 누적합으로 구합니다.
+
+    Args:
+        values (np.ndarray): (종목 × 거래일) 값 행렬 (NaN은 건너뜀)
+        period (int): 지수이동평균 기간
+        state (MarketEMAState): 첫 열 이전까지 반영된 상태 (생략하면 빈 상태, 바꾸지 않음)
+
+    Returns:
+        tuple[np.ndarray, MarketEMAState]: 각 거래일의 지수이동평균 (유효 값이 period개 미만이면 NaN),
+        마지막 열까지 반영한 새 상태
+    """
+    n_stocks, n_days = values.shape
+    if state is None:
+        state = init_market_ema_state(n_stocks, period)
+    alpha = 2 / (period + 1)
+    matrix = np.empty((n_stocks, n_days))
+    carry, count = state.value, state.count
+    for begin in range(0, n_days, EMA_BLOCK):
+        block = values[:, begin:begin + EMA_BLOCK]
+        ok = ~np.isnan(block)
+        if ok.all():
+            counts = count[:, None] + np.arange(1, block.shape[1] + 1)
+            ok = None if alpha != 1 and not np.isnan(carry).any() else ok
+        else:
+            counts = count[:, None] + np.cumsum(ok, axis=1)
+        ema = _ema_block(block, ok, carry, alpha)
+        carry, count = ema[:, -1].copy(), counts[:, -1]
+        if counts[:, 0].min() < period:
+            ema[counts < period] = np.nan
+        matrix[:, begin:begin + EMA_BLOCK] = ema
+    return matrix, MarketEMAState(value=carry.copy(), count=count.copy(), period=period)
+
+
+class MarketEMAHistory:
+    """
+    저장소가 보관하는 시장 전체 지수이동평균 이력 ((값 이력, 기간)별 (종목 × 거래일) 행렬)
+
+    저장소 이력은 뒤에만 추가되므로 한 번 계산한 행렬은 과거 구간 조회에 잘라 쓰고,
+    더 늦은 거래일까지 필요하면 마지막 상태에서 모자란 거래일만 이어 계산합니다.
+    최근 사용한 max_series개 이력만 보관하므로 메모리는 max_series × 종목 수 × 거래일 × 8바이트 이하입니다.
+    """
+
+    def __init__(self, max_series: int = 8):
+        """
+        Args:
+            max_series: 보관할 최대 이력 수 (초과 시 가장 오래 쓰지 않은 이력부터 제거)
+        """
+        self.max_series = max_series
+        self._series: OrderedDict = OrderedDict()
+        self._lock = RLock()
+
+    def get(self, key: Hashable, period: int, stop: int, values: Callable[[int], np.ndarray]) -> np.ndarray:
+        """
+        저장소 첫 거래일부터 stop 전까지의 지수이동평균 행렬을 반환합니다.
+
+        Args:
+            key: 값 이력 식별자 (같은 키는 항상 같은 값 이력이어야 함)
+            period: 지수이동평균 기간
+            stop: 필요한 마지막 열 (미포함)
+            values: 시작 열을 받아 그 열부터 stop 전까지의 (종목 × 거래일) 값 행렬을 반환하는 함수
+
+        Returns:
+            np.ndarray: (종목 × stop) 지수이동평균 행렬 (읽기 전용, 유효 값이 period개 미만이면 NaN)
+        """
+        with self._lock:
+            entry = self._series.pop((key, period), None)
+            if entry is None:
+                matrix, state = ema_matrix(values(0), period)
+            else:
+                matrix, state = entry
+                if matrix.shape[1] < stop:
+                    tail, state = ema_matrix(values(matrix.shape[1]), period, state)
+                    matrix = np.concatenate([matrix, tail], axis=1)
+            matrix.flags.writeable = False
+            self._series[(key, period)] = (matrix, state)
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        return matrix[:, :stop]
+
+
+def _ema_history(window: MarketWindow, key: Hashable, period: int, values: Callable[[int], np.ndarray]) -> np.ndarray:
+    """저장소 첫 거래일부터 지표 구간 끝까지의 EMA 행렬 (저장소의 EMA 이력이 있으면 재사용)"""
+    history = window.streams.get("ema")
+    if history is None:
+        return ema_matrix(values(0), period)[0]
+    return history.get(key, period, window.stop, values)
+
+
+@dataclass
+class MarketMACDState:
+    """시장 전체 종목의 MACD 계산 상태 (단기/장기 EMA와 시그널 EMA)"""
+    fast: MarketEMAState
+    slow: MarketEMAState
+    signal: MarketEMAState
+
+
+def update_market_macd_state(state: MarketMACDState, closes: np.ndarray) -> MarketMACDState:
+    """
+    하루치 시장 전체 종가를 MACD 상태에 반영합니다. 종목마다 O(1)입니다.
+
+    Args:
+        state (MarketMACDState): 갱신할 상태
+        closes (np.ndarray): 종목별 새 종가
+
+    Returns:
+        MarketMACDState: 갱신된 상태 (같은 객체)
+    """
+    update_market_ema_state(state.fast, closes)
+    update_market_ema_state(state.slow, closes)
+    macd = market_ema_from_state(state.fast) - market_ema_from_state(state.slow)
+    update_market_ema_state(state.signal, np.where(np.isnan(closes), np.nan, macd))
+    return state
+
+
+def init_market_macd_state(closes: np.ndarray, fast_period: int = MACD_FAST, slow_period: int = MACD_SLOW,
+                           signal_period: int = MACD_SIGNAL) -> MarketMACDState:
+    """
+    (종목 × 거래일) 종가 행렬 전체를 반영한 MACD 상태를 만듭니다.
+
+    Args:
+        closes (np.ndarray): (종목 × 거래일) 종가 행렬
+        fast_period (int): 단기 EMA 기간
+        slow_period (int): 장기 EMA 기간
+        signal_period (int): 시그널 EMA 기간
+
+    Returns:
+        MarketMACDState: 마지막 거래일까지 반영된 상태
+    """
+    fast, fast_state = ema_matrix(closes, fast_period)
+    slow, slow_state = ema_matrix(closes, slow_period)
+    _, signal_state = ema_matrix(np.where(np.isnan(closes), np.nan, fast - slow), signal_period)
+    return MarketMACDState(fast=fast_state, slow=slow_state, signal=signal_state)
+
+
+def _macd_histories(window: MarketWindow, fast_period: int, slow_period: int,
+                    signal_period: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    저장소 첫 거래일부터 지표 구간 끝까지의 단기 EMA, 장기 EMA, 시그널 행렬 (MACD = 단기 EMA - 장기 EMA)
+
+    하루씩 update_market_macd_state에 반영한 것과 같으며, 저장소의 EMA 이력이 있으면 기간별로 재사용합니다.
+    """
+    closes = window.history("close_price")
+    fast = _ema_history(window, "close_price", fast_period, lambda begin: closes[:, begin:])
+    slow = _ema_history(window, "close_price", slow_period, lambda begin: closes[:, begin:])
+    # 거래가 있는 날의 MACD만 시그널에 반영
+    signal = _ema_history(
+        window, ("macd", fast_period, slow_period), signal_period,
+        lambda begin: np.where(np.isnan(closes[:, begin:]), np.nan, fast[:, begin:] - slow[:, begin:])
+    )
+    return fast, slow, signal
+
+
+def market_macd_from_state(state: MarketMACDState) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    MACD 상태에서 종목별 MACD, 시그널, 히스토그램 값을 계산합니다.
+
+    Args:
+        state (MarketMACDState): MACD 상태
+
+    Returns:
+        tuple[np.ndarray, np.ndarray, np.ndarray]: MACD, 시그널, 히스토그램 (이력이 부족하면 NaN)
+    """
+    macd = market_ema_from_state(state.fast) - market_ema_from_state(state.slow)
+    signal = market_ema_from_state(state.signal)
+    return macd, signal, macd - signal
+
+
+def _macd_at_end(window: MarketWindow, fast_period: int, slow_period: int, signal_period: int) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """지표 구간 마지막 거래일의 MACD, 시그널, 히스토그램을 계산합니다."""
+    state = window.streams.get("macd")
+    defaults = (fast_period, slow_period, signal_period) == (MACD_FAST, MACD_SLOW, MACD_SIGNAL)
+    if state is not None and defaults and window.is_latest:
+        return market_macd_from_state(state)
+    if window.stop == 0:
+        empty = np.full(len(window.stock_codes), np.nan)
+        return empty, empty, empty
+    fast, slow, signal = _macd_histories(window, fast_period, slow_period, signal_period)
+    macd = fast[:, -1] - slow[:, -1]
+    return macd, signal[:, -1].copy(), macd - signal[:, -1]
+
+
+def _macd_series(window: MarketWindow, fast_period: int, slow_period: int, signal_period: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    지표 구간 각 거래일의 MACD와 시그널 값을 행렬로 계산합니다.
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: 구간 첫날 전날부터 시작하는 (종목 × (구간 거래일 + 1)) MACD, 시그널 행렬
+    """
+    n_stocks = len(window.stock_codes)
+    first = max(window.start - 1, 0)
+    fast, slow, signal = _macd_histories(window, fast_period, slow_period, signal_period)
+    macd_series, signal_series = fast[:, first:] - slow[:, first:], signal[:, first:]
+    if window.start == 0:
+        # 저장소 첫 거래일 앞에 빈 열을 두어 전날 값이 없음을 표시
+        empty = np.full((n_stocks, 1), np.nan)
+        macd_series = np.concatenate([empty, macd_series], axis=1)
+        signal_series = np.concatenate([empty, signal_series], axis=1)
+    return macd_series, signal_series
+
+
+def _macd_cross_matrix(window: MarketWindow, fast_period: int, slow_period: int, signal_period: int, golden: bool) -> np.ndarray:
+    """지표 구간 각 거래일에 MACD가 시그널을 상향(golden)/하향 돌파했는지 불리언 행렬로 반환합니다."""
+    if window.start >= window.stop:
+        return np.zeros((len(window.stock_codes), 0), dtype=bool)
+
+    macd, signal = _macd_series(window, fast_period, slow_period, signal_period)
+    if golden:
+        crosses = (macd[:, :-1] <= signal[:, :-1]) & (macd[:, 1:] > signal[:, 1:])
+    else:
+        crosses = (macd[:, :-1] >= signal[:, :-1]) & (macd[:, 1:] < signal[:, 1:])
+    return crosses & ~np.isnan(window.field("close_price"))
+
+
+def calculate_ema(window: MarketWindow, period: int = 20) -> np.ndarray:
+    """
+    시장 전체 종목의 종가 지수이동평균을 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 지수이동평균 기간
+
+    Returns:
+        np.ndarray: 종목별 구간 마지막 거래일의 EMA (유효 봉이 period개 미만이면 NaN)
+    """
+    stream = window.streams.get("macd")
+    if stream is not None and window.is_latest:
+        # 적재 시점 MACD 상태의 단기/장기 EMA와 기간이 같으면 재사용
+        for state in (stream.fast, stream.slow):
+            if state.period == period:
+                return market_ema_from_state(state)
+    if window.stop == 0:
+        return np.full(len(window.stock_codes), np.nan)
+    closes = window.history("close_price")
+    return _ema_history(window, "close_price", period, lambda begin: closes[:, begin:])[:, -1].copy()
+
+
+def calculate_macd(window: MarketWindow, fast_period: int = MACD_FAST, slow_period: int = MACD_SLOW,
+                   signal_period: int = MACD_SIGNAL) -> np.ndarray:
+    """
+    시장 전체 종목의 MACD(단기 EMA - 장기 EMA)를 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        fast_period (int): 단기 EMA 기간
+        slow_period (int): 장기 EMA 기간
+        signal_period (int): 시그널 EMA 기간
+
+    Returns:
+        np.ndarray: 종목별 구간 마지막 거래일의 MACD
+    """
+    return _macd_at_end(window, fast_period, slow_period, signal_period)[0]
+
+
+def calculate_macd_signal(window: MarketWindow, fast_period: int = MACD_FAST, slow_period: int = MACD_SLOW,
+                          signal_period: int = MACD_SIGNAL) -> np.ndarray:
+    """
+    시장 전체 종목의 MACD 시그널(MACD의 EMA)을 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        fast_period (int): 단기 EMA 기간
+        slow_period (int): 장기 EMA 기간
+        signal_period (int): 시그널 EMA 기간
+
+    Returns:
+        np.ndarray: 종목별 구간 마지막 거래일의 MACD 시그널
+    """
+    return _macd_at_end(window, fast_period, slow_period, signal_period)[1]
+
+
+def calculate_macd_histogram(window: MarketWindow, fast_period: int = MACD_FAST, slow_period: int = MACD_SLOW,
+                             signal_period: int = MACD_SIGNAL) -> np.ndarray:
+    """
+    시장 전체 종목의 MACD 히스토그램(MACD - 시그널)을 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        fast_period (int): 단기 EMA 기간
+        slow_period (int): 장기 EMA 기간
+        signal_period (int): 시그널 EMA 기간
+
+    Returns:
+        np.ndarray: 종목별 구간 마지막 거래일의 MACD 히스토그램
+    """
+    return _macd_at_end(window, fast_period, slow_period, signal_period)[2]
+
+
+def detect_macd_golden_cross(window: MarketWindow, fast_period: int = MACD_FAST, slow_period: int = MACD_SLOW,
+                             signal_period: int = MACD_SIGNAL) -> np.ndarray:
+    """
+    시장 전체 종목에서 MACD가 시그널을 상향 돌파했는지 감지합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        fast_period (int): 단기 EMA 기간
+        slow_period (int): 장기 EMA 기간
+        signal_period (int): 시그널 EMA 기간
+
+    Returns:
+        np.ndarray: 종목별 구간 내 상향 돌파 발생 시 1.0, 아니면 0.0
+    """
+    return _macd_cross_matrix(window, fast_period, slow_period, signal_period, golden=True).any(axis=1).astype(float)
+
+
+def detect_macd_dead_cross(window: MarketWindow, fast_period: int = MACD_FAST, slow_period: int = MACD_SLOW,
+                           signal_period: int = MACD_SIGNAL) -> np.ndarray:
+    """
+    시장 전체 종목에서 MACD가 시그널을 하향 돌파했는지 감지합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        fast_period (int): 단기 EMA 기간
+        slow_period (int): 장기 EMA 기간
+        signal_period (int): 시그널 EMA 기간
+
+    Returns:
+        np.ndarray: 종목별 구간 내 하향 돌파 발생 시 1.0, 아니면 0.0
+    """
+    return _macd_cross_matrix(window, fast_period, slow_period, signal_period, golden=False).any(axis=1).astype(float)
+
+
+def pad_columns(matrix: np.ndarray, first: int, stop: int) -> np.ndarray:
+    """(종목 × 거래일) 행렬의 [first, stop) 열을 반환합니다. first가 음수면 저장소 첫 거래일 이전 칸을 NaN으로 채웁니다."""
+    if first >= 0:
+        return matrix[:, first:stop]
+    padding = np.full((len(matrix), -first), np.nan)
+    return np.concatenate([padding, matrix[:, :stop]], axis=1)
+
+
+def padded_columns(window: MarketWindow, name: str, first: int) -> np.ndarray:
+    """[first, window.stop) 거래일의 가격 필드 열을 반환합니다. first가 음수면 저장소 첫 거래일 이전 칸을 NaN으로 채웁니다."""
+    return pad_columns(window.arrays[name], first, window.stop)
+
+
+def _rolling_extreme(matrix: np.ndarray, period: int, highest: bool) -> np.ndarray:
+    """각 열에서 끝나는 period 열 구간의 최댓값/최솟값. 구간에 NaN이 있거나 길이가 모자라면 NaN입니다."""
+    n_stocks, n_days = matrix.shape
+    if n_days < period:
+        return np.full((n_stocks, 0), np.nan)
+    windows = np.lib.stride_tricks.sliding_window_view(matrix, period, axis=1)
+    return windows.max(axis=2) if highest else windows.min(axis=2)
+
+
+def true_range(window: MarketWindow, first: int) -> np.ndarray:
+    """
+    [first, window.stop) 각 거래일의 True Range를 계산합니다.
+
+    TR = max(고가 - 저가, |고가 - 전일 종가|, |저가 - 전일 종가|)이며, 전 거래일 종가가 없으면 고가 - 저가입니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        first (int): 첫 거래일 위치 (음수면 앞쪽을 NaN으로 채움)
+
+    Returns:
+        np.ndarray: (종목 × 거래일) True Range (거래가 없는 날은 NaN)
+    """
+    high, low = padded_columns(window, "high_price", first), padded_columns(window, "low_price", first)
+    prev_close = padded_columns(window, "close_price", first - 1)[:, :-1]
+    gaps = np.fmax(np.abs(high - prev_close), np.abs(low - prev_close))
+    return np.where(np.isnan(high - low), np.nan, np.fmax(high - low, gaps))
+
+
+def atr_series(window: MarketWindow, period: int, first: int, min_periods: int = None) -> np.ndarray:
+    """[first, window.stop) 각 거래일의 ATR(True Range의 period 거래일 단순 이동평균) 행렬. min_periods 기본값은 period"""
+    ranges = true_range(window, first - period + 1)
+    prefix = build_prefix_sums(ranges)
+    return rolling_mean(prefix, period, period - 1, ranges.shape[1], min_periods)
+
+
+def calculate_atr(window: MarketWindow, period: int = ATR_PERIOD) -> np.ndarray:
+    """
+    시장 전체 종목의 ATR(Average True Range)을 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): ATR 기간 (거래일)
+
+    Returns:
+        np.ndarray: 종목별 구간 마지막 거래일의 ATR (기간 안에 거래가 없는 날이 있으면 NaN)
+    """
+    if window.stop == 0:
+        return np.full(len(window.stock_codes), np.nan)
+    return atr_series(window, period, window.stop - 1)[:, 0]
+
+
+def detect_atr_breakout(window: MarketWindow, period: int = ATR_PERIOD, k: float = ATR_BREAKOUT_K) -> np.ndarray:
+    """
+    시장 전체 종목의 ATR 변동성 돌파를 감지합니다.
+
+    종가가 전 거래일 종가 + k × 전 거래일 ATR을 넘은 날이 구간 안에 있으면 돌파입니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): ATR 기간 (거래일)
+        k (float): ATR 배수
+
+    Returns:
+        np.ndarray: 종목별 구간 내 돌파 발생 시 1.0, 아니면 0.0
+    """
+    if window.start >= window.stop:
+        return np.zeros(len(window.stock_codes))
+    prev_atr = atr_series(window, period, window.start - 1)[:, :-1]
+    prev_close = padded_columns(window, "close_price", window.start - 1)[:, :-1]
+    breakouts = window.field("close_price") > prev_close + k * prev_atr
+    return breakouts.any(axis=1).astype(float)
+
+
+def _obv_series(window: MarketWindow) -> np.ndarray:
+    """저장소 첫 거래일부터 지표 구간 끝까지 각 거래일의 OBV 행렬. 종가 변화를 알 수 없는 날은 0으로 누적합니다."""
+    closes = window.history("close_price")
+    prev_closes = padded_columns(window, "close_price", -1)[:, :-1]
+    flows = np.nan_to_num(np.sign(closes - prev_closes) * window.history("volume"))
+    return np.cumsum(flows, axis=1)
+
+
+def calculate_obv(window: MarketWindow) -> np.ndarray:
+    """
+    시장 전체 종목의 OBV(On Balance Volume)를 계산합니다.
+
+    종가가 오른 날은 거래량을 더하고 내린 날은 빼서 저장소 첫 거래일부터 누적합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+
+    Returns:
+        np.ndarray: 종목별 구간 마지막 거래일의 OBV
+    """
+    if window.stop == 0:
+        return np.full(len(window.stock_codes), np.nan)
+    return _obv_series(window)[:, -1]
+
+
+def _obv_divergence(window: MarketWindow, bullish: bool) -> np.ndarray:
+    """구간 첫날 대비 마지막 날 종가와 OBV가 반대 방향으로 움직였는지 판정합니다."""
+    if window.stop - window.start < 2:
+        return np.zeros(len(window.stock_codes))
+    obv = _obv_series(window)
+    closes = window.field("close_price")
+    price_change = closes[:, -1] - closes[:, 0]
+    obv_change = obv[:, window.stop - 1] - obv[:, window.start]
+    if bullish:
+        divergence = (price_change < 0) & (obv_change > 0)
+    else:
+        divergence = (price_change > 0) & (obv_change < 0)
+    return divergence.astype(float)
+
+
+def detect_obv_bullish_divergence(window: MarketWindow) -> np.ndarray:
+    """
+    시장 전체 종목의 OBV 상승 다이버전스(구간 동안 종가는 내렸는데 OBV는 오름)를 감지합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+
+    Returns:
+        np.ndarray: 종목별 다이버전스이면 1.0, 아니면 0.0 (구간 첫날이나 마지막 날 거래가 없으면 0.0)
+    """
+    return _obv_divergence(window, bullish=True)
+
+
+def detect_obv_bearish_divergence(window: MarketWindow) -> np.ndarray:
+    """
+    시장 전체 종목의 OBV 하락 다이버전스(구간 동안 종가는 올랐는데 OBV는 내림)를 감지합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+
+    Returns:
+        np.ndarray: 종목별 다이버전스이면 1.0, 아니면 0.0 (구간 첫날이나 마지막 날 거래가 없으면 0.0)
+    """
+    return _obv_divergence(window, bullish=False)
+
+
+def _stochastic_series(window: MarketWindow, period: int, d_period: int, first: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    [first, window.stop) 각 거래일의 스토캐스틱 %K, %D 행렬을 계산합니다.
+
+    %K = (종가 - period일 최저가) / (period일 최고가 - period일 최저가) × 100, %D = %K의 d_period일 단순 이동평균
+    """
+    k_first = first - d_period + 1
+    highest = _rolling_extreme(padded_columns(window, "high_price", k_first - period + 1), period, highest=True)
+    lowest = _rolling_extreme(padded_columns(window, "low_price", k_first - period + 1), period, highest=False)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percent_k = 100 * (padded_columns(window, "close_price", k_first) - lowest) / (highest - lowest)
+    percent_k = np.where(highest > lowest, percent_k, np.nan)
+
+    windows = np.lib.stride_tricks.sliding_window_view(percent_k, d_period, axis=1)
+    return percent_k[:, d_period - 1:], windows.mean(axis=2)
+
+
+def calculate_stochastic_k(window: MarketWindow, period: int = STOCHASTIC_PERIOD) -> np.ndarray:
+    """
+    시장 전체 종목의 스토캐스틱 %K를 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): 최고가/최저가 기간 (거래일)
+
+    Returns:
+        np.ndarray: 종목별 구간 마지막 거래일의 %K (0~100, 기간 안에 거래가 없는 날이 있거나 고가=저가면 NaN)
+    """
+    if window.stop == 0:
+        return np.full(len(window.stock_codes), np.nan)
+    return _stochastic_series(window, period, 1, window.stop - 1)[0][:, 0]
+
+
+def calculate_stochastic_d(window: MarketWindow, period: int = STOCHASTIC_PERIOD, d_period: int = STOCHASTIC_D_PERIOD) -> np.ndarray:
+    """
+    시장 전체 종목의 스토캐스틱 %D(%K의 이동평균)를 계산합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): %K 최고가/최저가 기간 (거래일)
+        d_period (int): %D 이동평균 기간 (거래일)
+
+    Returns:
+        np.ndarray: 종목별 구간 마지막 거래일의 %D (%K 값이 d_period개 모두 있어야 함, 아니면 NaN)
+    """
+    if window.stop == 0:
+        return np.full(len(window.stock_codes), np.nan)
+    return _stochastic_series(window, period, d_period, window.stop - 1)[1][:, 0]
+
+
+def _stochastic_cross(window: MarketWindow, period: int, d_period: int, golden: bool) -> np.ndarray:
+    """구간 각 거래일에 %K가 %D를 상향(golden)/하향 돌파했는지 판정해 종목별 발생 여부를 반환합니다."""
+    if window.start >= window.stop:
+        return np.zeros(len(window.stock_codes))
+    percent_k, percent_d = _stochastic_series(window, period, d_period, window.start - 1)
+    if golden:
+        crosses = (percent_k[:, :-1] <= percent_d[:, :-1]) & (percent_k[:, 1:] > percent_d[:, 1:])
+    else:
+        crosses = (percent_k[:, :-1] >= percent_d[:, :-1]) & (percent_k[:, 1:] < percent_d[:, 1:])
+    return crosses.any(axis=1).astype(float)
+
+
+def detect_stochastic_golden_cross(window: MarketWindow, period: int = STOCHASTIC_PERIOD,
+                                   d_period: int = STOCHASTIC_D_PERIOD) -> np.ndarray:
+    """
+    시장 전체 종목에서 스토캐스틱 %K가 %D를 상향 돌파했는지 감지합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): %K 최고가/최저가 기간 (거래일)
+        d_period (int): %D 이동평균 기간 (거래일)
+
+    Returns:
+        np.ndarray: 종목별 구간 내 상향 돌파 발생 시 1.0, 아니면 0.0
+    """
+    return _stochastic_cross(window, period, d_period, golden=True)
+
+
+def detect_stochastic_dead_cross(window: MarketWindow, period: int = STOCHASTIC_PERIOD,
+                                 d_period: int = STOCHASTIC_D_PERIOD) -> np.ndarray:
+    """
+    시장 전체 종목에서 스토캐스틱 %K가 %D를 하향 돌파했는지 감지합니다.
+
+    Args:
+        window (MarketWindow): 지표 계산 구간의 가격 행렬
+        period (int): %K 최고가/최저가 기간 (거래일)
+        d_period (int): %D 이동평균 기간 (거래일)
+
+    Returns:
+        np.ndarray: 종목별 구간 내 하향 돌파 발생 시 1.0, 아니면 0.0
+    """
+    return _stochastic_cross(window, period, d_period, golden=False)
+
+
+# 지표 함수명 → 시장 전체 계산 함수
+BATCH_INDICATORS = {
+    "calculate_rsi": calculate_rsi,
+    "calculate_average_volume": calculate_average_volume,
+    "calculate_volume_ratio": calculate_volume_ratio,
+    "calculate_moving_average": calculate_moving_average,
+    "detect_golden_cross": detect_golden_cross,
+    "count_golden_cross": count_golden_cross,
+    "detect_dead_cross": detect_dead_cross,
+    "count_dead_cross": count_dead_cross,
+    "detect_bollinger_lower_touch": detect_bollinger_lower_touch,
+    "detect_bollinger_upper_touch": detect_bollinger_upper_touch,
+    "count_bollinger_lower_touch": count_bollinger_lower_touch,
+    "count_bollinger_upper_touch": count_bollinger_upper_touch,
+    "calculate_bollinger_upper": calculate_bollinger_upper,
+    "calculate_bollinger_lower": calculate_bollinger_lower,
+    "calculate_ema": calculate_ema,
+    "calculate_macd": calculate_macd,
+    "calculate_macd_signal": calculate_macd_signal,
+    "calculate_macd_histogram": calculate_macd_histogram,
+    "detect_macd_golden_cross": detect_macd_golden_cross,
+    "detect_macd_dead_cross": detect_macd_dead_cross,
+    "calculate_atr": calculate_atr,
+    "detect_atr_breakout": detect_atr_breakout,
+    "calculate_obv": calculate_obv,
+    "detect_obv_bullish_divergence": detect_obv_bullish_divergence,
+    "detect_obv_bearish_divergence": detect_obv_bearish_divergence,
+    "calculate_stochastic_k": calculate_stochastic_k,
+    "calculate_stochastic_d": calculate_stochastic_d,
+    "detect_stochastic_golden_cross": detect_stochastic_golden_cross,
+    "detect_stochastic_dead_cross": detect_stochastic_dead_cross,
+}
@@ -0,0 +1,127 @@
+
+import sys
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Hashable
+import numpy as np
+
+
+class IndicatorCache:
+    """
+    지표 계산 결과 LRU 캐시
+
+    (지표 함수명, 종목코드 또는 시장, 시작일, 종료일) 같은 키로 결과를 보관하고,
+    저장소 버전(database.version)이 바뀌면 모든 항목을 자동으로 비웁니다.
+    """
+
+    def __init__(self, maxsize: int = 256, max_bytes: int = None):
+        """
+        Args:
+            maxsize: 보관할 최대 항목 수 (초과 시 가장 오래 쓰지 않은 항목부터 제거)
+            max_bytes: 보관할 결과의 최대 총 크기 (바이트, 선택). 초과 시 가장 오래 쓰지 않은 항목부터 제거
+        """
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._entries: OrderedDict = OrderedDict()
+        self._sizes: dict[Hashable, int] = {}
+        self._version = None
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key: Hashable, version: int, compute: Callable[[], Any]) -> Any:
+        """
+        캐시된 결과를 반환하고, 없으면 계산해서 저장합니다.
+
+        Args:
+            key: 캐시 키
+            version: 현재 저장소 버전
+            compute: 캐시에 없을 때 호출할 계산 함수
+
+        Returns:
+            Any: 계산 결과 (배열은 읽기 전용으로 저장됨)
+        """
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+                self._sizes.clear()
+                self.nbytes = 0
+                self._version = version
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        value = compute()
+        if isinstance(value, np.ndarray):
+            value.flags.writeable = False
+
+        size = _sizeof(value)
+        with self._lock:
+            if version == self._version and (self.max_bytes is None or size <= self.max_bytes):
+                if key in self._entries:
+                    self.nbytes -= self._sizes[key]
+                self._entries[key] = value
+                self._sizes[key] = size
+                self.nbytes += size
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize or (self.max_bytes is not None and self.nbytes > self.max_bytes):
+                    evicted, _ = self._entries.popitem(last=False)
+                    self.nbytes -= self._sizes.pop(evicted)
+                    self.evictions += 1
+        return value
+
+    def get(self, key: Hashable, version: int) -> Any:
+        """
+        캐시된 결과를 반환합니다. 없거나 저장소 버전이 바뀌었으면 None입니다.
+
+        Args:
+            key: 캐시 키
+            version: 현재 저장소 버전
+        """
+        with self._lock:
+            if version != self._version or key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def clear(self):
+        """모든 항목과 통계를 초기화합니다."""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.nbytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict[str, float]:
+        """
+        캐시 사용 통계를 반환합니다.
+
+        Returns:
+            dict: size, maxsize, nbytes, hits, misses, evictions, hit_rate
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "nbytes": self.nbytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / total if total else 0.0,
+            }
+
+
+def _sizeof(value: Any) -> int:
+    """캐시 항목의 대략적인 크기 (바이트)"""
+    if hasattr(value, "nbytes"):  # np.ndarray 또는 크기를 알려 주는 결과 객체
+        return value.nbytes
+    if isinstance(value, str):
+        return len(value.encode("utf-8"))
+    return sys.getsizeof(value)
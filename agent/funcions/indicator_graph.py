@@ -0,0 +1,397 @@
+
+import inspect
+from dataclasses import dataclass, field
+from typing import Any, Callable, Hashable
+from stock_data_models import MarketWindow
+from funcions import indicator_batch
+from funcions.rolling import rolling_mean, rolling_std
+import numpy as np
+
+# 지표가 필요로 하는 중간 계산(이동평균, 표준편차, 종가 변화량 등)을 선언하고,
+# 요청 하나에서 같은 중간 계산을 여러 지표/수식이 공유하도록 한 번만 계산하는 평가기입니다.
+#
+# 중간 계산 결과는 모두 "계산 구간" [first, window.stop) 의 (종목 × 거래일) 행렬입니다.
+# first는 지표 구간 첫날(구간이 비었으면 마지막 거래일)의 전 거래일이며,
+# 저장소 첫 거래일 이전 칸은 NaN입니다. 전일 대비 판정과 마지막 거래일 값을 같은 행렬에서 꺼낼 수 있습니다.
+#
+# 이동 통계의 기간은 저장소 달력의 거래일 단위이며, 거래정지 등으로 빈 봉이 있을 때
+# 값을 낼 최소 유효 봉 개수(min_periods)를 키에 명시합니다. 생략하면 기간 전체(period)입니다.
+
+
+def min_periods_for(period: int, min_periods: int = None) -> int:
+    """기간 period의 이동 통계에 적용할 최소 유효 봉 개수 (생략하면 period, period보다 크면 period)"""
+    return period if min_periods is None else max(min(min_periods, period), 1)
+
+
+def _field(evaluator: "IndicatorEvaluator", name: str) -> np.ndarray:
+    """가격 필드"""
+    return indicator_batch.padded_columns(evaluator.window, name, evaluator.first)
+
+
+def _delta(evaluator: "IndicatorEvaluator", name: str) -> np.ndarray:
+    """전 거래일 대비 변화량"""
+    previous = indicator_batch.padded_columns(evaluator.window, name, evaluator.first - 1)[:, :-1]
+    return evaluator.get(("field", name)) - previous
+
+
+def _rolling(evaluator: "IndicatorEvaluator", fn: Callable, name: str, period: int, min_periods: int) -> np.ndarray:
+    """저장소 누적합으로 계산 구간의 이동 통계를 구합니다. 계산 구간과 기간 안의 봉만 읽습니다."""
+    window = evaluator.window
+    first = max(evaluator.first, 0)
+    values = fn(indicator_batch.market_prefix_sums(window, name), period, first, window.stop, min_periods)
+    padding = np.full((len(values), first - evaluator.first), np.nan)
+    return np.concatenate([padding, values], axis=1)
+
+
+def _atr(evaluator: "IndicatorEvaluator", period: int, min_periods: int) -> np.ndarray:
+    """ATR"""
+    return indicator_batch.atr_series(evaluator.window, period, evaluator.first, min_periods)
+
+
+def _bollinger_band(evaluator: "IndicatorEvaluator", period: int, k: float, min_periods: int, upper: bool) -> np.ndarray:
+    """볼린저 밴드 상단/하단 (이동평균 ± k × 표준편차)"""
+    middle = evaluator.get(("rolling_mean", "close_price", period, min_periods))
+    stddev = evaluator.get(("rolling_std", "close_price", period, min_periods))
+    return middle + k * stddev if upper else middle - k * stddev
+
+
+def _volume_ratio(evaluator: "IndicatorEvaluator", period: int, min_periods: int) -> np.ndarray:
+    """거래량 / 직전 period 거래일 평균 거래량"""
+    average = evaluator.get(("rolling_mean", "volume", period, min_periods))[:, :-1]
+    volume = evaluator.get(("field", "volume"))[:, 1:]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = np.where(average > 0, volume / average, np.nan)
+    return np.concatenate([np.full((len(ratios), 1), np.nan), ratios], axis=1)
+
+
+def _cross(evaluator: "IndicatorEvaluator", short_period: int, long_period: int, golden: bool, min_periods: int) -> np.ndarray:
+    """
+    이동평균 골든/데드 크로스 발생 여부. 계산 구간 첫 열은 전날 값이 없어 사용하지 않습니다.
+
+    min_periods는 장기 이동평균 기준이며 단기 이동평균에는 단기 기간을 넘지 않게 적용합니다.
+    """
+    short_ma = evaluator.get(("rolling_mean", "close_price", short_period, min_periods_for(short_period, min_periods)))
+    long_ma = evaluator.get(("rolling_mean", "close_price", long_period, min_periods))
+    closes = evaluator.get(("field", "close_price"))
+    if golden:
+        crosses = (short_ma[:, :-1] <= long_ma[:, :-1]) & (short_ma[:, 1:] > long_ma[:, 1:])
+    else:
+        crosses = (short_ma[:, :-1] >= long_ma[:, :-1]) & (short_ma[:, 1:] < long_ma[:, 1:])
+    crosses &= ~np.isnan(closes[:, 1:])
+    return np.concatenate([np.zeros((len(crosses), 1), dtype=bool), crosses], axis=1)
+
+
+def _rsi_state(evaluator: "IndicatorEvaluator") -> Any:
+    """지표 구간 마지막 거래일까지 반영한 Wilder RSI 상태 (적재 시점 상태가 있으면 재사용)"""
+    window = evaluator.window
+    state = window.streams.get("rsi")
+    if state is None or not window.is_latest:
+        state = indicator_batch.init_market_rsi_state(window.history("close_price"))
+    return state
+
+
+# 중간 계산 종류 → 계산 함수. 키는 (종류, *인자) 튜플입니다.
+INTERMEDIATES = {
+    "field": _field,
+    "delta": _delta,
+    "rolling_mean": lambda evaluator, name, period, min_periods: _rolling(evaluator, rolling_mean, name, period, min_periods),
+    "rolling_std": lambda evaluator, name, period, min_periods: _rolling(evaluator, rolling_std, name, period, min_periods),
+    "bollinger_upper": lambda evaluator, period, k, min_periods: _bollinger_band(evaluator, period, k, min_periods, upper=True),
+    "bollinger_lower": lambda evaluator, period, k, min_periods: _bollinger_band(evaluator, period, k, min_periods, upper=False),
+    "volume_ratio": _volume_ratio,
+    "cross": _cross,
+    "atr": _atr,
+    "rsi_state": _rsi_state,
+}
+
+# 적재 시점에 계산해 두는 표준 지표 테이블 (indicator_tables.py)
+MA_PERIODS = (5, 20, 60, 120)
+CROSS_PAIRS = ((5, 20), (20, 60), (60, 120))
+RSI_TABLE = f"rsi_{indicator_batch.RSI_PERIOD}"
+
+# 중간 계산 키 → 같은 값을 담은 지표 테이블명. 테이블이 있으면 계산 대신 테이블을 잘라 씁니다.
+# 테이블은 모두 기간 전체의 봉이 있어야 값을 내는(min_periods = period) 기준입니다.
+_BOLLINGER = (indicator_batch.BOLLINGER_WINDOW, indicator_batch.BOLLINGER_K, indicator_batch.BOLLINGER_WINDOW)
+MATERIALIZED_TABLES = {
+    **{("rolling_mean", "close_price", period, period): f"ma_{period}" for period in MA_PERIODS},
+    ("bollinger_upper", *_BOLLINGER): "bollinger_upper",
+    ("bollinger_lower", *_BOLLINGER): "bollinger_lower",
+    ("volume_ratio", indicator_batch.VOLUME_WINDOW, indicator_batch.VOLUME_WINDOW): f"volume_ratio_{indicator_batch.VOLUME_WINDOW}",
+    **{("cross", short, long, True, long): f"golden_cross_{short}_{long}" for short, long in CROSS_PAIRS},
+    **{("cross", short, long, False, long): f"dead_cross_{short}_{long}" for short, long in CROSS_PAIRS},
+}
+
+
+@dataclass(frozen=True)
+class IndicatorSpec:
+    """중간 계산 입력을 선언한 지표 정의"""
+    inputs: Callable[..., tuple]        # (**params) -> 사용하는 중간 계산 키 목록
+    compute: Callable[..., np.ndarray]  # (evaluator, **params) -> 종목별 값
+    defaults: dict = field(default_factory=dict)
+
+
+class IndicatorEvaluator:
+    """
+    요청 하나의 지표 평가기
+
+    같은 지표 구간에서 여러 지표를 계산할 때 중간 계산과 지표 결과를 한 번씩만 계산해 공유합니다.
+    """
+
+    def __init__(self, window: MarketWindow):
+        """
+        Args:
+            window (MarketWindow): 지표 계산 구간의 가격 행렬
+        """
+        self.window = window
+        self.first = min(window.start, window.stop - 1) - 1
+        self.n_days = max(window.stop - window.start, 0)
+        self._intermediates: dict[Hashable, np.ndarray] = {}
+        self._results: dict[Hashable, np.ndarray] = {}
+        self.computed: list[Hashable] = []  # 실제로 계산한 중간 계산 키 (계산 순서)
+
+    def get(self, key: tuple) -> Any:
+        """
+        중간 계산 결과를 반환합니다. 처음 요청될 때 한 번만 계산합니다.
+
+        Args:
+            key: (종류, *인자) 튜플. 예: ("rolling_mean", "close_price", 20, 20)
+
+        Returns:
+            Any: 계산 구간의 (종목 × 거래일) 행렬 (rsi_state는 RSI 상태)
+        """
+        if key not in self._intermediates:
+            table = self.table(MATERIALIZED_TABLES.get(key))
+            if table is not None:
+                self._intermediates[key] = table
+            else:
+                kind, *args = key
+                self._intermediates[key] = INTERMEDIATES[kind](self, *args)
+                self.computed.append(key)
+        return self._intermediates[key]
+
+    def table(self, name: str) -> np.ndarray:
+        """
+        적재 시점에 계산해 둔 지표 테이블의 계산 구간 열을 반환합니다.
+
+        Args:
+            name: 지표 테이블명 (예: "ma_20", "rsi_14")
+
+        Returns:
+            np.ndarray: 계산 구간의 (종목 × 거래일) 행렬 (저장소에 테이블이 없으면 None). 실수 테이블은 float64로 넓힘
+        """
+        matrix = self.window.tables.get(name)
+        if matrix is None:
+            return None
+        columns = indicator_batch.pad_columns(matrix, self.first, self.window.stop)
+        return columns.astype(float) if columns.dtype.kind == "f" else columns
+
+    def window_part(self, matrix: np.ndarray) -> np.ndarray:
+        """계산 구간 행렬에서 지표 구간 [start, stop) 열만 잘라냅니다."""
+        return matrix[:, matrix.shape[1] - self.n_days:]
+
+    def inputs(self, name: str, **params) -> tuple:
+        """
+        지표가 사용하는 중간 계산 키 목록을 반환합니다. 선언되지 않은 지표는 빈 튜플입니다.
+
+        Args:
+            name: 지표 함수명
+            **params: 지표 파라미터
+
+        Returns:
+            tuple: 중간 계산 키 목록
+        """
+        spec = INDICATOR_SPECS.get(name)
+        if spec is None:
+            return ()
+        return spec.inputs(**{**spec.defaults, **params})
+
+    def evaluate(self, name: str, **params) -> np.ndarray:
+        """
+        지표를 계산합니다. 같은 지표/파라미터는 요청 안에서 한 번만 계산합니다.
+
+        선언된 지표는 공유 중간 계산으로, 그 외 지표는 indicator_batch 함수로 계산합니다.
+
+        Args:
+            name: 지표 함수명 (indicator_batch.BATCH_INDICATORS의 키)
+            **params: 지표 파라미터
+
+        Returns:
+            np.ndarray: window.stock_codes 순서의 종목별 값
+
+        Raises:
+            KeyError: 알 수 없는 지표 함수명
+        """
+        spec = INDICATOR_SPECS.get(name)
+        if spec is not None:
+            params = {**spec.defaults, **params}
+        key = (name, tuple(sorted(params.items())))
+        if key not in self._results:
+            if spec is not None:
+                self._results[key] = spec.compute(self, **params)
+            else:
+                self._results[key] = indicator_batch.BATCH_INDICATORS[name](self.window, **params)
+        return self._results[key]
+
+
+def _moving_average_spec(name: str, fallback: Callable) -> IndicatorSpec:
+    """period를 주면 마지막 거래일의 period 거래일 이동평균, 생략하면 indicator_batch의 구간 평균"""
+    def inputs(period: int, min_periods: int) -> tuple:
+        return (("rolling_mean", name, period, min_periods_for(period, min_periods)), ) if period is not None else ()
+
+    def compute(evaluator: IndicatorEvaluator, period: int, min_periods: int) -> np.ndarray:
+        if period is None:
+            return fallback(evaluator.window)
+        return evaluator.get(inputs(period, min_periods)[0])[:, -1]
+    return IndicatorSpec(inputs=inputs, compute=compute, defaults={"period": None, "min_periods": None})
+
+
+def _cross_counts(evaluator: IndicatorEvaluator, short_period: int, long_period: int, golden: bool, min_periods: int) -> np.ndarray:
+    """교차 발생일 색인이 있으면 색인으로, 없으면 공유 이동평균으로 종목별 교차 횟수를 구합니다."""
+    if min_periods == long_period:
+        # 색인은 기간 전체의 봉이 있는 이동평균 기준
+        counts = indicator_batch.indexed_cross_counts(evaluator.window, short_period, long_period, golden)
+        if counts is not None:
+            return counts
+
+    crosses = evaluator.get(("cross", short_period, long_period, golden, min_periods))
+    return evaluator.window_part(crosses).sum(axis=1)
+
+
+def _cross_spec(golden: bool, count: bool) -> IndicatorSpec:
+    def compute(evaluator: IndicatorEvaluator, short_period: int, long_period: int, min_periods: int) -> np.ndarray:
+        counts = _cross_counts(evaluator, short_period, long_period, golden, min_periods_for(long_period, min_periods))
+        return counts.astype(float) if count else (counts > 0).astype(float)
+    return IndicatorSpec(
+        inputs=lambda short_period, long_period, min_periods: (
+            ("cross", short_period, long_period, golden, min_periods_for(long_period, min_periods)), ),
+        compute=compute,
+        defaults={"short_period": indicator_batch.SHORT_WINDOW, "long_period": indicator_batch.LONG_WINDOW, "min_periods": None}
+    )
+
+
+def _bollinger_spec(upper: bool, kind: str) -> IndicatorSpec:
+    """kind: "detect"(마지막 거래일 터치), "count"(구간 터치 일수), "value"(마지막 거래일 밴드 값)"""
+    band = "bollinger_upper" if upper else "bollinger_lower"
+
+    def inputs(period: int, k: float, min_periods: int) -> tuple:
+        band_key = (band, period, k, min_periods_for(period, min_periods))
+        return (band_key, ) if kind == "value" else (band_key, ("field", "close_price"))
+
+    def compute(evaluator: IndicatorEvaluator, period: int, k: float, min_periods: int) -> np.ndarray:
+        band_key = inputs(period, k, min_periods)[0]
+        values = evaluator.get(band_key)
+        if kind == "value":
+            return values[:, -1]
+        closes = evaluator.get(("field", "close_price"))
+        touches = closes >= values if upper else closes <= values
+        if kind == "detect":
+            return touches[:, -1].astype(float)
+        return evaluator.window_part(touches).sum(axis=1).astype(float)
+    return IndicatorSpec(
+        inputs=inputs,
+        compute=compute,
+        defaults={"period": indicator_batch.BOLLINGER_WINDOW, "k": indicator_batch.BOLLINGER_K, "min_periods": None}
+    )
+
+
+def _rsi(evaluator: IndicatorEvaluator) -> np.ndarray:
+    """적재 시점 RSI 테이블이 있으면 조회하고, 없으면 RSI 상태로 계산합니다."""
+    table = evaluator.table(RSI_TABLE)
+    if table is not None:
+        return table[:, -1]
+    return indicator_batch.market_rsi_from_state(evaluator.get(("rsi_state", )))
+
+
+def _atr_breakout(evaluator: IndicatorEvaluator, period: int, k: float, min_periods: int) -> np.ndarray:
+    atr = evaluator.get(("atr", period, min_periods_for(period, min_periods)))
+    deltas = evaluator.get(("delta", "close_price"))
+    return evaluator.window_part(deltas[:, 1:] > k * atr[:, :-1]).any(axis=1).astype(float)
+
+
+# 지표 함수명 → 선언형 정의. 여기에 없는 지표는 indicator_batch 함수로 계산합니다.
+INDICATOR_SPECS = {
+    "calculate_rsi": IndicatorSpec(
+        inputs=lambda: (("rsi_state", ), ),
+        compute=_rsi
+    ),
+    "calculate_moving_average": _moving_average_spec("close_price", indicator_batch.calculate_moving_average),
+    "calculate_average_volume": _moving_average_spec("volume", indicator_batch.calculate_average_volume),
+    "calculate_volume_ratio": IndicatorSpec(
+        inputs=lambda period, min_periods: (("volume_ratio", period, min_periods_for(period, min_periods)), ),
+        compute=lambda evaluator, period, min_periods: evaluator.get(("volume_ratio", period, min_periods_for(period, min_periods)))[:, -1],
+        defaults={"period": indicator_batch.VOLUME_WINDOW, "min_periods": None}
+    ),
+    "detect_golden_cross": _cross_spec(golden=True, count=False),
+    "count_golden_cross": _cross_spec(golden=True, count=True),
+    "detect_dead_cross": _cross_spec(golden=False, count=False),
+    "count_dead_cross": _cross_spec(golden=False, count=True),
+    "detect_bollinger_lower_touch": _bollinger_spec(upper=False, kind="detect"),
+    "detect_bollinger_upper_touch": _bollinger_spec(upper=True, kind="detect"),
+    "count_bollinger_lower_touch": _bollinger_spec(upper=False, kind="count"),
+    "count_bollinger_upper_touch": _bollinger_spec(upper=True, kind="count"),
+    "calculate_bollinger_upper": _bollinger_spec(upper=True, kind="value"),
+    "calculate_bollinger_lower": _bollinger_spec(upper=False, kind="value"),
+    "calculate_atr": IndicatorSpec(
+        inputs=lambda period, min_periods: (("atr", period, min_periods_for(period, min_periods)), ),
+        compute=lambda evaluator, period, min_periods: evaluator.get(("atr", period, min_periods_for(period, min_periods)))[:, -1],
+        defaults={"period": indicator_batch.ATR_PERIOD, "min_periods": None}
+    ),
+    "detect_atr_breakout": IndicatorSpec(
+        inputs=lambda period, k, min_periods: (("atr", period, min_periods_for(period, min_periods)), ("delta", "close_price")),
+        compute=_atr_breakout,
+        defaults={"period": indicator_batch.ATR_PERIOD, "k": indicator_batch.ATR_BREAKOUT_K, "min_periods": None}
+    ),
+}
+
+
+def normalize_params(name: str, params: dict) -> tuple:
+    """
+    기본값을 채운 지표 파라미터를 정렬된 튜플로 반환합니다. 캐시 키에서 생략한 기본값과 명시한 기본값을 같게 취급합니다.
+
+    Args:
+        name: 지표 함수명
+        params: 지표 파라미터
+
+    Returns:
+        tuple: ((파라미터명, 값), ...)
+    """
+    return tuple(sorted({**_param_defaults(name), **params}.items()))
+
+
+def _param_defaults(name: str) -> dict:
+    """지표 함수가 받는 파라미터와 기본값"""
+    spec = INDICATOR_SPECS.get(name)
+    if spec is not None:
+        return spec.defaults
+    signature = inspect.signature(indicator_batch.BATCH_INDICATORS[name])
+    return {key: p.default for key, p in signature.parameters.items() if p.default is not inspect.Parameter.empty}
+
+
+def check_params(name: str, params: dict):
+    """
+    지표 파라미터가 지표 함수가 받는 이름과 값인지 검사합니다.
+
+    기간 파라미터(period, short_period, min_periods 등)는 1 이상의 정수, 그 외(k 등)는 숫자여야 합니다.
+    캐시 키를 만들거나 지표를 계산하기 전에 호출합니다.
+
+    Args:
+        name: 지표 함수명 (indicator_batch.BATCH_INDICATORS의 키)
+        params: 지표 파라미터
+
+    Raises:
+        ValueError: 지표 함수가 받지 않는 파라미터이거나 값이 올바르지 않은 경우
+    """
+    if not isinstance(params, dict):
+        raise ValueError(f"지표 파라미터는 이름 → 값 형식이어야 합니다: {params!r}")
+    defaults = _param_defaults(name)
+    for key, value in params.items():
+        if key not in defaults:
+            accepted = ", ".join(defaults) or "없음"
+            raise ValueError(f"{name}이(가) 받지 않는 파라미터입니다: {key} (사용 가능: {accepted})")
+        if value is None and defaults[key] is None:
+            continue
+        if "period" in key:
+            if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                raise ValueError(f"{name}의 {key}는 1 이상의 정수여야 합니다: {value!r}")
+        elif not isinstance(value, (int, float)) or isinstance(value, bool) or not np.isfinite(value):
+            raise ValueError(f"{name}의 {key}는 숫자여야 합니다: {value!r}")
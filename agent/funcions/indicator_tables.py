@@ -0,0 +1,58 @@
+
+from dataclasses import replace
+from stock_data_models import MarketWindow
+from funcions import indicator_batch
+from funcions.indicator_graph import IndicatorEvaluator, MATERIALIZED_TABLES, RSI_TABLE
+from funcions.column_buffer import append_column
+import numpy as np
+
+# 하루 한 번 장 마감 후에만 바뀌는 데이터이므로 표준 지표(RSI14, 이동평균 5/20/60/120,
+# 볼린저 밴드, 거래량 비율, 이동평균 교차)를 적재 시점에 모든 종목 × 거래일로 계산해 저장소에 둡니다.
+# 스크리닝은 IndicatorEvaluator가 이 테이블을 잘라 쓰므로 조회와 비교 한 번으로 끝납니다.
+# 테이블은 MATERIALIZED_TABLES의 고정된 기본 기간 조합과 RSI14뿐이며(요청 파라미터마다 늘어나지 않음),
+# 실수 테이블은 float32, 교차 테이블은 bool로 보관합니다. 종목 × 거래일 한 칸당 실수 테이블 8개 × 4바이트 +
+# 교차 테이블 6개 × 1바이트입니다. float32 반올림(상대 오차 약 6e-8)은 평가기가 float64로 넓혀 읽습니다.
+
+# 실수 지표 테이블 자료형
+TABLE_DTYPE = np.float32
+
+
+def _stored(matrix: np.ndarray) -> np.ndarray:
+    """테이블 보관 자료형으로 변환 (실수는 TABLE_DTYPE, 교차 여부는 bool 그대로)"""
+    return matrix.astype(TABLE_DTYPE) if matrix.dtype.kind == "f" else matrix
+
+
+def _materialize(window: MarketWindow) -> dict[str, np.ndarray]:
+    """지표 구간 [start, stop)의 표준 지표를 평가기로 계산합니다. (테이블 없이 계산해야 하므로 tables는 비움)"""
+    evaluator = IndicatorEvaluator(replace(window, tables={}))
+    return {name: evaluator.window_part(evaluator.get(key)) for key, name in MATERIALIZED_TABLES.items()}
+
+
+def build_indicator_tables(window: MarketWindow) -> dict[str, np.ndarray]:
+    """
+    저장소 전체 이력의 표준 지표 테이블을 만듭니다.
+
+    Args:
+        window (MarketWindow): 저장소 전체 구간
+
+    Returns:
+        dict[str, np.ndarray]: 테이블명 → (종목 × 거래일) 지표 행렬 (실수 테이블은 TABLE_DTYPE)
+    """
+    tables = _materialize(replace(window, start=0))
+    tables[RSI_TABLE] = indicator_batch.rsi_matrix(window.history("close_price"))
+    return {name: _stored(matrix) for name, matrix in tables.items()}
+
+
+def append_indicator_tables(tables: dict[str, np.ndarray], window: MarketWindow, rsi_state: indicator_batch.MarketRSIState):
+    """
+    저장소에 추가된 마지막 거래일의 표준 지표를 각 테이블 끝에 이어 붙입니다. 종목당 분할 상환 O(1)입니다.
+
+    Args:
+        tables: build_indicator_tables로 만든 테이블 (제자리에서 갱신)
+        window (MarketWindow): 저장소 전체 구간 (마지막 거래일까지 포함)
+        rsi_state: 마지막 거래일까지 반영된 RSI 상태
+    """
+    columns = _materialize(replace(window, start=window.stop - 1))
+    columns[RSI_TABLE] = indicator_batch.market_rsi_from_state(rsi_state)[:, None]
+    for name, column in columns.items():
+        tables[name] = append_column(tables[name], column[:, 0].astype(tables[name].dtype))
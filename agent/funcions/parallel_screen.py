@@ -0,0 +1,104 @@
+
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from stock_data_models import MarketWindow
+from funcions.indicator_graph import IndicatorEvaluator
+
+# 시장 전체 지표 계산을 종목 묶음(chunk)으로 나눠 여러 프로세스에서 실행합니다.
+# 가격 행렬은 저장소 버전마다 한 번 임시 .npy 파일로 내려 두고 작업 프로세스가 mmap으로 붙어 읽으므로
+# 작업마다 이력을 직렬화(pickle)해 보내지 않습니다. 결과는 종목 순서대로 이어 붙입니다.
+# 지표는 종목별로 독립이므로 결과는 단일 프로세스 IndicatorEvaluator와 같습니다.
+
+CHUNKS_PER_WORKER = 4
+
+# 작업 프로세스 전역 상태 (initializer에서 한 번 설정)
+_worker_arrays: dict[str, np.ndarray] = {}
+_worker_codes: list[str] = []
+_worker_dates: list[str] = []
+
+
+def _attach(paths: dict[str, str], stock_codes: list[str], dates: list[str]):
+    """작업 프로세스 시작 시 가격 행렬 파일을 mmap으로 엽니다."""
+    global _worker_arrays, _worker_codes, _worker_dates
+    _worker_arrays = {name: np.load(path, mmap_mode="r") for name, path in paths.items()}
+    _worker_codes, _worker_dates = stock_codes, dates
+
+
+def _evaluate_chunk(task: tuple) -> np.ndarray:
+    """[row_start, row_stop) 종목의 지표 값을 계산합니다."""
+    row_start, row_stop, start, stop, indicator_fn, params = task
+    window = MarketWindow(
+        stock_codes=_worker_codes[row_start:row_stop],
+        dates=_worker_dates,
+        arrays={name: matrix[row_start:row_stop] for name, matrix in _worker_arrays.items()},
+        start=start,
+        stop=stop
+    )
+    return np.asarray(IndicatorEvaluator(window).evaluate(indicator_fn, **params), dtype=float)
+
+
+def chunk_bounds(n_stocks: int, n_chunks: int) -> list[tuple[int, int]]:
+    """종목 n_stocks개를 최대 n_chunks개의 연속 구간으로 고르게 나눕니다."""
+    edges = np.linspace(0, n_stocks, max(min(n_chunks, n_stocks), 1) + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(edges[:-1], edges[1:])]
+
+
+class ParallelScreener:
+    """가격 행렬을 mmap으로 공유하는 프로세스 풀 지표 계산기"""
+
+    def __init__(self, n_workers: int):
+        self.n_workers = n_workers
+        self.version = None
+        self.directory = None
+        self.pool = None
+
+    def _prepare(self, window: MarketWindow, version: int):
+        """저장소 버전이 바뀌었으면 가격 행렬을 다시 내려 두고 풀을 새로 띄웁니다."""
+        if self.pool is not None and self.version == version:
+            return
+        self.close()
+        self.directory = tempfile.mkdtemp(prefix="screen_arrays_")
+        paths = {}
+        for name, matrix in window.arrays.items():
+            paths[name] = os.path.join(self.directory, f"{name}.npy")
+            np.save(paths[name], np.ascontiguousarray(matrix))
+        self.pool = ProcessPoolExecutor(
+            max_workers=self.n_workers,
+            initializer=_attach,
+            initargs=(paths, list(window.stock_codes), list(window.dates))
+        )
+        self.version = version
+
+    def evaluate(self, window: MarketWindow, version: int, indicator_fn: str, params: dict = None) -> np.ndarray:
+        """
+        지표를 종목 묶음별로 병렬 계산해 종목 순서대로 합칩니다.
+
+        Args:
+            window (MarketWindow): 지표 계산 구간 (저장소 전체 종목)
+            version: 저장소 버전 (바뀌면 공유 가격 행렬을 다시 만듦)
+            indicator_fn: IndicatorEvaluator로 계산할 지표 함수명
+            params: 지표 파라미터
+
+        Returns:
+            np.ndarray: 종목별 지표 값
+        """
+        self._prepare(window, version)
+        tasks = [
+            (row_start, row_stop, window.start, window.stop, indicator_fn, params or {})
+            for row_start, row_stop in chunk_bounds(len(window.stock_codes), self.n_workers * CHUNKS_PER_WORKER)
+        ]
+        chunks = list(self.pool.map(_evaluate_chunk, tasks))
+        return np.concatenate(chunks) if chunks else np.zeros(0)
+
+    def close(self):
+        """프로세스 풀을 내리고 임시 가격 행렬 파일을 지웁니다."""
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        if self.directory is not None:
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory = None
+        self.version = None
@@ -0,0 +1,70 @@
+
+import numpy as np
+from stock_data_models import MarketWindow
+from funcions.cross_section import CROSS_SECTION_TRANSFORMS
+from funcions.formula import CompiledFormula
+
+# 구간 [start, stop)의 모든 거래일에 대해 조건식을 (종목 × 거래일) 행렬 하나로 평가합니다.
+# 날짜마다 스크리닝을 반복하지 않고, 변수 행렬을 펼쳐 조건식을 한 번 평가한 뒤 다시 행렬로 되돌립니다.
+# 변수는 그날의 가격, 전 거래일 가격(prev_*), 적재 시점 지표 테이블(rsi_14, ma_20 등)과
+# 각각의 날짜별 시장 대비 값(_rank/_percentile/_zscore)입니다.
+
+PREV_PREFIX = "prev_"
+
+
+def range_variable_names(window: MarketWindow) -> tuple[str, ...]:
+    """구간 스크리닝 조건식의 기본 변수명 (가격, prev_가격, 지표 테이블명)"""
+    return (*window.arrays, *(PREV_PREFIX + name for name in window.arrays), *window.tables)
+
+
+def _base_matrix(window: MarketWindow, name: str) -> np.ndarray:
+    """기본 변수의 구간 (종목 × 거래일) 행렬"""
+    if name in window.arrays:
+        return window.field(name)
+    if name in window.tables:
+        return np.asarray(window.tables[name][:, window.start:window.stop], dtype=float)
+    # 전 거래일 값: 한 열 앞의 가격 (저장소 첫 거래일은 NaN)
+    matrix = window.arrays[name[len(PREV_PREFIX):]]
+    if window.start > 0 or window.stop == 0:
+        return matrix[:, max(window.start - 1, 0):max(window.stop - 1, 0)]
+    return np.concatenate([np.full((len(matrix), 1), np.nan), matrix[:, :window.stop - 1]], axis=1)
+
+
+def range_columns(window: MarketWindow, names: frozenset) -> dict[str, np.ndarray]:
+    """
+    조건식이 쓰는 변수의 구간 (종목 × 거래일) 행렬을 만듭니다.
+
+    Args:
+        window: 스크리닝 구간 (시장 전체 종목)
+        names: 조건식이 쓰는 변수명 (range_variable_names와 그 _rank/_percentile/_zscore)
+
+    Returns:
+        dict[str, np.ndarray]: 변수명 → (종목 × 거래일) 행렬. 거래 여부 판단용 close_price는 항상 포함
+    """
+    columns = {"close_price": window.field("close_price")}
+    for name in names:
+        for kind, transform in CROSS_SECTION_TRANSFORMS.items():
+            if name.endswith(f"_{kind}") and name[:-len(kind) - 1] in range_variable_names(window):
+                # 날짜(열)마다 시장 전체 종목과 비교
+                columns[name] = transform(_base_matrix(window, name[:-len(kind) - 1]))
+                break
+        else:
+            columns[name] = _base_matrix(window, name)
+    return columns
+
+
+def range_hits(window: MarketWindow, compiled: CompiledFormula) -> np.ndarray:
+    """
+    구간의 모든 거래일에 대해 조건식을 평가합니다.
+
+    Args:
+        window: 스크리닝 구간 (시장 전체 종목)
+        compiled: 검사를 마친 조건식 (range_columns가 만들 수 있는 변수만 사용)
+
+    Returns:
+        np.ndarray: (종목 × 거래일) 조건 만족 여부. 거래가 없는 날은 False
+    """
+    columns = range_columns(window, compiled.names)
+    shape = columns["close_price"].shape
+    mask = compiled.evaluate({name: matrix.ravel() for name, matrix in columns.items()}).reshape(shape)
+    return mask & ~np.isnan(columns["close_price"])
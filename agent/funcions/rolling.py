@@ -0,0 +1,123 @@
+
+from dataclasses import dataclass
+import numpy as np
+from funcions.column_buffer import append_column
+
+# 저장소가 종목별로 유지하는 누적합/제곱합입니다.
+# 누적값의 차이 한 번으로 구간 길이와 무관하게 봉당 O(1)에 이동평균/표준편차를 구합니다.
+# 구간은 저장소 달력의 연속 거래일이며, 거래정지로 빈 칸(NaN)은 유효 봉 개수(counts)에서 빠집니다.
+
+
+@dataclass
+class PrefixSums:
+    """(종목 × (거래일 + 1)) 누적합 행렬. 0번 열은 0이며 t+1번 열이 t번 거래일까지의 누적값입니다."""
+    sums: np.ndarray
+    squares: np.ndarray
+    counts: np.ndarray  # 유효(NaN 아님) 봉 개수
+
+
+def build_prefix_sums(matrix: np.ndarray) -> PrefixSums:
+    """
+    (종목 × 거래일) 행렬의 누적합/제곱합/유효 봉 개수를 계산합니다. NaN 칸은 0으로 누적합니다.
+
+    Args:
+        matrix (np.ndarray): (종목 × 거래일) 행렬
+
+    Returns:
+        PrefixSums: 누적값
+    """
+    values = np.nan_to_num(matrix)
+    zeros = np.zeros((matrix.shape[0], 1))
+    return PrefixSums(
+        sums=np.concatenate([zeros, np.cumsum(values, axis=1)], axis=1),
+        squares=np.concatenate([zeros, np.cumsum(values * values, axis=1)], axis=1),
+        counts=np.concatenate([zeros.astype(int), np.cumsum(~np.isnan(matrix), axis=1)], axis=1)
+    )
+
+
+def append_prefix_sums(prefix: PrefixSums, column: np.ndarray) -> PrefixSums:
+    """
+    하루치 값 벡터를 누적값 끝에 덧붙입니다. 여유 열이 있는 버퍼에 쓰므로 종목당 분할 상환 O(1)입니다.
+
+    Args:
+        prefix (PrefixSums): 기존 누적값
+        column (np.ndarray): 종목별 새 값 (NaN은 거래 없음)
+
+    Returns:
+        PrefixSums: 새 열이 추가된 누적값
+    """
+    values = np.nan_to_num(column)
+    return PrefixSums(
+        sums=append_column(prefix.sums, prefix.sums[:, -1] + values),
+        squares=append_column(prefix.squares, prefix.squares[:, -1] + values * values),
+        counts=append_column(prefix.counts, prefix.counts[:, -1] + ~np.isnan(column))
+    )
+
+
+def _window_bounds(period: int, start: int, stop: int) -> tuple[np.ndarray, np.ndarray]:
+    """[start, stop) 각 거래일에서 끝나는 period일 구간의 누적값 열 위치를 반환합니다."""
+    hi = np.arange(start, stop) + 1
+    lo = np.maximum(hi - period, 0)
+    return lo, hi
+
+
+def rolling_sum(prefix: PrefixSums, period: int, start: int, stop: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    [start, stop) 각 거래일에서 끝나는 period 거래일 구간의 합과 유효 봉 개수를 계산합니다.
+
+    Args:
+        prefix (PrefixSums): 누적값
+        period (int): 구간 길이 (거래일)
+        start (int): 첫 거래일 위치
+        stop (int): 끝 거래일 위치 (미포함)
+
+    Returns:
+        tuple[np.ndarray, np.ndarray]: (종목 × 거래일) 구간 합, 유효 봉 개수
+    """
+    lo, hi = _window_bounds(period, start, stop)
+    return prefix.sums[:, hi] - prefix.sums[:, lo], prefix.counts[:, hi] - prefix.counts[:, lo]
+
+
+def rolling_mean(prefix: PrefixSums, period: int, start: int, stop: int, min_periods: int = None) -> np.ndarray:
+    """
+    [start, stop) 각 거래일의 period 거래일 이동평균을 계산합니다.
+
+    Args:
+        prefix (PrefixSums): 누적값
+        period (int): 이동평균 길이 (거래일)
+        start (int): 첫 거래일 위치
+        stop (int): 끝 거래일 위치 (미포함)
+        min_periods (int): 값을 내기 위한 최소 유효 봉 개수 (기본값: period)
+
+    Returns:
+        np.ndarray: (종목 × 거래일) 이동평균, 유효 봉이 부족하면 NaN
+    """
+    min_periods = period if min_periods is None else max(min_periods, 1)
+    sums, counts = rolling_sum(prefix, period, start, stop)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counts >= min_periods, sums / counts, np.nan)
+
+
+def rolling_std(prefix: PrefixSums, period: int, start: int, stop: int, min_periods: int = None) -> np.ndarray:
+    """
+    [start, stop) 각 거래일의 period 거래일 모표준편차를 계산합니다.
+
+    Args:
+        prefix (PrefixSums): 누적값
+        period (int): 구간 길이 (거래일)
+        start (int): 첫 거래일 위치
+        stop (int): 끝 거래일 위치 (미포함)
+        min_periods (int): 값을 내기 위한 최소 유효 봉 개수 (기본값: period)
+
+    Returns:
+        np.ndarray: (종목 × 거래일) 표준편차, 유효 봉이 부족하면 NaN
+    """
+    min_periods = period if min_periods is None else max(min_periods, 1)
+    lo, hi = _window_bounds(period, start, stop)
+    sums = prefix.sums[:, hi] - prefix.sums[:, lo]
+    squares = prefix.squares[:, hi] - prefix.squares[:, lo]
+    counts = prefix.counts[:, hi] - prefix.counts[:, lo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = sums / counts
+        variance = np.maximum(squares / counts - mean * mean, 0.0)
+        return np.where(counts >= min_periods, np.sqrt(variance), np.nan)
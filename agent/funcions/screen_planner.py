@@ -0,0 +1,271 @@
+
+from dataclasses import dataclass, field as dataclass_field
+from typing import Callable, Optional
+import numpy as np
+from stock_data_models import MarketWindow
+from funcions.cross_section import CROSS_SECTION_TRANSFORMS, cross_section_variables
+from funcions.formula import CompiledFormula
+from funcions.indicator_graph import IndicatorEvaluator, MATERIALIZED_TABLES, RSI_TABLE, normalize_params
+
+# 스크리닝 조건식의 실행 계획입니다.
+# 최상위 and 조건을 나눠 기준일 가격만 쓰는 조건으로 먼저 후보 종목을 줄이고,
+# 지표는 남은 후보 종목에 대해서만 예상 비용이 싼 순서로 계산하며 조건을 하나씩 적용합니다.
+# 지표의 시장 대비 값(_rank/_percentile/_zscore)을 쓰는 지표는 시장 전체 종목으로 계산해야 하므로 줄이지 않습니다.
+
+# 가격 조건 하나가 후보를 남기는 비율 추정값 (부등호 조건의 통상적인 추정)
+DEFAULT_SELECTIVITY = 1 / 3
+
+# 적재 시점 테이블로 조회하는 중간 계산 키 → 테이블명
+_TABLE_KEYS = {**MATERIALIZED_TABLES, ("rsi_state", ): RSI_TABLE}
+# 가격 행렬을 그대로 읽는 중간 계산 (테이블 조회 여부 판단에서 제외)
+_PRICE_KEYS = {"field", "delta"}
+
+# 적재 시점 증분 상태로 마지막 거래일 값을 조회하는 지표 → 상태 이름 (기본 파라미터일 때만)
+_STREAM_INDICATORS = {
+    "calculate_rsi": "rsi",
+    "calculate_macd": "macd",
+    "calculate_macd_signal": "macd",
+    "calculate_macd_histogram": "macd",
+}
+# 교차 발생일 색인으로 세는 지표
+_INDEXED_CROSS_INDICATORS = {"detect_golden_cross", "count_golden_cross", "detect_dead_cross", "count_dead_cross"}
+# 저장소 첫 거래일부터의 이력을 누적해 계산하는 지표 (후보 종목만 계산해도 전체 이력을 읽음)
+_HISTORY_INDICATORS = {
+    "calculate_rsi", "calculate_ema", "calculate_macd", "calculate_macd_signal", "calculate_macd_histogram",
+    "detect_macd_golden_cross", "detect_macd_dead_cross",
+    "calculate_obv", "detect_obv_bullish_divergence", "detect_obv_bearish_divergence",
+}
+
+
+@dataclass
+class IndicatorRequest:
+    """조건식 변수 하나로 계산할 지표"""
+    fn: str  # indicator_batch.BATCH_INDICATORS의 지표 함수명
+    params: dict
+    window: MarketWindow  # 지표 계산 구간 (시장 전체 종목)
+
+    @property
+    def precomputed(self) -> bool:
+        """
+        적재 시점 테이블/증분 상태/교차 색인으로 시장 전체 값을 바로 조회하는 지표인지 여부
+
+        이런 지표는 후보 종목만 잘라 다시 계산하는 것보다 시장 전체 값을 조회해 후보 위치만 꺼내는 편이 쌉니다.
+        """
+        window = self.window
+        keys = [key for key in IndicatorEvaluator(window).inputs(self.fn, **self.params) if key[0] not in _PRICE_KEYS]
+        if keys and all(_TABLE_KEYS.get(key) in window.tables for key in keys):
+            return True
+        params = dict(normalize_params(self.fn, self.params))
+        if self.fn in _STREAM_INDICATORS:
+            return (_STREAM_INDICATORS[self.fn] in window.streams and window.is_latest
+                    and params == dict(normalize_params(self.fn, {})))
+        if self.fn in _INDEXED_CROSS_INDICATORS and "cross_events" in window.streams:
+            return (params["min_periods"] in (None, params["long_period"])
+                    and window.streams["cross_events"].has_pair(params["short_period"], params["long_period"]))
+        return False
+
+    def lookback(self) -> Optional[int]:
+        """
+        지표 구간 시작일 앞에서 읽는 과거 거래일 수 상한 (저장소 첫 거래일부터의 이력을 읽는 지표는 None)
+
+        기간 파라미터(period, short_period 등)의 합에 전 거래일 비교용 여유 2일을 더합니다.
+        """
+        if self.fn in _HISTORY_INDICATORS:
+            return None
+        periods = [value for key, value in normalize_params(self.fn, self.params)
+                   if key.endswith("period") and isinstance(value, int)]
+        return sum(periods) + 2
+
+    def cost(self, n_rows: float) -> float:
+        """
+        n_rows 종목의 지표 계산 비용 추정값 (읽는 행렬 칸 수)
+
+        적재 시점 값으로 조회하는 지표는 후보 수와 무관하게 시장 전체 종목 수입니다(조회 후 후보 위치만 꺼냄).
+        그 외에는 종목 × 읽는 거래일 × 중간 계산 수이고, 시장 일부 종목이면 가격 행렬을 잘라 복사하는
+        종목 × 읽는 거래일 × 가격 필드 수를 더합니다.
+        """
+        window = self.window
+        n_stocks = len(window.stock_codes)
+        if self.precomputed:
+            return n_stocks
+        keys = IndicatorEvaluator(window).inputs(self.fn, **self.params)
+        lookback = self.lookback()
+        days = window.stop if lookback is None else window.stop - max(window.start - lookback, 0)
+        cost = n_rows * days * max(len(keys), 1)
+        if n_rows < n_stocks:
+            cost += n_rows * days * len(window.arrays)
+        return cost
+
+
+@dataclass
+class PlanStep:
+    """실행 계획의 한 단계"""
+    kind: str  # "filter"(조건 적용) 또는 "compute"(지표 계산)
+    label: str
+    estimated_rows: float  # 예상 입력 종목 수
+    estimated_cost: float
+    rows: Optional[int] = None  # 실행 후 실제 입력 종목 수
+    survivors: Optional[int] = None  # 실행 후 남은 종목 수 (조건 단계)
+
+
+@dataclass
+class ScreenPlan:
+    """조건식 실행 계획. explain으로 계획과 예상 비용을, execute로 실행 결과를 얻습니다."""
+    formula: CompiledFormula
+    requests: dict[str, IndicatorRequest]
+    n_stocks: int
+    full_market: set = dataclass_field(default_factory=set)  # 시장 전체 종목으로 계산할 지표 변수
+    column_filters: list = dataclass_field(default_factory=list)  # 가격만 쓰는 조건
+    indicator_filters: list = dataclass_field(default_factory=list)  # (조건, 먼저 계산할 지표 변수 목록)
+    steps: list = dataclass_field(default_factory=list)
+
+    def explain(self) -> str:
+        """실행 계획과 단계별 예상 비용(실행했으면 실제 종목 수)을 사람이 읽을 수 있는 문자열로 반환합니다."""
+        lines = [f"실행 계획: {self.formula.formula} (종목 {self.n_stocks}개)"]
+        for number, step in enumerate(self.steps, 1):
+            line = f"{number}. [{'조건' if step.kind == 'filter' else '계산'}] {step.label} - 예상 종목 {step.estimated_rows:,.0f}, 예상 비용 {step.estimated_cost:,.0f}"
+            if step.rows is not None:
+                line += f" | 실제 종목 {step.rows:,}"
+                if step.survivors is not None:
+                    line += f" → {step.survivors:,}"
+            lines.append(line)
+        return "\n".join(lines)
+
+    def execute(
+        self,
+        columns: dict[str, np.ndarray],
+        evaluate: Callable[[str, IndicatorRequest, Optional[np.ndarray]], np.ndarray]
+    ) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+        """
+        계획대로 조건식을 평가합니다.
+
+        지표 값이 없는(NaN: 거래 정지, 이력 부족 등) 종목은 그 지표를 쓰는 조건을 만족하지 않습니다.
+        (NaN은 != 나 not 비교에서 참이 되므로 조건식 결과와 별도로 제외)
+
+        Args:
+            columns: 기준일 가격 변수와 그 _rank/_percentile/_zscore 변수 (시장 전체 종목 벡터)
+            evaluate: (지표 변수명, 지표, 종목 위치 또는 None=시장 전체) → 해당 종목들의 지표 값
+
+        Returns:
+            tuple: (종목별 조건 만족 여부, 지표 변수명 → 종목별 지표 값. 계산하지 않은 종목은 NaN)
+        """
+        mask = np.ones(self.n_stocks, dtype=bool)
+        values = {}
+        steps = iter(self.steps)
+
+        def compute(name: str, rows: Optional[np.ndarray]):
+            step = next(steps)
+            request = self.requests[name]
+            if rows is not None and request.precomputed:
+                # 시장 전체 값을 조회해 후보 위치만 사용 (잘라 다시 계산하지 않음)
+                rows = None
+            step.rows = self.n_stocks if rows is None else len(rows)
+            full = np.full(self.n_stocks, np.nan)
+            if rows is None:
+                full[:] = evaluate(name, request, None)
+            elif len(rows):
+                full[rows] = evaluate(name, request, rows)
+            values[name] = full
+
+        def apply(condition: CompiledFormula, variables: dict[str, np.ndarray], indicators: set = frozenset()):
+            nonlocal mask
+            step = next(steps)
+            step.rows = int(mask.sum())
+            mask &= condition.evaluate(variables)
+            for name in indicators:
+                mask &= ~np.isnan(values[name])
+            step.survivors = int(mask.sum())
+
+        for condition in self.column_filters:
+            apply(condition, columns)
+        for name in sorted(self.full_market):
+            compute(name, None)
+        variables = {**columns, **cross_section_variables({name: values[name] for name in self.full_market})}
+        for condition, needed in self.indicator_filters:
+            for name in needed:
+                compute(name, self._candidates(mask))
+            apply(condition, {**variables, **values}, _indicator_names(condition, self.requests)[0])
+        # 조건에 쓰이지 않은 지표는 결과에 값을 싣기 위해 최종 종목만 계산
+        for name in self.requests:
+            if name not in values:
+                compute(name, self._candidates(mask))
+        return mask, values
+
+    def _candidates(self, mask: np.ndarray) -> Optional[np.ndarray]:
+        """남은 종목 위치 (모든 종목이 남았으면 None = 시장 전체)"""
+        return None if mask.all() else np.flatnonzero(mask)
+
+
+def _indicator_names(condition: CompiledFormula, requests: dict[str, IndicatorRequest]) -> tuple[set, set]:
+    """조건식이 쓰는 (지표 변수, 시장 대비 값을 쓰는 지표 변수)"""
+    direct, ranked = set(), set()
+    for name in condition.names:
+        if name in requests:
+            direct.add(name)
+            continue
+        for kind in CROSS_SECTION_TRANSFORMS:
+            base = name[:-len(kind) - 1]
+            if name.endswith(f"_{kind}") and base in requests:
+                ranked.add(base)
+    return direct | ranked, ranked
+
+
+def _compute_step(name: str, request: IndicatorRequest, scope: str, rows: float, n_stocks: int) -> PlanStep:
+    """지표 계산 단계 (적재 시점 값으로 조회하는 지표는 시장 전체 조회)"""
+    if request.precomputed:
+        scope, rows = "시장 전체 조회", n_stocks
+    return PlanStep("compute", f"{name} = {request.fn}{request.params or ''} ({scope})", rows, request.cost(rows))
+
+
+def plan_screen(formula: CompiledFormula, requests: dict[str, IndicatorRequest], n_stocks: int) -> ScreenPlan:
+    """
+    조건식의 실행 계획을 세웁니다.
+
+    1. 지표를 쓰지 않는 조건(가격 조건)을 먼저 적용해 후보 종목을 줄입니다.
+    2. 시장 대비 값(_rank 등)을 쓰는 지표는 시장 전체 종목으로 계산합니다.
+    3. 나머지 조건은 새로 계산할 지표의 예상 비용이 싼 순서로, 남은 후보 종목에 대해서만 지표를 계산하며 적용합니다.
+
+    and로 묶이지 않은 조건식(or 등)은 조건 하나로 취급하므로 필요한 지표를 모두 계산한 뒤 평가합니다.
+
+    Args:
+        formula: 검사를 마친 조건식
+        requests: 지표 변수명 → 지표
+        n_stocks: 시장 전체 종목 수
+
+    Returns:
+        ScreenPlan: 실행 계획
+    """
+    plan = ScreenPlan(formula=formula, requests=requests, n_stocks=n_stocks)
+    pending = []
+    for condition in formula.conjuncts():
+        names, ranked = _indicator_names(condition, requests)
+        plan.full_market |= ranked
+        if names:
+            pending.append((condition, names))
+        else:
+            plan.column_filters.append(condition)
+
+    rows = float(n_stocks)
+    for condition in plan.column_filters:
+        plan.steps.append(PlanStep("filter", condition.formula, rows, rows * condition.size))
+        rows *= DEFAULT_SELECTIVITY
+    for name in sorted(plan.full_market):
+        plan.steps.append(_compute_step(name, requests[name], "시장 전체", n_stocks, n_stocks))
+
+    computed = set(plan.full_market)
+    while pending:
+        # 새로 계산할 지표 비용이 가장 싼 조건부터
+        condition, names = min(pending, key=lambda item: sum(requests[name].cost(rows) for name in item[1] - computed))
+        pending.remove((condition, names))
+        needed = sorted(names - computed)
+        for name in needed:
+            plan.steps.append(_compute_step(name, requests[name], "후보 종목", rows, n_stocks))
+        computed |= names
+        plan.indicator_filters.append((condition, needed))
+        plan.steps.append(PlanStep("filter", condition.formula, rows, rows * condition.size))
+        rows *= DEFAULT_SELECTIVITY
+
+    for name in requests:
+        if name not in computed:
+            plan.steps.append(_compute_step(name, requests[name], "최종 종목", rows, n_stocks))
+    return plan
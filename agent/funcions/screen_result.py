@@ -0,0 +1,116 @@
+
+import hashlib
+import json
+from dataclasses import dataclass, field as dataclass_field
+from typing import Any, Hashable, Optional
+import numpy as np
+from funcions.stock_bitset import StockBitset
+
+# 스크리닝 결과를 보관하고 페이지 단위로 잘라 간결한 JSON으로 내보냅니다.
+# 결과가 크면 전체 목록 대신 핸들과 첫 페이지만 반환하고, 나머지는 핸들로 이어서 조회합니다.
+
+# limit를 주지 않았을 때 한 번에 반환하는 최대 항목 수 (넘으면 핸들 + 첫 페이지)
+PAGE_SIZE = 50
+
+
+@dataclass
+class ScreenResult:
+    """조건을 만족한 종목 목록과 정렬에 쓸 값"""
+    items: list  # 출력 항목 (종목코드 또는 종목별 값 딕셔너리), 종목 순서
+    columns: dict[str, np.ndarray] = dataclass_field(default_factory=dict)  # 정렬 기준 변수명 → items 순서의 값
+    plan: Optional[str] = None  # explain 요청 시 실행 계획
+    selection: Optional[StockBitset] = None  # 조건을 만족한 종목의 비트셋 (결과끼리 집합 연산용)
+
+    @property
+    def nbytes(self) -> int:
+        """캐시 크기 계산용 대략적인 크기 (바이트)"""
+        return len(json.dumps(self.items, ensure_ascii=False, default=str).encode("utf-8")) + sum(
+            values.nbytes for values in self.columns.values()) + (self.selection.nbytes if self.selection is not None else 0)
+
+    def order(self, sort_by: str = None) -> np.ndarray:
+        """
+        정렬 순서를 반환합니다. 값이 없는(NaN) 항목은 항상 뒤에 둡니다.
+
+        Args:
+            sort_by: 정렬 기준 변수명. 앞에 "-"를 붙이면 내림차순 (예: "-indicator_value"). 생략하면 종목 순서
+
+        Raises:
+            ValueError: 정렬할 수 없는 변수명
+        """
+        if sort_by is None:
+            return np.arange(len(self.items))
+        name = sort_by.lstrip("-")
+        if name not in self.columns:
+            raise ValueError(f"정렬할 수 없는 변수입니다: {name} (사용 가능: {', '.join(self.columns)})")
+        values = self.columns[name]
+        return np.argsort(-values if sort_by.startswith("-") else values, kind="stable")
+
+
+def screen_handle(key: Hashable) -> str:
+    """캐시 키로부터 결과 핸들을 만듭니다. 같은 질문은 같은 핸들입니다."""
+    return "screen-" + hashlib.sha1(repr(key).encode("utf-8")).hexdigest()[:12]
+
+
+def dumps(value: Any) -> str:
+    """들여쓰기 없는 간결한 JSON"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
+def format_page(
+    result: ScreenResult,
+    handle: str,
+    offset: int = 0,
+    limit: int = None,
+    sort_by: str = None,
+    count_only: bool = False,
+    paged: bool = False
+) -> str:
+    """
+    스크리닝 결과를 페이지 JSON으로 만듭니다.
+
+    - count_only: {"total": N}
+    - 페이지 인자 없이 결과가 PAGE_SIZE 이하: 항목 목록 그대로
+    - 그 외: {"total", "offset", "limit", "items", "next_offset", "handle"} (next_offset이 null이면 마지막 페이지)
+    explain으로 실행 계획이 있으면 {"plan": ..., "result": 위 결과}로 감쌉니다.
+
+    Args:
+        result: 스크리닝 결과
+        handle: 결과 핸들 (다음 페이지 조회용)
+        offset: 건너뛸 항목 수
+        limit: 최대 항목 수 (1 이상, 생략하면 PAGE_SIZE)
+        sort_by: 정렬 기준 (ScreenResult.order)
+        count_only: 개수만 반환
+        paged: 결과 크기와 관계없이 페이지 형식으로 반환 (다음 페이지 조회)
+
+    Returns:
+        str: 간결한 JSON 문자열
+
+    Raises:
+        ValueError: 정렬할 수 없는 변수명, 음수 offset 또는 1 미만 limit
+    """
+    total = len(result.items)
+    if count_only:
+        body = {"total": total}
+    else:
+        # limit=0이면 next_offset이 offset 그대로라 다음 페이지 조회가 끝나지 않음
+        if offset < 0:
+            raise ValueError("offset은 0 이상이어야 합니다.")
+        if limit is not None and limit < 1:
+            raise ValueError("limit은 1 이상이어야 합니다.")
+        order = result.order(sort_by)
+        if not paged and limit is None and offset == 0 and total <= PAGE_SIZE:
+            body = [result.items[i] for i in order]
+        else:
+            limit = PAGE_SIZE if limit is None else limit
+            stop = min(offset + limit, total)
+            body = {
+                "total": total,
+                "offset": offset,
+                "limit": limit,
+                "items": [result.items[i] for i in order[offset:stop]],
+                "next_offset": stop if stop < total else None,
+                "handle": handle,
+            }
+    if result.plan is not None:
+        body = {"plan": result.plan, "result": body}
+    return dumps(body)
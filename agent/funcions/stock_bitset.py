@@ -0,0 +1,139 @@
+
+from typing import Iterable, Sequence
+import numpy as np
+
+# 종목 선택을 종목 목록(universe) 위치 기준의 고정 폭 비트셋(uint64 워드 배열)으로 표현합니다.
+# 합집합/교집합/차집합/XOR은 워드 단위 NumPy 비트 연산 한 번이고,
+# 종목코드/종목명으로의 변환은 결과를 출력할 때만 합니다.
+
+WORD_BITS = 64
+
+# 바이트 값 → 켜진 비트 수
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _n_words(n_bits: int) -> int:
+    return (n_bits + WORD_BITS - 1) // WORD_BITS
+
+
+class StockBitset:
+    """종목 목록 위치 기준 비트셋. 같은 종목 목록의 비트셋끼리만 집합 연산을 할 수 있습니다."""
+
+    __slots__ = ("universe", "words")
+
+    def __init__(self, universe: Sequence[str], words: np.ndarray):
+        self.universe = universe  # 비트 위치 순서대로의 종목코드
+        self.words = words  # uint64 워드 배열 (비트 i = 종목 i, 마지막 워드의 남는 비트는 항상 0)
+
+    @classmethod
+    def empty(cls, universe: Sequence[str]) -> "StockBitset":
+        """아무 종목도 선택하지 않은 비트셋"""
+        return cls(universe, np.zeros(_n_words(len(universe)), dtype=np.uint64))
+
+    @classmethod
+    def from_mask(cls, universe: Sequence[str], mask: np.ndarray) -> "StockBitset":
+        """
+        종목별 불리언 마스크(스크리닝 결과)로부터 비트셋을 만듭니다.
+
+        Args:
+            universe: 종목 목록
+            mask: universe 순서의 종목별 선택 여부
+
+        Returns:
+            StockBitset: 마스크가 참인 종목의 비트셋
+        """
+        mask = np.asarray(mask, dtype=bool)
+        if len(mask) != len(universe):
+            raise ValueError(f"마스크 길이({len(mask)})가 종목 수({len(universe)})와 다릅니다.")
+        packed = np.packbits(mask, bitorder="little")
+        buffer = np.zeros(_n_words(len(universe)) * (WORD_BITS // 8), dtype=np.uint8)
+        buffer[:len(packed)] = packed
+        return cls(universe, buffer.view(np.uint64))
+
+    @classmethod
+    def from_codes(cls, universe: Sequence[str], codes: Iterable[str], code_index: dict[str, int] = None) -> "StockBitset":
+        """
+        종목코드 목록으로부터 비트셋을 만듭니다. universe에 없는 종목코드는 무시합니다.
+
+        Args:
+            universe: 종목 목록
+            codes: 선택할 종목코드
+            code_index: 종목코드 → universe 위치 (생략하면 universe로부터 만듦)
+
+        Returns:
+            StockBitset: 종목코드의 비트셋
+        """
+        if code_index is None:
+            code_index = {code: i for i, code in enumerate(universe)}
+        mask = np.zeros(len(universe), dtype=bool)
+        mask[[code_index[code] for code in codes if code in code_index]] = True
+        return cls.from_mask(universe, mask)
+
+    def to_mask(self) -> np.ndarray:
+        """universe 순서의 종목별 선택 여부"""
+        return np.unpackbits(self.words.view(np.uint8), count=len(self.universe), bitorder="little").astype(bool)
+
+    def positions(self) -> np.ndarray:
+        """선택된 종목의 universe 위치 (오름차순)"""
+        return np.flatnonzero(self.to_mask())
+
+    def to_codes(self) -> list[str]:
+        """선택된 종목코드 (universe 순서)"""
+        return [self.universe[i] for i in self.positions()]
+
+    def count(self) -> int:
+        """선택된 종목 수"""
+        return int(_POPCOUNT[self.words.view(np.uint8)].sum(dtype=np.int64))
+
+    def _check(self, other: "StockBitset"):
+        if self.universe is not other.universe and list(self.universe) != list(other.universe):
+            raise ValueError("종목 목록이 다른 비트셋끼리는 집합 연산을 할 수 없습니다.")
+
+    def __or__(self, other: "StockBitset") -> "StockBitset":
+        self._check(other)
+        return StockBitset(self.universe, self.words | other.words)
+
+    def __and__(self, other: "StockBitset") -> "StockBitset":
+        self._check(other)
+        return StockBitset(self.universe, self.words & other.words)
+
+    def __sub__(self, other: "StockBitset") -> "StockBitset":
+        self._check(other)
+        return StockBitset(self.universe, self.words & ~other.words)
+
+    def __xor__(self, other: "StockBitset") -> "StockBitset":
+        self._check(other)
+        return StockBitset(self.universe, self.words ^ other.words)
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, StockBitset):
+            return NotImplemented
+        self._check(other)
+        return bool(np.array_equal(self.words, other.words))
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __contains__(self, code: str) -> bool:
+        try:
+            i = self.universe.index(code)
+        except ValueError:
+            return False
+        return bool((int(self.words[i // WORD_BITS]) >> (i % WORD_BITS)) & 1)
+
+    @property
+    def nbytes(self) -> int:
+        """캐시 크기 계산용 크기 (바이트)"""
+        return self.words.nbytes
+
+    def __repr__(self) -> str:
+        return f"StockBitset({self.count()}/{len(self.universe)})"
+
+
+# 집합 연산 이름 → 비트셋 연산 (여러 개는 왼쪽부터 차례로 적용)
+SET_OPERATIONS = {
+    "intersection": StockBitset.__and__,
+    "union": StockBitset.__or__,
+    "difference": StockBitset.__sub__,
+    "xor": StockBitset.__xor__,
+}
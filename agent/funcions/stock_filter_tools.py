@@ -1,5 +1,30 @@
 from typing import List, Dict
-from stock_data_models import Stock
+import numpy as np
+from stock_data_models import History, Stock
+from funcions.formula import FormulaError, compile_formula
+
+# 수식 변수명 → 거래내역 필드
+PRICE_VARIABLES = {
+    '시가': 'open_price',
+    '고가': 'high_price',
+    '저가': 'low_price',
+    '종가': 'close_price',
+    '판매량': 'volume',
+}
+
+# 비교 조건 → 조건식 (같음/다름은 부동소수점 오차 허용)
+CONDITION_TEMPLATES = {
+    '>': '({수식}) > {임계값}',
+    '<': '({수식}) < {임계값}',
+    '>=': '({수식}) >= {임계값}',
+    '≥': '({수식}) >= {임계값}',
+    '<=': '({수식}) <= {임계값}',
+    '≤': '({수식}) <= {임계값}',
+    '=': 'abs(({수식}) - {임계값}) < 1e-10',
+    '==': 'abs(({수식}) - {임계값}) < 1e-10',
+    '!=': 'abs(({수식}) - {임계값}) >= 1e-10',
+    '≠': 'abs(({수식}) - {임계값}) >= 1e-10',
+}
 
 
 class StockFilterTools:
@@ -17,38 +42,15 @@ class StockFilterTools:
             
         Returns:
             List[Stock]: 필터된 종목 리스트
+
+        Raises:
+            FormulaError: 지원하지 않는 조건 또는 잘못된 수식
         """
-        filtered_stocks = []
-        
-        for stock in 종목_리스트:
-            try:
-                if not stock.history:
-                    continue
-                
-                # 최신 데이터 사용 (리스트의 마지막 항목)
-                latest_data = stock.history[-1]
-                
-                # 수식 평가를 위한 변수 설정
-                variables = {
-                    '시가': latest_data.시가,
-                    '고가': latest_data.고가,
-                    '저가': latest_data.저가,
-                    '종가': latest_data.종가,
-                    '판매량': latest_data.판매량
-                }
-                
-                # 수식 평가
-                calculated_value = self._evaluate_expression(수식, variables)
-                
-                # 조건 평가
-                if self._evaluate_condition(calculated_value, 조건, 임계값):
-                    filtered_stocks.append(stock)
-                    
-            except Exception as e:
-                print(f"종목 {stock.종목명} 필터링 중 오류: {e}")
-                continue
-        
-        return filtered_stocks
+        # 거래이력이 있는 종목의 최신 거래내역을 필드별 벡터로 모아 수식을 한 번에 평가
+        대상_종목 = [stock for stock in 종목_리스트 if stock.거래이력]
+        variables = self._가격_벡터([self._최신_거래내역(stock) for stock in 대상_종목])
+        mask = self._조건_마스크(수식, 조건, 임계값, variables)
+        return [stock for stock, selected in zip(대상_종목, mask) if selected]
     
     def 복수_거래내역_종목_필터(
         self, 
@@ -61,85 +63,57 @@ class StockFilterTools:
         """
         두 종목 리스트를 비교하여 필터링
         
+        수식에는 비교군_시가/고가/저가/종가/판매량과 비교대상_시가/고가/저가/종가/판매량을 쓸 수 있습니다.
+        두 리스트에 모두 있는 종목의 최신 거래내역을 필드별 벡터로 모아 수식을 한 번에 평가합니다.
+        
         Args:
             비교대상_종목_리스트: 필터링할 대상 종목 리스트
             비교군_종목_리스트: 비교 기준이 되는 종목 리스트
-            수식: 평가할 수식
+            수식: 평가할 수식 (예: "비교대상_판매량 / 비교군_판매량")
             조건: 비교 조건
             임계값: 비교할 임계값
             
         Returns:
-            List[Stock]: 필터된 종목 리스트
+            List[Stock]: 필터된 종목 리스트 (비교대상 종목 리스트 순서)
+
+        Raises:
+            FormulaError: 지원하지 않는 조건 또는 잘못된 수식
         """
-        print(수식, 조건, 임계값)
+        비교군_딕트 = {stock.종목코드: stock for stock in 비교군_종목_리스트 if stock.거래이력}
+        대상_종목 = [stock for stock in 비교대상_종목_리스트 if stock.거래이력 and stock.종목코드 in 비교군_딕트]
 
-        # 비교대상 종목 리스트와 비교군 종목 리스트를 각각 딕셔너리(종목코드 기준)로 변환
-        비교대상_딕트 = {stock.종목코드: stock for stock in 비교대상_종목_리스트}
-        비교군_딕트 = {stock.종목코드: stock for stock in 비교군_종목_리스트}
+        variables = {}
+        for 접두어, 종목들 in (("비교군_", [비교군_딕트[stock.종목코드] for stock in 대상_종목]), ("비교대상_", 대상_종목)):
+            for name, values in self._가격_벡터([self._최신_거래내역(stock) for stock in 종목들]).items():
+                variables[접두어 + name] = values
 
-        # 비교대상_딕트와 비교군_딕트의 key 값이 교집합인 것만 남김
-        중복_코드_집합 = set(비교대상_딕트.keys()) & set(비교군_딕트.keys())
+        mask = self._조건_마스크(수식, 조건, 임계값, variables)
+        return [stock for stock, selected in zip(대상_종목, mask) if selected]
 
-        # 종목별 비교 매핑 생성
-        종목별_비교_매핑 = {}
-        for stock_code in 중복_코드_집합:
-            종목별_비교_매핑[stock_code] = {
-                '비교군_시가': 비교군_딕트[stock_code].history[-1].시가,
-                '비교군_고가': 비교군_딕트[stock_code].history[-1].고가,
-                '비교군_저가': 비교군_딕트[stock_code].history[-1].저가,
-                '비교군_종가': 비교군_딕트[stock_code].history[-1].종가,
-                '비교군_판매량': 비교군_딕트[stock_code].history[-1].판매량,
-                '비교대상_시가': 비교대상_딕트[stock_code].history[-1].시가,
-                '비교대상_고가': 비교대상_딕트[stock_code].history[-1].고가,
-                '비교대상_저가': 비교대상_딕트[stock_code].history[-1].저가,
-                '비교대상_종가': 비교대상_딕트[stock_code].history[-1].종가,
-                '비교대상_판매량': 비교대상_딕트[stock_code].history[-1].판매량
-            }
+    def _최신_거래내역(self, stock: Stock) -> History:
+        """가장 최근 날짜의 거래내역"""
+        return stock.거래이력[max(stock.거래이력)]
 
-        # 조건에 맞는 종목을 필터링
-        filtered_stocks = []
-        for stock in 비교대상_종목_리스트:
-            stock_code = stock.종목코드
-            if stock_code in 종목별_비교_매핑:
-                try:
-                    calculated_value = self._evaluate_expression(수식, 종목별_비교_매핑[stock_code])
-                except ZeroDivisionError:
-                    continue
-                if self._evaluate_condition(calculated_value, 조건, 임계값):
-                    filtered_stocks.append(stock)
-        
-        return filtered_stocks
-    
+    def _가격_벡터(self, 거래내역_리스트: List[History]) -> Dict[str, np.ndarray]:
+        """거래내역 리스트 → 수식 변수명(시가/고가/저가/종가/판매량) → 종목 순서의 값 벡터"""
+        return {
+            name: np.array([getattr(history, field) for history in 거래내역_리스트], dtype=float)
+            for name, field in PRICE_VARIABLES.items()
+        }
 
-    
-    def _evaluate_condition(self, value: float, 조건: str, 임계값: float) -> bool:
+    def _조건_마스크(self, 수식: str, 조건: str, 임계값: float, variables: Dict[str, np.ndarray]) -> np.ndarray:
         """
-        조건 평가
+        "수식 조건 임계값"을 조건식 하나로 컴파일해 모든 종목에 대해 한 번에 평가합니다.
+        
+        0으로 나눈 종목은 조건을 만족하지 않습니다.
         
-        Args:
-            value: 계산된 값
-            조건: 비교 조건
-            임계값: 비교할 임계값
-            
         Returns:
-            bool: 조건 만족 여부
+            np.ndarray: 종목별 조건 만족 여부
+
+        Raises:
+            FormulaError: 지원하지 않는 조건 또는 잘못된 수식 (결과 없음과 구분되도록 빈 결과 대신 예외)
         """
-        try:
-            if 조건 == '>':
-                return value > 임계값
-            elif 조건 == '<':
-                return value < 임계값
-            elif 조건 == '>=' or 조건 == '≥':
-                return value >= 임계값
-            elif 조건 == '<=' or 조건 == '≤':
-                return value <= 임계값
-            elif 조건 == '=' or 조건 == '==':
-                return abs(value - 임계값) < 1e-10  # 부동소수점 비교
-            elif 조건 == '!=' or 조건 == '≠':
-                return abs(value - 임계값) >= 1e-10
-            else:
-                raise ValueError(f"지원하지 않는 조건: {조건}")
-                
-        except Exception as e:
-            print(f"조건 평가 중 오류: {e}")
-            return False 
\ No newline at end of file
+        if 조건 not in CONDITION_TEMPLATES:
+            raise FormulaError(f"지원하지 않는 조건입니다: {조건} (사용 가능: {', '.join(CONDITION_TEMPLATES)})")
+        compiled = compile_formula(CONDITION_TEMPLATES[조건].format(수식=수식, 임계값=float(임계값)), frozenset(variables))
+        return compiled.evaluate(variables)
@@ -1,94 +1,90 @@
-from typing import List
+import operator
+from typing import Callable, List, Union
 from stock_data_models import Stock
+from funcions.stock_bitset import StockBitset
+
+# 종목 선택: Stock 리스트 또는 스크리닝이 만든 비트셋
+StockSelection = Union[List[Stock], StockBitset]
 
 
 class StockSetTools:
-    """주식 데이터 집합 연산 도구"""
-    
-    def 종목_합집합(self, 종목_리스트1: List[Stock], 종목_리스트2: List[Stock]) -> List[Stock]:
+    """주식 데이터 집합 연산 도구
+
+    한쪽이라도 스크리닝이 만든 비트셋이면 종목 목록 위치 기준 비트셋의 워드 단위 비트 연산으로 하고 결과도 비트셋입니다
+    (여러 번 이어서 연산할 때 변환 없음). Stock 리스트는 비트셋의 종목 목록 기준으로 바꿔 연산합니다(종목 목록에 없는 종목은 무시).
+    Stock 리스트끼리는 비트셋을 만들지 않고 종목코드 집합 연산으로 합니다.
+    """
+
+    def _연산(self, 종목_리스트1: StockSelection, 종목_리스트2: StockSelection,
+             op: Callable[[StockBitset, StockBitset], StockBitset], set_op: Callable[[set, set], set]) -> StockSelection:
+        if isinstance(종목_리스트1, StockBitset) or isinstance(종목_리스트2, StockBitset):
+            universe = (종목_리스트1 if isinstance(종목_리스트1, StockBitset) else 종목_리스트2).universe
+            return op(self._비트셋(종목_리스트1, universe), self._비트셋(종목_리스트2, universe))
+
+        # 리스트1, 리스트2 순으로 처음 나온 종목 순서 (결과도 이 순서)
+        종목_dict = {}
+        for stock in 종목_리스트1:
+            종목_dict[stock.종목코드] = stock
+        for stock in 종목_리스트2:
+            종목_dict.setdefault(stock.종목코드, stock)
+        결과_코드 = set_op({stock.종목코드 for stock in 종목_리스트1}, {stock.종목코드 for stock in 종목_리스트2})
+        return [stock for code, stock in 종목_dict.items() if code in 결과_코드]
+
+    @staticmethod
+    def _비트셋(종목_리스트: StockSelection, universe) -> StockBitset:
+        """Stock 리스트를 universe 기준 비트셋으로 바꿉니다. (비트셋은 그대로)"""
+        if isinstance(종목_리스트, StockBitset):
+            return 종목_리스트
+        return StockBitset.from_codes(universe, (stock.종목코드 for stock in 종목_리스트))
+
+    def 종목_합집합(self, 종목_리스트1: StockSelection, 종목_리스트2: StockSelection) -> StockSelection:
         """
         두 종목 리스트의 합집합
-        
+
         Args:
-            종목_리스트1: 첫 번째 종목 리스트
-            종목_리스트2: 두 번째 종목 리스트
-            
+            종목_리스트1: 첫 번째 종목 리스트 (또는 비트셋)
+            종목_리스트2: 두 번째 종목 리스트 (또는 비트셋)
+
         Returns:
-            List[Stock]: 합집합 종목 리스트
+            List[Stock]: 합집합 종목 리스트 (한쪽이라도 비트셋이면 비트셋)
         """
-        # 종목코드를 기준으로 중복 제거
-        종목_dict = {}
-        
-        for stock in 종목_리스트1:
-            종목_dict[stock.종목코드] = stock
-        
-        for stock in 종목_리스트2:
-            if stock.종목코드 not in 종목_dict:
-                종목_dict[stock.종목코드] = stock
-        
-        return list(종목_dict.values())
-    
-    def 종목_교집합(self, 종목_리스트1: List[Stock], 종목_리스트2: List[Stock]) -> List[Stock]:
+        return self._연산(종목_리스트1, 종목_리스트2, StockBitset.__or__, operator.or_)
+
+    def 종목_교집합(self, 종목_리스트1: StockSelection, 종목_리스트2: StockSelection) -> StockSelection:
         """
         두 종목 리스트의 교집합
-        
+
         Args:
-            종목_리스트1: 첫 번째 종목 리스트
-            종목_리스트2: 두 번째 종목 리스트
-            
+            종목_리스트1: 첫 번째 종목 리스트 (또는 비트셋)
+            종목_리스트2: 두 번째 종목 리스트 (또는 비트셋)
+
         Returns:
-            List[Stock]: 교집합 종목 리스트
+            List[Stock]: 교집합 종목 리스트 (한쪽이라도 비트셋이면 비트셋)
         """
-        코드_세트1 = {stock.종목코드 for stock in 종목_리스트1}
-        코드_세트2 = {stock.종목코드 for stock in 종목_리스트2}
-        
-        교집합_코드 = 코드_세트1 & 코드_세트2
-        
-        # 첫 번째 리스트에서 교집합에 해당하는 종목들 반환
-        return [stock for stock in 종목_리스트1 if stock.종목코드 in 교집합_코드]
-    
-    def 종목_차집합(self, 종목_리스트1: List[Stock], 종목_리스트2: List[Stock]) -> List[Stock]:
+        return self._연산(종목_리스트1, 종목_리스트2, StockBitset.__and__, operator.and_)
+
+    def 종목_차집합(self, 종목_리스트1: StockSelection, 종목_리스트2: StockSelection) -> StockSelection:
         """
         두 종목 리스트의 차집합 (리스트1 - 리스트2)
-        
+
         Args:
-            종목_리스트1: 첫 번째 종목 리스트
-            종목_리스트2: 두 번째 종목 리스트
-            
+            종목_리스트1: 첫 번째 종목 리스트 (또는 비트셋)
+            종목_리스트2: 두 번째 종목 리스트 (또는 비트셋)
+
         Returns:
-            List[Stock]: 차집합 종목 리스트
+            List[Stock]: 차집합 종목 리스트 (한쪽이라도 비트셋이면 비트셋)
         """
-        코드_세트2 = {stock.종목코드 for stock in 종목_리스트2}
-        
-        return [stock for stock in 종목_리스트1 if stock.종목코드 not in 코드_세트2]
-    
-    def 종목_XOR집합(self, 종목_리스트1: List[Stock], 종목_리스트2: List[Stock]) -> List[Stock]:
+        return self._연산(종목_리스트1, 종목_리스트2, StockBitset.__sub__, operator.sub)
+
+    def 종목_XOR집합(self, 종목_리스트1: StockSelection, 종목_리스트2: StockSelection) -> StockSelection:
         """
         두 종목 리스트의 XOR집합 (대칭 차집합)
-        
+
         Args:
-            종목_리스트1: 첫 번째 종목 리스트
-            종목_리스트2: 두 번째 종목 리스트
-            
+            종목_리스트1: 첫 번째 종목 리스트 (또는 비트셋)
+            종목_리스트2: 두 번째 종목 리스트 (또는 비트셋)
+
         Returns:
-            List[Stock]: XOR집합 종목 리스트
+            List[Stock]: XOR집합 종목 리스트 (한쪽이라도 비트셋이면 비트셋)
         """
-        코드_세트1 = {stock.종목코드 for stock in 종목_리스트1}
-        코드_세트2 = {stock.종목코드 for stock in 종목_리스트2}
-        
-        # XOR: (A - B) ∪ (B - A)
-        xor_코드 = (코드_세트1 - 코드_세트2) | (코드_세트2 - 코드_세트1)
-        
-        xor_종목 = []
-        
-        # 첫 번째 리스트에서 XOR에 해당하는 종목들
-        for stock in 종목_리스트1:
-            if stock.종목코드 in xor_코드:
-                xor_종목.append(stock)
-        
-        # 두 번째 리스트에서 XOR에 해당하는 종목들 (첫 번째에 없는 것만)
-        for stock in 종목_리스트2:
-            if stock.종목코드 in xor_코드 and stock.종목코드 not in 코드_세트1:
-                xor_종목.append(stock)
-        
-        return xor_종목 
\ No newline at end of file
+        return self._연산(종목_리스트1, 종목_리스트2, StockBitset.__xor__, operator.xor)
@@ -0,0 +1,118 @@
+
+from dataclasses import replace
+from stock_data_models import MarketWindow
+from funcions.candlestick import bullish, bearish, lagged
+from funcions.column_buffer import append_column
+import numpy as np
+
+# 종목별 불리언 시계열(양봉, 음봉, 종가 상승, 거래량 증가)의 연속 길이(run length)를 관리합니다.
+# 저장소 적재 시점에 (종목 × 거래일) 연속 길이 행렬을 만들고 새 거래일마다 한 열씩 이어 붙이므로
+# "음봉 연속 며칠째" 같은 질문은 행렬 한 칸 조회로 끝납니다.
+# 연속 길이는 거래일 수를 넘지 않으므로 int32로 보관합니다 (int64의 절반 크기).
+
+# 연속 길이 행렬 자료형
+STREAK_DTYPE = np.int32
+
+
+def close_rise(window: MarketWindow) -> np.ndarray:
+    """종가 상승 (당일 종가 > 전 거래일 종가)"""
+    return window.field("close_price") > lagged(window, "close_price", 1)
+
+
+def volume_increase(window: MarketWindow) -> np.ndarray:
+    """거래량 증가 (당일 거래량 > 전 거래일 거래량)"""
+    return window.field("volume") > lagged(window, "volume", 1)
+
+
+# 연속 길이를 관리하는 조건 이름 → (종목 × 구간 거래일) 불리언 행렬 함수
+STREAK_CONDITIONS = {
+    "up_candle": bullish,
+    "down_candle": bearish,
+    "close_rise": close_rise,
+    "volume_increase": volume_increase,
+}
+
+
+def run_lengths(condition: np.ndarray) -> np.ndarray:
+    """
+    불리언 행렬의 각 칸에서 끝나는 연속 True 길이를 계산합니다.
+
+    Args:
+        condition (np.ndarray): (종목 × 거래일) 불리언 행렬
+
+    Returns:
+        np.ndarray: (종목 × 거래일) 연속 길이 (False 칸은 0, STREAK_DTYPE)
+    """
+    days = np.arange(condition.shape[1], dtype=STREAK_DTYPE)
+    last_false = np.maximum.accumulate(np.where(condition, -1, days), axis=1)
+    return days - last_false
+
+
+class StreakIndex:
+    """조건별 (종목 × 거래일) 연속 길이 행렬"""
+
+    def __init__(self, lengths: dict[str, np.ndarray]):
+        self.lengths = lengths
+
+    def append_day(self, window: MarketWindow):
+        """
+        저장소에 추가된 마지막 거래일의 연속 길이를 이어 붙입니다. 종목당 분할 상환 O(1)입니다.
+
+        Args:
+            window (MarketWindow): 저장소 전체 구간 (마지막 거래일까지 포함)
+        """
+        last_day = replace(window, start=window.stop - 1)
+        for name, condition in STREAK_CONDITIONS.items():
+            lengths = self.lengths[name]
+            previous = lengths[:, -1] if lengths.shape[1] else np.zeros(len(lengths), dtype=lengths.dtype)
+            column = np.where(condition(last_day)[:, 0], previous + 1, 0).astype(STREAK_DTYPE)
+            self.lengths[name] = append_column(lengths, column)
+
+    def current(self, name: str, day: int) -> np.ndarray:
+        """
+        day 거래일까지 이어진 종목별 연속 길이를 반환합니다.
+
+        Args:
+            name: STREAK_CONDITIONS의 조건 이름
+            day: 거래일 위치
+
+        Returns:
+            np.ndarray: 종목별 연속 길이
+        """
+        return self.lengths[name][:, day]
+
+    def at_least(self, name: str, day: int, min_length: int) -> np.ndarray:
+        """day 거래일에 연속 길이가 min_length 이상인 종목 여부를 반환합니다."""
+        return self.lengths[name][:, day] >= min_length
+
+    def longest(self, name: str, start: int, stop: int) -> np.ndarray:
+        """
+        [start, stop) 거래일 구간 안에서의 종목별 최장 연속 길이를 반환합니다.
+
+        구간 시작 전부터 이어진 연속은 구간 안의 일수만 셉니다.
+
+        Args:
+            name: STREAK_CONDITIONS의 조건 이름
+            start: 첫 거래일 위치
+            stop: 끝 거래일 위치 (미포함)
+
+        Returns:
+            np.ndarray: 종목별 최장 연속 길이
+        """
+        lengths = self.lengths[name][:, start:stop]
+        if lengths.shape[1] == 0:
+            return np.zeros(len(lengths), dtype=STREAK_DTYPE)
+        return np.minimum(lengths, np.arange(1, lengths.shape[1] + 1, dtype=STREAK_DTYPE)).max(axis=1)
+
+
+def build_streak_index(window: MarketWindow) -> StreakIndex:
+    """
+    저장소 전체 이력의 조건별 연속 길이 행렬을 만듭니다.
+
+    Args:
+        window (MarketWindow): 저장소 전체 구간
+
+    Returns:
+        StreakIndex: 연속 길이 색인
+    """
+    return StreakIndex({name: run_lengths(condition(window)) for name, condition in STREAK_CONDITIONS.items()})
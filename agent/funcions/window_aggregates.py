@@ -0,0 +1,134 @@
+
+import numpy as np
+from stock_data_models import MarketWindow
+from funcions.rolling import rolling_sum
+
+# 최근 N거래일 구간의 종목별 집계값을 시장 전체에 대해 한 번에 계산합니다.
+# 구간은 저장소 거래일 기준이며, 거래가 없는 칸(NaN)은 집계에서 뺍니다. 구간에 거래가 전혀 없으면 NaN입니다.
+# 합/평균은 저장소 누적합이 있는 필드면 누적값의 차이 한 번으로 구합니다.
+
+
+def _previous_value(window: MarketWindow, field: str) -> np.ndarray:
+    """구간 첫날 직전 거래일 값 (직전 거래일이 없으면 NaN)"""
+    if window.start == 0:
+        return np.full(len(window.stock_codes), np.nan)
+    return window.arrays[field][:, window.start - 1]
+
+
+def _last_valid(matrix: np.ndarray) -> np.ndarray:
+    """종목별 마지막 유효 값 (유효 값이 없으면 NaN)"""
+    valid = ~np.isnan(matrix)
+    last = matrix.shape[1] - 1 - np.argmax(valid[:, ::-1], axis=1)
+    return np.where(valid.any(axis=1), matrix[np.arange(len(matrix)), last], np.nan)
+
+
+def _first_valid(matrix: np.ndarray) -> np.ndarray:
+    """종목별 첫 유효 값 (유효 값이 없으면 NaN)"""
+    valid = ~np.isnan(matrix)
+    first = np.argmax(valid, axis=1)
+    return np.where(valid.any(axis=1), matrix[np.arange(len(matrix)), first], np.nan)
+
+
+def window_return(window: MarketWindow, field: str = "close_price") -> np.ndarray:
+    """
+    구간 등락률(%). (구간 마지막 종가 / 구간 직전 거래일 종가 - 1) × 100
+
+    직전 거래일에 거래가 없었거나 저장소 첫 거래일부터의 구간이면 구간 첫 종가를 기준으로 합니다.
+    """
+    values = window.field(field)
+    if not values.shape[1]:
+        return np.full(len(values), np.nan)
+    base = _previous_value(window, field)
+    base = np.where(np.isnan(base), _first_valid(values), base)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(base > 0, (_last_valid(values) / base - 1) * 100, np.nan)
+
+
+def window_max(window: MarketWindow, field: str = "close_price") -> np.ndarray:
+    """구간 최댓값 (예: field="high_price"면 N일 최고가)"""
+    matrix = window.field(field)
+    valid = (~np.isnan(matrix)).any(axis=1)
+    if not matrix.shape[1]:
+        return np.full(len(matrix), np.nan)
+    return np.where(valid, np.max(np.where(np.isnan(matrix), -np.inf, matrix), axis=1), np.nan)
+
+
+def window_min(window: MarketWindow, field: str = "close_price") -> np.ndarray:
+    """구간 최솟값 (예: field="low_price"면 N일 최저가)"""
+    matrix = window.field(field)
+    valid = (~np.isnan(matrix)).any(axis=1)
+    if not matrix.shape[1]:
+        return np.full(len(matrix), np.nan)
+    return np.where(valid, np.min(np.where(np.isnan(matrix), np.inf, matrix), axis=1), np.nan)
+
+
+def _sum_and_count(window: MarketWindow, field: str) -> tuple[np.ndarray, np.ndarray]:
+    """구간 합과 유효 봉 개수"""
+    period = window.stop - window.start
+    if field in window.prefix_sums and period > 0:
+        # 누적값 차이 한 번 (구간 마지막 날에서 끝나는 period일 구간)
+        sums, counts = rolling_sum(window.prefix_sums[field], period, window.stop - 1, window.stop)
+        return sums[:, 0], counts[:, 0]
+    matrix = window.field(field)
+    return np.nansum(matrix, axis=1), (~np.isnan(matrix)).sum(axis=1)
+
+
+def window_sum(window: MarketWindow, field: str = "volume") -> np.ndarray:
+    """구간 합계 (예: field="volume"이면 N일 누적 거래량)"""
+    sums, counts = _sum_and_count(window, field)
+    return np.where(counts > 0, sums, np.nan)
+
+
+def window_mean(window: MarketWindow, field: str = "close_price") -> np.ndarray:
+    """구간 평균 (거래가 있는 날만)"""
+    sums, counts = _sum_and_count(window, field)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+
+def window_up_days(window: MarketWindow, field: str = "close_price") -> np.ndarray:
+    """
+    구간 상승일 수. 종가가 전 거래일 종가보다 높은 날의 수 (구간 첫날은 구간 직전 거래일과 비교)
+
+    그날이나 전 거래일에 거래가 없었으면 세지 않습니다.
+    """
+    values = window.field(field)
+    previous = np.concatenate([_previous_value(window, field)[:, None], values[:, :-1]], axis=1)
+    with np.errstate(invalid="ignore"):
+        up = values > previous
+    return np.where((~np.isnan(values)).any(axis=1), up.sum(axis=1), np.nan)
+
+
+# 집계 이름 → (집계 함수, 기본 필드)
+WINDOW_AGGREGATES = {
+    "return": (window_return, "close_price"),
+    "max": (window_max, "close_price"),
+    "min": (window_min, "close_price"),
+    "sum": (window_sum, "volume"),
+    "mean": (window_mean, "close_price"),
+    "up_days": (window_up_days, "close_price"),
+}
+
+
+def window_aggregate(window: MarketWindow, aggregate: str, field: str = None) -> np.ndarray:
+    """
+    구간(window.start ~ window.stop)의 종목별 집계값을 계산합니다.
+
+    Args:
+        window: 집계 구간 (보통 database.get_trading_window로 만든 최근 N거래일)
+        aggregate: 집계 이름 (WINDOW_AGGREGATES: return, max, min, sum, mean, up_days)
+        field: 집계할 가격 필드 (생략하면 집계별 기본 필드. sum은 거래량, 나머지는 종가)
+
+    Returns:
+        np.ndarray: 종목별 집계값 (구간에 거래가 없으면 NaN)
+
+    Raises:
+        ValueError: 알 수 없는 집계 이름 또는 필드
+    """
+    if aggregate not in WINDOW_AGGREGATES:
+        raise ValueError(f"알 수 없는 구간 집계입니다: {aggregate} (사용 가능: {', '.join(WINDOW_AGGREGATES)})")
+    fn, default_field = WINDOW_AGGREGATES[aggregate]
+    field = field or default_field
+    if field not in window.arrays:
+        raise ValueError(f"알 수 없는 가격 필드입니다: {field} (사용 가능: {', '.join(window.arrays)})")
+    return fn(window, field)
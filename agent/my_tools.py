@@ -6,46 +6,162 @@
 import os
 import sys
 import json
+import atexit
+from collections import OrderedDict
 from datetime import datetime
 from langchain_core.tools import tool
 import math
 import yfinance as yf
 import pandas as pd
+import numpy as np
 
 # 상위 디렉토리를 Python 경로에 추가
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from database import database   
-from funcions import indicator
+from stock_data_models import MarketWindow
+from funcions import indicator, indicator_batch
+from funcions.indicator_cache import IndicatorCache
+from funcions.indicator_graph import IndicatorEvaluator, check_params, normalize_params
+from funcions.event_index import CROSS_KINDS, query_cross_events
+from funcions.candlestick import CANDLE_PATTERNS, check_pattern_params, scan_pattern
+from funcions.streak import STREAK_CONDITIONS
+from funcions.cross_section import CROSS_SECTION_TRANSFORMS, cross_section_variables
+from funcions.formula import FORMULA_FUNCTIONS, CompiledFormula, FormulaError, compile_formula
+from funcions.parallel_screen import ParallelScreener
+from funcions.screen_planner import IndicatorRequest, plan_screen
+from funcions.screen_result import ScreenResult, format_page, screen_handle
+from funcions.stock_bitset import SET_OPERATIONS, StockBitset
+from funcions.window_aggregates import WINDOW_AGGREGATES, window_aggregate
+from funcions.range_screen import range_hits, range_variable_names
+
+# 지표 계산 결과 캐시 (저장소 버전이 바뀌면 자동으로 비워짐)
+indicator_cache = IndicatorCache(maxsize=4096)
+
+# 스크리닝 결과 JSON 캐시 (정규화한 질문 → 결과, 총 크기 기준으로 오래 쓰지 않은 항목부터 제거)
+screen_cache = IndicatorCache(maxsize=1024, max_bytes=64 * 1024 * 1024)
+# 결과 핸들 → screen_cache 키 (get_screen_page로 다음 페이지 조회)
+_screen_handles: OrderedDict = OrderedDict()
+
+# 작업 프로세스 수 → 병렬 지표 계산기 (parallel_workers를 준 첫 호출에서 만들고 프로세스 종료 시 정리)
+_parallel_screeners: dict[int, ParallelScreener] = {}
+
+
+def _parallel_screener(n_workers: int) -> ParallelScreener:
+    if n_workers not in _parallel_screeners:
+        _parallel_screeners[n_workers] = ParallelScreener(n_workers)
+        atexit.register(_parallel_screeners[n_workers].close)
+    return _parallel_screeners[n_workers]
+
+
+def _formula_variables(columns) -> frozenset:
+    """변수명과 각 변수명의 횡단면 변환(_rank/_percentile/_zscore) 변수명"""
+    return frozenset(columns) | frozenset(f"{name}_{kind}" for name in columns for kind in CROSS_SECTION_TRANSFORMS)
+
+
+# 스크리닝 수식에서 쓸 수 있는 기준일 가격 변수와 filter_stocks_by_indicator_auto의 변수
+_PRICE_COLUMNS = ("open_price", "high_price", "low_price", "close_price", "volume")
+SCREEN_VARIABLES = _formula_variables(("indicator_value", *_PRICE_COLUMNS))
 
 # ===== 유틸리티 함수들 =====
 
-def _evaluate_expression(수식: str, variables: dict[str, float]) -> float:
+def _indicator_start_date(market: str, indicator_start_date: str, indicator_end_date: str, lookback_days: int = None) -> str:
+    """lookback_days를 주면 indicator_end_date까지 최근 lookback_days 거래일의 첫날을 지표 구간 시작일로 사용합니다."""
+    if lookback_days is None:
+        return indicator_start_date
+    # 달력 날짜가 아닌 저장소 거래일 기준으로 지표 구간 시작일을 정함
+    window_dates = database.get_trading_window(market, indicator_end_date, lookback_days).window_dates
+    return window_dates[0] if window_dates else indicator_end_date
+
+
+def _indicator_params_error(indicator_fn: str, indicator_params: dict) -> str | None:
+    """지표 함수명과 파라미터를 검사해 잘못된 경우 오류 메시지를 반환합니다."""
+    if indicator_fn in indicator_batch.BATCH_INDICATORS:
+        try:
+            check_params(indicator_fn, indicator_params)
+        except ValueError as e:
+            return str(e)
+        return None
+    if not callable(getattr(indicator, indicator_fn, None)):
+        return f"알 수 없는 지표 함수입니다: {indicator_fn}"
+    # 종목별 참조 구현은 파라미터를 받지 않음
+    if indicator_params:
+        return f"{indicator_fn}은(는) 지표 파라미터를 받지 않습니다: {', '.join(map(str, indicator_params))}"
+    return None
+
+
+def _formula_columns(market: str, criteria_date: str, indicator_columns: dict[str, np.ndarray]) -> dict[str, np.ndarray]:
     """
-    주어진 수식을 안전하게 평가
-    
+    스크리닝 수식에 넣을 시장 전체 변수 벡터를 만듭니다.
+
     Args:
-        수식: 평가할 수식 문자열
-        variables: 변수 딕셔너리
-        
+        market: 주식 시장 구분
+        criteria_date: 기준 주가 데이터 날짜
+        indicator_columns: 지표 변수명 → 종목별 지표 값 (값이 없으면 NaN)
+
     Returns:
-        float: 계산 결과
+        dict[str, np.ndarray]: 지표 변수, 기준일 가격 변수와 각각의 _rank/_percentile/_zscore 변수
     """
-    safe_dict = {
-        '__builtins__': {},
-        'abs': abs,
-        'min': min,
-        'max': max,
-        'round': round,
-        'pow': pow,
-        **variables
-    }
-    # 수식 내의 한글 변수명을 안전하게 처리
+    columns = {**indicator_columns, **database.get_cross_section(market, criteria_date)}
+    # 날짜 기준 시장 전체 순위/백분위/표준점수 (거래가 없는 종목은 비교에서 제외)
+    columns.update(cross_section_variables({
+        **indicator_columns,
+        **database.get_cross_section(market, criteria_date, fill_value=np.nan)
+    }))
+    return columns
+
+
+def _plan_evaluator(market: str, parallel_workers: int = None):
+    """
+    실행 계획(ScreenPlan.execute)이 요청하는 지표를 계산하는 함수를 만듭니다.
+
+    시장 전체 결과는 지표 캐시에 두고, 같은 구간·같은 후보 종목의 지표는 평가기 하나로 중간 계산을 공유합니다.
+    후보 종목만 계산할 때는 지표가 읽는 과거 거래일(request.lookback())만큼의 열만 잘라 복사합니다.
+    parallel_workers가 2 이상이면 시장 전체 계산을 프로세스 풀에서 실행합니다.
+    """
+    evaluators = {}
+
+    def evaluate(name: str, request: IndicatorRequest, rows: np.ndarray) -> np.ndarray:
+        window = request.window
+        lookback = None if rows is None else request.lookback()
+        evaluator_key = (window.start, window.stop, lookback, None if rows is None else rows.tobytes())
+        if evaluator_key not in evaluators:
+            evaluators[evaluator_key] = IndicatorEvaluator(window if rows is None else window.select_rows(rows, lookback))
+        evaluator = evaluators[evaluator_key]
+        if rows is not None:
+            return evaluator.evaluate(request.fn, **request.params)
+
+        if parallel_workers is not None and parallel_workers > 1:
+            # 종목을 나눠 프로세스 풀에서 계산 (가격 행렬은 mmap으로 공유)
+            screener = _parallel_screener(parallel_workers)
+            compute = lambda: screener.evaluate(window, database.version, request.fn, request.params)
+        else:
+            compute = lambda: evaluator.evaluate(request.fn, **request.params)
+        cache_key = (request.fn, market, window.start, window.stop, tuple(sorted(request.params.items())))
+        return indicator_cache.get_or_compute(cache_key, database.version, compute)
+    return evaluate
+
+
+def _screen_page(cache_key: tuple, compute, offset: int, limit: int, sort_by: str, count_only: bool) -> str:
+    """스크리닝 결과를 캐시에서 꺼내거나 계산해 요청한 페이지 JSON으로 반환합니다."""
     try:
-        result = eval(수식, safe_dict)
-        return result
-    except Exception as e:
-        return False
+        result = screen_cache.get_or_compute(cache_key, database.version, compute)
+    except FormulaError as e:
+        return json.dumps({"error": str(e)}, ensure_ascii=False)
+    handle = screen_handle(cache_key)
+    _screen_handles[handle] = cache_key
+    _screen_handles.move_to_end(handle)
+    while len(_screen_handles) > screen_cache.maxsize:
+        _screen_handles.popitem(last=False)
+    try:
+        return format_page(result, handle, offset, limit, sort_by, count_only)
+    except ValueError as e:
+        return json.dumps({"error": str(e)}, ensure_ascii=False)
+
+
+def _result_columns(columns: dict[str, np.ndarray], mask: np.ndarray) -> dict[str, np.ndarray]:
+    """조건을 만족한 종목의 정렬 기준 값 (지표 변수와 기준일 가격)"""
+    return {name: np.asarray(values, dtype=float)[mask] for name, values in columns.items()}
 
 # ===== 날짜 관련 도구들 =====
 
@@ -193,6 +309,55 @@ def calculate(expression: str, variables: dict[str, float]) -> str:
         return f"계산 오류: {str(e)}"
 
 
+def _filter_stocks_by_indicator(
+    market: str,
+    criteria_date: str,
+    window: MarketWindow,
+    indicator_start_date: str,
+    indicator_end_date: str,
+    indicator_fn: str,
+    compiled: CompiledFormula,
+    indicator_params: dict,
+    parallel_workers: int,
+    explain: bool
+    ) -> ScreenResult:
+    """filter_stocks_by_indicator_auto의 스크리닝 실행"""
+    plan = None
+    if indicator_fn in indicator_batch.BATCH_INDICATORS:
+        # 가격 조건으로 후보를 줄인 뒤 시장 전체 또는 후보 종목의 지표를 한 번에 계산
+        stock_codes = window.stock_codes
+        plan = plan_screen(compiled, {"indicator_value": IndicatorRequest(indicator_fn, indicator_params, window)}, len(stock_codes))
+        mask, values = plan.execute(_formula_columns(market, criteria_date, {}), _plan_evaluator(market, parallel_workers))
+        indicator_values = values["indicator_value"]
+    else:
+        stock_fn = getattr(indicator, indicator_fn)
+        stock_codes = database.find_stock_codes_by_market(market)
+        indicator_values = []
+        for stock_code in stock_codes:
+            cache_key = (indicator_fn, stock_code, indicator_start_date, indicator_end_date)
+            try:
+                indicator_values.append(indicator_cache.get_or_compute(
+                    cache_key,
+                    database.version,
+                    lambda: stock_fn(database.find_stock_history_by_stock_code_and_date_range(stock_code, indicator_start_date, indicator_end_date))
+                ))
+            except Exception as e:
+                print(f"지표 계산 중 오류: {e}")
+                indicator_values.append(None)
+
+        has_value = np.array([value is not None for value in indicator_values], dtype=bool)
+        indicator_values = np.array([np.nan if value is None else value for value in indicator_values], dtype=float)
+        # 시장 전체를 한 번에 평가한 불리언 마스크
+        mask = compiled.evaluate(_formula_columns(market, criteria_date, {"indicator_value": indicator_values})) & has_value
+
+    return ScreenResult(
+        items=[stock_code for stock_code, selected in zip(stock_codes, mask) if selected],
+        columns=_result_columns({"indicator_value": indicator_values, **database.get_cross_section(market, criteria_date, fill_value=np.nan)}, mask),
+        plan=(plan.explain() if plan else "") if explain else None,
+        selection=StockBitset.from_mask(database.stock_codes, mask)
+    )
+
+
 @tool
 def filter_stocks_by_indicator_auto(
     market: str, 
@@ -200,13 +365,22 @@ def filter_stocks_by_indicator_auto(
     indicator_start_date: str, 
     indicator_end_date: str,  
     indicator_fn: str,
-    formula: str
+    formula: str,
+    indicator_params: dict = None,
+    lookback_days: int = None,
+    parallel_workers: int = None,
+    explain: bool = False,
+    limit: int = None,
+    offset: int = 0,
+    sort_by: str = None,
+    count_only: bool = False
     ) -> str:
     """지표 조건에 따라 자동으로 주식 종목을 필터링(스크리닝)합니다.
 
     지정된 기간의 주가 데이터로 기술적 지표를 계산하고, 기준일의 주가 정보와 함께
     주어진 수식을 평가하여 조건을 만족하는 종목만 자동으로 선별합니다.
     criteria_date 날짜의 주가 정보를 스스로 조회하여 지표 계산을 합니다.
+    같은 질문(시장, 날짜, 지표, 파라미터, 수식)은 데이터가 갱신되기 전까지 저장된 결과를 바로 반환합니다.
     
     Args:
         market (str): 주식 시장 구분. "KOSPI" 또는 "KOSDAQ"
@@ -215,16 +389,39 @@ def filter_stocks_by_indicator_auto(
         indicator_end_date (str): 지표 계산용 종료 날짜. 형식: "YYYY-MM-DD" (예: "2024-01-10")
         indicator_fn (str): 사용할 지표 함수명. 
             사용 가능한 함수:
-            - "calculate_rsi": RSI 계산
-            - "calculate_average_volume": 평균 거래량 계산
-            - "calculate_moving_average": 이동평균 계산
-            - "detect_golden_cross": 골든크로스 감지 (1.0 또는 0.0)
-            - "count_golden_cross": 골든크로스 발생 횟수
-            - "detect_dead_cross": 데드크로스 감지 (1.0 또는 0.0)
-            - "count_dead_cross": 데드크로스 발생 횟수
-            - "detect_bollinger_lower_touch": 볼린저밴드 하단 터치 (1.0 또는 0.0)
-            - "detect_bollinger_upper_touch": 볼린저밴드 상단 터치 (1.0 또는 0.0)
-        formula (str): 파이썬을 실행하여 평가할 수식, True or False 를 반환할 수 있도록 조건식으로 작성해야 함. 다음 변수들을 사용 가능. 이외의 변수는 절대 사용 불가:
+            - "calculate_rsi": Wilder RSI(14) 계산. 저장소 전체 이력으로 평활한 indicator_end_date 시점 값 (indicator_start_date는 사용하지 않음)
+            - "calculate_average_volume": 평균 거래량 계산 (period를 주면 indicator_end_date 기준 period일 평균, 생략하면 구간 전체 평균)
+            - "calculate_volume_ratio": indicator_end_date 거래량 / 직전 period일(기본 20일) 평균 거래량. 1.5면 평균 대비 50% 증가
+            - "calculate_moving_average": 이동평균 계산 (period를 주면 indicator_end_date 기준 period일 이동평균, 생략하면 구간 전체 평균)
+            - "detect_golden_cross": 구간 내 골든크로스 감지 (1.0 또는 0.0)
+            - "count_golden_cross": 구간 내 골든크로스 발생 횟수
+            - "detect_dead_cross": 구간 내 데드크로스 감지 (1.0 또는 0.0)
+            - "count_dead_cross": 구간 내 데드크로스 발생 횟수
+            - "detect_bollinger_lower_touch": indicator_end_date 종가의 볼린저밴드 하단 터치 (1.0 또는 0.0)
+            - "detect_bollinger_upper_touch": indicator_end_date 종가의 볼린저밴드 상단 터치 (1.0 또는 0.0)
+            - "count_bollinger_lower_touch": 구간 내 종가가 볼린저밴드 하단에 닿은 일수
+            - "count_bollinger_upper_touch": 구간 내 종가가 볼린저밴드 상단에 닿은 일수
+            - "calculate_bollinger_upper": indicator_end_date 기준 볼린저밴드 상단 값
+            - "calculate_bollinger_lower": indicator_end_date 기준 볼린저밴드 하단 값
+            - "calculate_ema": indicator_end_date 기준 종가 지수이동평균
+            - "calculate_macd": indicator_end_date 기준 MACD (단기 EMA - 장기 EMA)
+            - "calculate_macd_signal": indicator_end_date 기준 MACD 시그널
+            - "calculate_macd_histogram": indicator_end_date 기준 MACD 히스토그램 (MACD - 시그널)
+            - "detect_macd_golden_cross": 구간 내 MACD의 시그널 상향 돌파 감지 (1.0 또는 0.0)
+            - "detect_macd_dead_cross": 구간 내 MACD의 시그널 하향 돌파 감지 (1.0 또는 0.0)
+            - "calculate_atr": indicator_end_date 기준 ATR (True Range의 14일 평균)
+            - "detect_atr_breakout": 구간 내 종가가 전일 종가 + k × 전일 ATR을 넘은 변동성 돌파 감지 (1.0 또는 0.0)
+            - "calculate_obv": indicator_end_date 기준 OBV (저장소 전체 이력 누적)
+            - "detect_obv_bullish_divergence": 구간 동안 종가는 내렸는데 OBV는 오른 상승 다이버전스 (1.0 또는 0.0)
+            - "detect_obv_bearish_divergence": 구간 동안 종가는 올랐는데 OBV는 내린 하락 다이버전스 (1.0 또는 0.0)
+            - "calculate_stochastic_k": indicator_end_date 기준 스토캐스틱 %K (0~100)
+            - "calculate_stochastic_d": indicator_end_date 기준 스토캐스틱 %D (%K의 3일 평균)
+            - "detect_stochastic_golden_cross": 구간 내 %K의 %D 상향 돌파 감지 (1.0 또는 0.0)
+            - "detect_stochastic_dead_cross": 구간 내 %K의 %D 하향 돌파 감지 (1.0 또는 0.0)
+            이동평균 계열은 indicator_start_date 이전 이력도 사용하므로 구간에는 교차를 찾을 기간만 지정하면 됨
+        formula (str): 평가할 조건식, True or False 를 반환할 수 있도록 조건식으로 작성해야 함.
+            사칙연산(+, -, *, /, //, %, **), 비교(>, >=, <, <=, ==, !=), and/or/not, 함수 abs/min/max/round/pow만 사용 가능.
+            0으로 나눈 종목은 조건을 만족하지 않음. 다음 변수들을 사용 가능. 이외의 변수는 절대 사용 불가 (사용하면 오류 반환):
             변수명:
             - "indicator_value": 계산된 지표 값
             - "open_price": criteria_date의 시가
@@ -232,10 +429,44 @@ def filter_stocks_by_indicator_auto(
             - "low_price": criteria_date의 저가
             - "close_price": criteria_date의 종가
             - "volume": criteria_date의 거래량
+            - 위 변수명 뒤에 "_rank", "_percentile", "_zscore"를 붙이면 같은 날짜 시장 전체 종목 대비 값
+              (예: "indicator_value_percentile", "volume_rank", "close_price_zscore")
+              - "_rank": 내림차순 순위 (가장 큰 값이 1위)
+              - "_percentile": 백분위 0~100 (가장 큰 값이 100, 상위 10%는 >= 90)
+              - "_zscore": (값 - 시장 평균) / 시장 표준편차
+              지표 값이 없거나 거래가 없는 종목은 비교 대상에서 제외
             수식 예시: "indicator_value * 0.1" < 10, "close_price / indicator_value" > 1.05, "volume + indicator_value" > 1000, "indicator_value > 30"
+        indicator_params (dict): 지표 함수의 기간 파라미터 (선택). 생략하면 기본값 사용
+            - "calculate_moving_average": {"period": 60}
+            - "calculate_average_volume": {"period": 20}
+            - "calculate_volume_ratio": {"period": 20} (기본값 20일)
+            - 골든/데드크로스 함수: {"short_period": 20, "long_period": 60} (기본값 5/20)
+            - 볼린저밴드 함수: {"period": 20, "k": 2.0} (기본값 20일, 1.0)
+            - "calculate_ema": {"period": 20}
+            - MACD 함수: {"fast_period": 12, "slow_period": 26, "signal_period": 9} (기본값)
+            - "calculate_atr": {"period": 14}, "detect_atr_breakout": {"period": 14, "k": 1.0} (기본값)
+            - 스토캐스틱 함수: {"period": 14, "d_period": 3} (기본값, calculate_stochastic_k는 period만)
+            - 이동평균/거래량 비율/골든·데드크로스/볼린저밴드/ATR 함수: {"min_periods": 15} 처럼 최소 유효 거래일 수 지정 가능.
+              기간은 휴장일을 뺀 거래일 기준이며, 거래정지로 빈 날이 있어도 유효 거래일이 min_periods 이상이면 값을 계산 (생략하면 기간 전체 필요)
+            - 지표 함수가 받지 않는 파라미터나 1 미만/정수가 아닌 기간을 주면 {"error": ...}를 반환
+        lookback_days (int): 지표 구간 길이 (거래일, 선택). 주면 indicator_start_date 대신
+            indicator_end_date까지 최근 lookback_days 거래일을 지표 구간으로 사용 (주말/휴장일 제외)
+        parallel_workers (int): 지표 계산에 쓸 프로세스 수 (선택). 2 이상이면 종목을 나눠 여러 프로세스에서 계산.
+            적재 시점 지표 테이블이 없는 무거운 지표(스토캐스틱, ATR 등)를 장기간 계산할 때만 사용 (생략하면 단일 프로세스)
+        explain (bool): True면 결과와 함께 실행 계획(단계별 예상 비용과 실제 종목 수)을 반환 (기본값: False)
+            formula를 and로 나눠 가격만 쓰는 조건(예: close_price < 10000)을 먼저 적용하고, 지표는 남은 종목만 계산함
+        limit (int): 반환할 최대 종목 수 (선택). 생략하면 결과가 50개를 넘을 때 첫 50개와 핸들만 반환
+        offset (int): 건너뛸 종목 수 (기본값: 0)
+        sort_by (str): 정렬 기준 변수명 (선택). "indicator_value", "open_price", "high_price", "low_price", "close_price", "volume"
+            앞에 "-"를 붙이면 내림차순 (예: "-volume"). 생략하면 종목코드 순서
+        count_only (bool): True면 조건을 만족하는 종목 수만 반환 (기본값: False)
     
     Returns:
-        str: 조건을 만족하는 종목 정보가 포함된 JSON 문자열
+        str: 조건을 만족하는 종목코드 JSON (들여쓰기 없는 간결한 형식)
+            결과가 50개 이하이고 limit/offset을 주지 않으면 ["005930", ...]
+            그 외에는 {"total": 전체 개수, "offset": 0, "limit": 50, "items": [...], "next_offset": 50, "handle": "screen-..."}
+            (next_offset이 null이면 마지막 페이지. 다음 페이지는 get_screen_page(handle, offset=next_offset)로 조회)
+            count_only=True면 {"total": 전체 개수}, explain=True면 {"plan": "실행 계획", "result": 위 결과}
         
     Examples:
         # RSI가 30 이하인 KOSPI 종목 찾기 (과매도 구간)
@@ -267,32 +498,953 @@ def filter_stocks_by_indicator_auto(
             indicator_fn="detect_golden_cross",
             formula="indicator_value == 1.0"
         )
+
+        # 20일/60일 이동평균 골든크로스가 발생한 종목 찾기
+        filter_stocks_by_indicator_auto(
+            market="KOSPI",
+            criteria_date="2024-01-15",
+            indicator_start_date="2024-01-01",
+            indicator_end_date="2024-01-15",
+            indicator_fn="detect_golden_cross",
+            formula="indicator_value == 1.0",
+            indicator_params={"short_period": 20, "long_period": 60}
+        )
+
+        # 거래량이 20일 평균 대비 100% 이상 증가한 종목 찾기
+        filter_stocks_by_indicator_auto(
+            market="KOSDAQ",
+            criteria_date="2024-01-15",
+            indicator_start_date="2024-01-15",
+            indicator_end_date="2024-01-15",
+            indicator_fn="calculate_volume_ratio",
+            formula="indicator_value >= 2.0",
+            indicator_params={"period": 20}
+        )
+
+        # RSI 상위 10% 종목 찾기
+        filter_stocks_by_indicator_auto(
+            market="KOSPI",
+            criteria_date="2024-01-15",
+            indicator_start_date="2024-01-15",
+            indicator_end_date="2024-01-15",
+            indicator_fn="calculate_rsi",
+            formula="indicator_value_percentile >= 90"
+        )
+
+        # 거래량 상위 5% 이면서 거래량이 20일 평균의 2배 이상인 종목 찾기
+        filter_stocks_by_indicator_auto(
+            market="KOSDAQ",
+            criteria_date="2024-01-15",
+            indicator_start_date="2024-01-15",
+            indicator_end_date="2024-01-15",
+            indicator_fn="calculate_volume_ratio",
+            formula="volume_percentile >= 95 and indicator_value >= 2.0"
+        )
+
+        # RSI 70 이상 과매수 종목 수만 확인한 뒤 RSI가 높은 순으로 20개씩 보기
+        filter_stocks_by_indicator_auto(
+            market="KOSPI",
+            criteria_date="2024-01-15",
+            indicator_start_date="2024-01-15",
+            indicator_end_date="2024-01-15",
+            indicator_fn="calculate_rsi",
+            formula="indicator_value >= 70",
+            count_only=True
+        )
+        filter_stocks_by_indicator_auto(
+            market="KOSPI",
+            criteria_date="2024-01-15",
+            indicator_start_date="2024-01-15",
+            indicator_end_date="2024-01-15",
+            indicator_fn="calculate_rsi",
+            formula="indicator_value >= 70",
+            sort_by="-indicator_value",
+            limit=20
+        )
+
+        # 최근 10거래일 안에 골든크로스가 발생한 종목 찾기 (휴장일 제외)
+        filter_stocks_by_indicator_auto(
+            market="KOSPI",
+            criteria_date="2024-01-15",
+            indicator_start_date="2024-01-15",
+            indicator_end_date="2024-01-15",
+            indicator_fn="detect_golden_cross",
+            formula="indicator_value == 1.0",
+            lookback_days=10
+        )
     """
-    indicator_fn = getattr(indicator, indicator_fn)
-    
-    result = []
-    for stock_code in database.find_stock_codes_by_market(market):
-        indicator_histories = database.find_stock_history_by_stock_code_and_date_range(stock_code, indicator_start_date, indicator_end_date)
+    try:
+        compiled = compile_formula(formula, SCREEN_VARIABLES)
+    except FormulaError as e:
+        return json.dumps({"error": str(e)}, ensure_ascii=False)
+
+    indicator_params = indicator_params or {}
+    error = _indicator_params_error(indicator_fn, indicator_params)
+    if error:
+        return json.dumps({"error": error}, ensure_ascii=False)
+
+    indicator_start_date = _indicator_start_date(market, indicator_start_date, indicator_end_date, lookback_days)
+    window = database.get_market_window(market, indicator_start_date, indicator_end_date)
+    # 같은 질문(정규화한 인자와 수식)은 저장소 버전이 같으면 같은 JSON을 그대로 반환
+    cache_key = (
+        "filter_stocks_by_indicator_auto", market, criteria_date, window.start, window.stop, indicator_fn,
+        normalize_params(indicator_fn, indicator_params) if indicator_fn in indicator_batch.BATCH_INDICATORS else (),
+        compiled.canonical, explain
+    )
+    return _screen_page(cache_key, lambda: _filter_stocks_by_indicator(
+        market, criteria_date, window, indicator_start_date, indicator_end_date, indicator_fn, compiled, indicator_params, parallel_workers, explain
+    ), offset, limit, sort_by, count_only)
+
+
+def _screen_stocks(market: str, criteria_date: str, requests: dict[str, IndicatorRequest], compiled: CompiledFormula, explain: bool) -> ScreenResult:
+    """screen_stocks의 스크리닝 실행"""
+    # 가격 조건 → 후보 종목만 지표 계산 순으로 실행 (같은 구간 지표는 평가기 하나로 중간 계산 공유)
+    stock_codes = next(iter(requests.values())).window.stock_codes
+    plan = plan_screen(compiled, requests, len(stock_codes))
+    mask, indicator_columns = plan.execute(_formula_columns(market, criteria_date, {}), _plan_evaluator(market))
+    items = [
+        {"stock_code": stock_code, **{name: None if np.isnan(values[i]) else float(values[i]) for name, values in indicator_columns.items()}}
+        for i, stock_code in enumerate(stock_codes) if mask[i]
+    ]
+    return ScreenResult(
+        items=items,
+        columns=_result_columns({**indicator_columns, **database.get_cross_section(market, criteria_date, fill_value=np.nan)}, mask),
+        plan=plan.explain() if explain else None,
+        selection=StockBitset.from_mask(database.stock_codes, mask)
+    )
+
+
+@tool
+def screen_stocks(
+    market: str,
+    criteria_date: str,
+    indicator_start_date: str,
+    indicator_end_date: str,
+    indicators: dict,
+    formula: str,
+    lookback_days: int = None,
+    explain: bool = False,
+    limit: int = None,
+    offset: int = 0,
+    sort_by: str = None,
+    count_only: bool = False
+    ) -> str:
+    """여러 지표 조건을 하나의 수식으로 묶어 시장 전체 종목을 한 번에 스크리닝합니다.
+
+    "RSI 60 이상이면서 골든크로스 발생"처럼 지표가 두 개 이상인 조건을 filter_stocks_by_indicator_auto를
+    여러 번 호출해 교집합을 구하지 않고 한 번에 처리합니다. 지표마다 이름과 파라미터를 지정하고,
+    수식에서 그 이름을 변수로 사용합니다. 같은 구간의 지표는 이동평균 등 중간 계산을 공유합니다.
+    같은 질문은 데이터가 갱신되기 전까지 저장된 결과를 바로 반환합니다.
+
+    Args:
+        market (str): 주식 시장 구분. "KOSPI" 또는 "KOSDAQ"
+        criteria_date (str): 기준 주가 데이터 날짜. 형식: "YYYY-MM-DD" (예: "2024-01-15")
+        indicator_start_date (str): 지표 계산용 시작 날짜. 형식: "YYYY-MM-DD" (예: "2024-01-01")
+        indicator_end_date (str): 지표 계산용 종료 날짜. 형식: "YYYY-MM-DD" (예: "2024-01-10")
+        indicators (dict): 지표 변수명 → 지표 정의
+            - "fn": filter_stocks_by_indicator_auto의 indicator_fn과 같은 지표 함수명 (필수)
+            - "params": 지표 파라미터 (선택, filter_stocks_by_indicator_auto의 indicator_params와 같음)
+            - "lookback_days": 이 지표만 indicator_end_date까지 최근 N거래일 구간으로 계산 (선택)
+            변수명은 영문/숫자/밑줄로 짓고, 가격 변수명(open_price 등)과 겹치면 안 됨
+            예: {"rsi": {"fn": "calculate_rsi"}, "gc": {"fn": "detect_golden_cross", "params": {"short_period": 20, "long_period": 60}}}
+        formula (str): 조건식. indicators의 변수명과 open_price, high_price, low_price, close_price, volume
+            (criteria_date 기준), 그리고 각 변수명 뒤에 _rank/_percentile/_zscore를 붙인 시장 대비 값을 사용 가능.
+            사칙연산, 비교, and/or/not, abs/min/max/round/pow만 사용 가능
+        lookback_days (int): 지표 구간 길이 (거래일, 선택). 주면 indicator_start_date 대신 indicator_end_date까지 최근 N거래일 사용
+        explain (bool): True면 결과와 함께 실행 계획(단계별 예상 비용과 실제 종목 수)을 반환 (기본값: False)
+            formula를 and로 나눠 가격 조건을 먼저 적용하고, 지표는 예상 비용이 싼 순서로 남은 종목만 계산함
+        limit (int): 반환할 최대 종목 수 (선택). 생략하면 결과가 50개를 넘을 때 첫 50개와 핸들만 반환
+        offset (int): 건너뛸 종목 수 (기본값: 0)
+        sort_by (str): 정렬 기준 변수명 (선택). indicators의 변수명 또는 "open_price", "high_price", "low_price", "close_price", "volume"
+            앞에 "-"를 붙이면 내림차순 (예: "-volume"). 생략하면 종목코드 순서
+        count_only (bool): True면 조건을 만족하는 종목 수만 반환 (기본값: False)
+
+    Returns:
+        str: 조건을 만족하는 종목과 지표 값 JSON (들여쓰기 없는 간결한 형식)
+        [{"stock_code": "005930", "rsi": 63.2, "gc": 1.0}, ...]
+        결과가 50개를 넘거나 limit/offset을 주면 {"total", "offset", "limit", "items", "next_offset", "handle"} 형식
+        (다음 페이지는 get_screen_page(handle, offset=next_offset)로 조회)
+        count_only=True면 {"total": 전체 개수}, explain=True면 {"plan": "실행 계획", "result": 위 결과}
+
+    Examples:
+        # RSI 60 이상이면서 1월 중 20일/60일 골든크로스가 발생한 KOSPI 종목
+        screen_stocks(
+            market="KOSPI",
+            criteria_date="2024-01-31",
+            indicator_start_date="2024-01-01",
+            indicator_end_date="2024-01-31",
+            indicators={
+                "rsi": {"fn": "calculate_rsi"},
+                "gc": {"fn": "detect_golden_cross", "params": {"short_period": 20, "long_period": 60}}
+            },
+            formula="rsi >= 60 and gc == 1.0"
+        )
+
+        # 종가가 20일 이동평균 위에 있고 거래량이 20일 평균의 2배 이상이며 RSI 상위 10%인 종목
+        screen_stocks(
+            market="KOSDAQ",
+            criteria_date="2024-01-15",
+            indicator_start_date="2024-01-15",
+            indicator_end_date="2024-01-15",
+            indicators={
+                "ma20": {"fn": "calculate_moving_average", "params": {"period": 20}},
+                "vol_ratio": {"fn": "calculate_volume_ratio"},
+                "rsi": {"fn": "calculate_rsi"}
+            },
+            formula="close_price > ma20 and vol_ratio >= 2.0 and rsi_percentile >= 90"
+        )
+
+        # 최근 5거래일 안에 골든크로스가 발생했고 최근 20거래일 볼린저밴드 하단 터치가 2번 이상인 종목
+        screen_stocks(
+            market="KOSPI",
+            criteria_date="2024-01-15",
+            indicator_start_date="2024-01-15",
+            indicator_end_date="2024-01-15",
+            indicators={
+                "gc": {"fn": "detect_golden_cross", "lookback_days": 5},
+                "touches": {"fn": "count_bollinger_lower_touch", "lookback_days": 20}
+            },
+            formula="gc == 1.0 and touches >= 2"
+        )
+    """
+    if not indicators:
+        return json.dumps({"error": "indicators에 지표를 하나 이상 지정해야 합니다."}, ensure_ascii=False)
+    for name, definition in indicators.items():
+        if not name.isidentifier() or name in SCREEN_VARIABLES or name in FORMULA_FUNCTIONS:
+            return json.dumps({"error": f"사용할 수 없는 지표 변수명입니다: {name}"}, ensure_ascii=False)
+        if not isinstance(definition, dict):
+            return json.dumps({"error": f"지표 정의는 fn(지표 함수명)을 담은 딕셔너리여야 합니다: {name}={definition!r}"}, ensure_ascii=False)
+        if definition.get("fn") not in indicator_batch.BATCH_INDICATORS:
+            return json.dumps({"error": f"알 수 없는 지표 함수입니다: {definition.get('fn')} ({name})"}, ensure_ascii=False)
+        error = _indicator_params_error(definition["fn"], definition.get("params") or {})
+        if error:
+            return json.dumps({"error": f"{error} ({name})"}, ensure_ascii=False)
+
+    try:
+        compiled = compile_formula(formula, _formula_variables((*_PRICE_COLUMNS, *indicators)))
+    except FormulaError as e:
+        return json.dumps({"error": str(e)}, ensure_ascii=False)
+
+    default_start_date = _indicator_start_date(market, indicator_start_date, indicator_end_date, lookback_days)
+    windows = {}
+    requests = {}
+    for name, definition in indicators.items():
+        start_date = _indicator_start_date(market, default_start_date, indicator_end_date, definition.get("lookback_days"))
+        if start_date not in windows:
+            windows[start_date] = database.get_market_window(market, start_date, indicator_end_date)
+        requests[name] = IndicatorRequest(definition["fn"], definition.get("params") or {}, windows[start_date])
+
+    cache_key = (
+        "screen_stocks", market, criteria_date,
+        tuple((name, request.fn, normalize_params(request.fn, request.params), request.window.start, request.window.stop) for name, request in requests.items()),
+        compiled.canonical, explain
+    )
+    return _screen_page(cache_key, lambda: _screen_stocks(market, criteria_date, requests, compiled, explain), offset, limit, sort_by, count_only)
+
+
+@tool
+def get_screen_page(handle: str, offset: int = 0, limit: int = 50, sort_by: str = None) -> str:
+    """스크리닝 결과의 다음 페이지를 조회합니다.
+
+    filter_stocks_by_indicator_auto나 screen_stocks의 결과가 많아 핸들과 첫 페이지만 반환됐을 때,
+    스크리닝을 다시 실행하지 않고 나머지 결과를 페이지 단위로 가져옵니다.
+
+    Args:
+        handle (str): 스크리닝 결과의 "handle" 값 (예: "screen-1a2b3c4d5e6f")
+        offset (int): 건너뛸 종목 수. 보통 이전 결과의 "next_offset" (기본값: 0)
+        limit (int): 반환할 최대 종목 수 (기본값: 50)
+        sort_by (str): 정렬 기준 변수명 (선택). 앞에 "-"를 붙이면 내림차순. 첫 페이지와 같은 기준을 줘야 이어짐
+
+    Returns:
+        str: {"total", "offset", "limit", "items", "next_offset", "handle"} JSON
+        (데이터가 갱신됐거나 오래되어 결과가 없으면 {"error": ...}. 스크리닝을 다시 실행해야 함)
+
+    Examples:
+        # 첫 페이지 결과의 next_offset이 50이었을 때 다음 50개
+        get_screen_page("screen-1a2b3c4d5e6f", offset=50)
+
+        # RSI가 높은 순으로 정렬한 결과의 두 번째 페이지
+        get_screen_page("screen-1a2b3c4d5e6f", offset=20, limit=20, sort_by="-indicator_value")
+    """
+    cache_key = _screen_handles.get(handle)
+    result = screen_cache.get(cache_key, database.version) if cache_key is not None else None
+    if result is None:
+        return json.dumps({"error": "결과가 만료되었습니다. 스크리닝을 다시 실행하세요."}, ensure_ascii=False)
+    try:
+        return format_page(result, handle, offset, limit, sort_by, paged=True)
+    except ValueError as e:
+        return json.dumps({"error": str(e)}, ensure_ascii=False)
+
+
+@tool
+def combine_screen_results(handles: list, operation: str = "intersection", limit: int = None, offset: int = 0, count_only: bool = False) -> str:
+    """여러 스크리닝 결과를 종목 집합 연산(교집합/합집합/차집합/XOR)으로 합칩니다.
+
+    "RSI 과매도 종목 중 골든크로스가 없는 종목"처럼 스크리닝 결과끼리의 집합 관계를 물을 때,
+    각 결과의 handle로 스크리닝을 다시 실행하지 않고 종목 비트셋 연산으로 한 번에 계산합니다.
+    합친 결과에도 handle이 있어 다시 다른 결과와 합칠 수 있습니다.
+
+    Args:
+        handles (list): 합칠 스크리닝 결과 목록 (2개 이상). 각 항목은 다음 중 하나
+            - 스크리닝 결과의 "handle" 값 (예: "screen-1a2b3c4d5e6f")
+            - 결과가 50개 이하라 handle 없이 받은 결과 목록 그대로 (종목코드 목록 또는 "stock_code"가 있는 항목 목록)
+              (저장소에 없는 종목코드는 무시)
+        operation (str): 집합 연산 (기본값: "intersection")
+            - "intersection": 모든 결과에 있는 종목
+            - "union": 하나 이상의 결과에 있는 종목
+            - "difference": 첫 결과에서 나머지 결과의 종목을 뺀 종목
+            - "xor": 홀수 개의 결과에 있는 종목 (2개면 한쪽에만 있는 종목)
+        limit (int): 반환할 최대 종목 수 (선택). 생략하면 결과가 50개를 넘을 때 첫 50개와 핸들만 반환
+        offset (int): 건너뛸 종목 수 (기본값: 0)
+        count_only (bool): True면 종목 수만 반환 (기본값: False)
+
+    Returns:
+        str: 종목코드 목록 JSON (예: ["005930","000660"])
+        결과가 50개를 넘거나 limit/offset을 주면 {"total", "offset", "limit", "items", "next_offset", "handle"} 형식
+        count_only=True면 {"total": 전체 개수}
+        (handle이 만료됐으면 {"error": ...}. 스크리닝을 다시 실행해야 함)
+
+    Examples:
+        # RSI 30 이하 종목(handle A)과 골든크로스 발생 종목(handle B)에 모두 있는 종목
+        combine_screen_results(["screen-1a2b3c4d5e6f", "screen-6f5e4d3c2b1a"])
+
+        # RSI 30 이하 종목 중 골든크로스가 없는 종목의 개수
+        combine_screen_results(["screen-1a2b3c4d5e6f", "screen-6f5e4d3c2b1a"], operation="difference", count_only=True)
+
+        # handle이 있는 큰 결과와 handle 없이 받은 작은 결과의 교집합
+        combine_screen_results(["screen-1a2b3c4d5e6f", ["005930", "000660", "035420"]])
+    """
+    if operation not in SET_OPERATIONS:
+        return json.dumps({"error": f"알 수 없는 집합 연산입니다: {operation} (사용 가능: {', '.join(SET_OPERATIONS)})"}, ensure_ascii=False)
+    if not isinstance(handles, list) or len(handles) < 2:
+        return json.dumps({"error": "handles에 결과를 2개 이상 지정해야 합니다."}, ensure_ascii=False)
+
+    selections, key_parts = [], []
+    for entry in handles:
+        if isinstance(entry, str):
+            cache_key = _screen_handles.get(entry)
+            result = screen_cache.get(cache_key, database.version) if cache_key is not None else None
+            if result is None or result.selection is None:
+                return json.dumps({"error": f"결과가 만료되었습니다: {entry}. 스크리닝을 다시 실행하세요."}, ensure_ascii=False)
+            selections.append(result.selection)
+            key_parts.append(cache_key)
+        elif isinstance(entry, list):
+            # handle 없이 받은 결과 목록 (종목코드 또는 stock_code가 있는 항목)
+            codes = [item.get("stock_code") if isinstance(item, dict) else item for item in entry]
+            if not all(isinstance(code, str) for code in codes):
+                return json.dumps({"error": f"결과 목록에서 종목코드를 찾을 수 없습니다: {entry!r}"}, ensure_ascii=False)
+            selections.append(StockBitset.from_codes(database.stock_codes, codes, database.code_index))
+            key_parts.append(("codes", tuple(sorted(set(codes)))))
+        else:
+            return json.dumps({"error": f"handle 또는 결과 목록이어야 합니다: {entry!r}"}, ensure_ascii=False)
+
+    def compute() -> ScreenResult:
+        # 워드 단위 비트 연산만 하고 종목코드로는 출력할 때 한 번 변환
+        selection = selections[0]
+        for other in selections[1:]:
+            selection = SET_OPERATIONS[operation](selection, other)
+        return ScreenResult(items=selection.to_codes(), selection=selection)
+
+    return _screen_page(("combine_screen_results", operation, tuple(key_parts)), compute, offset, limit, None, count_only)
+
+
+# 두 날짜 비교 스크리닝 수식 변수 (기준일 prev_*, 대상일 curr_*)
+COMPARISON_VARIABLES = _formula_variables(
+    tuple(f"prev_{name}" for name in _PRICE_COLUMNS) + tuple(f"curr_{name}" for name in _PRICE_COLUMNS))
+
+
+def _screen_date_comparison(market: str, reference_date: str, target_date: str, compiled: CompiledFormula) -> ScreenResult:
+    """screen_date_comparison의 스크리닝 실행"""
+    # 두 날짜의 시장 전체 가격 벡터만 꺼내 수식 하나로 평가 (거래가 없는 날은 NaN이라 조건 불만족)
+    columns = {}
+    for prefix, date in (("prev", reference_date), ("curr", target_date)):
+        columns.update({f"{prefix}_{name}": values for name, values in database.get_cross_section(market, date, fill_value=np.nan).items()})
+    # 시장 대비 값은 수식에 쓰인 변수만 계산
+    ranked = {name: values for name, values in columns.items() if any(used.startswith(f"{name}_") for used in compiled.names)}
+    mask = compiled.evaluate({**columns, **cross_section_variables(ranked)})
+    mask &= ~np.isnan(columns["prev_close_price"]) & ~np.isnan(columns["curr_close_price"])
+    return ScreenResult(
+        items=[stock_code for stock_code, selected in zip(database.stock_codes, mask) if selected],
+        columns=_result_columns(columns, mask),
+        selection=StockBitset.from_mask(database.stock_codes, mask)
+    )
+
+
+@tool
+def screen_date_comparison(
+    market: str,
+    target_date: str,
+    formula: str,
+    reference_date: str = None,
+    limit: int = None,
+    offset: int = 0,
+    sort_by: str = None,
+    count_only: bool = False
+    ) -> str:
+    """두 날짜의 가격을 비교하는 조건식으로 시장 전체 종목을 한 번에 스크리닝합니다.
+
+    "거래량이 전날 대비 3배 이상", "종가가 지난주 금요일보다 10% 이상 상승"처럼 기준일과 대상일의
+    시가/고가/저가/종가/거래량을 비교하는 조건에 사용합니다. 두 날짜의 시장 전체 가격만 읽어
+    조건식을 한 번에 평가하므로 종목별 이력을 조회하지 않습니다.
+
+    Args:
+        market (str): 주식 시장 구분. "KOSPI" 또는 "KOSDAQ"
+        target_date (str): 비교 대상일 (curr_* 변수). 형식: "YYYY-MM-DD" (예: "2024-01-15")
+            거래일이 아니면(주말/휴일) 그 이전 마지막 거래일 기준
+        formula (str): 조건식. 사용 가능한 변수:
+            - prev_open_price, prev_high_price, prev_low_price, prev_close_price, prev_volume: 기준일 가격
+            - curr_open_price, curr_high_price, curr_low_price, curr_close_price, curr_volume: 대상일 가격
+            - 각 변수명 뒤에 _rank/_percentile/_zscore를 붙인 시장 대비 값 (예: curr_volume_rank)
+            사칙연산, 비교, and/or/not, abs/min/max/round/pow만 사용 가능. 0으로 나누면 조건 불만족
+        reference_date (str): 비교 기준일 (prev_* 변수, 선택). 생략하면 target_date의 직전 거래일
+            거래일이 아니면 그 이전 마지막 거래일 기준
+        limit (int): 반환할 최대 종목 수 (선택). 생략하면 결과가 50개를 넘을 때 첫 50개와 핸들만 반환
+        offset (int): 건너뛸 종목 수 (기본값: 0)
+        sort_by (str): 정렬 기준 변수명 (선택). prev_*/curr_* 가격 변수명, 앞에 "-"를 붙이면 내림차순
+        count_only (bool): True면 조건을 만족하는 종목 수만 반환 (기본값: False)
+
+    Returns:
+        str: 조건을 만족하는 종목코드 목록 JSON (예: ["005930","000660"]). 두 날짜 모두 거래한 종목만 포함
+        결과가 50개를 넘거나 limit/offset을 주면 {"total", "offset", "limit", "items", "next_offset", "handle"} 형식
+        (다음 페이지는 get_screen_page(handle, offset=next_offset)로 조회)
+        count_only=True면 {"total": 전체 개수}
+
+    Examples:
+        # 거래량이 전날 대비 3배 이상인 KOSPI 종목
+        screen_date_comparison(market="KOSPI", target_date="2024-01-15", formula="curr_volume >= prev_volume * 3")
+
+        # 2024-01-05 대비 종가가 10% 이상 오르고 당일 양봉인 종목 (상승률 높은 순)
+        screen_date_comparison(
+            market="KOSDAQ",
+            target_date="2024-01-15",
+            reference_date="2024-01-05",
+            formula="curr_close_price >= prev_close_price * 1.1 and curr_close_price > curr_open_price",
+            sort_by="-curr_close_price"
+        )
+
+        # 전날 고가를 돌파하고 거래량이 시장 상위 5%인 종목
+        screen_date_comparison(market="KOSPI", target_date="2024-01-15", formula="curr_close_price > prev_high_price and curr_volume_percentile >= 95")
+    """
+    try:
+        compiled = compile_formula(formula, COMPARISON_VARIABLES)
+    except FormulaError as e:
+        return json.dumps({"error": str(e)}, ensure_ascii=False)
+    # 거래일이 아닌 날짜는 그 이전 마지막 거래일 기준
+    requested_target = target_date
+    target_date = database.previous_trading_date(target_date, days=0)
+    if target_date is None:
+        return json.dumps({"error": f"{requested_target} 이전 거래일 데이터가 없습니다."}, ensure_ascii=False)
+    if reference_date is None:
+        reference_date = database.previous_trading_date(target_date)
+        if reference_date is None:
+            return json.dumps({"error": f"{target_date} 이전 거래일 데이터가 없습니다."}, ensure_ascii=False)
+    else:
+        requested_reference = reference_date
+        reference_date = database.previous_trading_date(reference_date, days=0)
+        if reference_date is None:
+            return json.dumps({"error": f"{requested_reference} 이전 거래일 데이터가 없습니다."}, ensure_ascii=False)
+
+    cache_key = ("screen_date_comparison", market, reference_date, target_date, compiled.canonical)
+    return _screen_page(cache_key, lambda: _screen_date_comparison(market, reference_date, target_date, compiled), offset, limit, sort_by, count_only)
+
+
+def _screen_rolling_window(market: str, end_date: str, aggregates: dict[str, tuple], compiled: CompiledFormula) -> ScreenResult:
+    """screen_rolling_window의 스크리닝 실행"""
+    windows = {}
+    values = {}
+    for name, (aggregate, field, days) in aggregates.items():
+        if days not in windows:
+            windows[days] = database.get_trading_window(market, end_date, days)
+        values[name] = window_aggregate(windows[days], aggregate, field)
+    mask = compiled.evaluate(_formula_columns(market, end_date, values))
+    items = [
+        {"stock_code": stock_code, **{name: None if np.isnan(column[i]) else float(column[i]) for name, column in values.items()}}
+        for i, stock_code in enumerate(database.stock_codes) if mask[i]
+    ]
+    return ScreenResult(
+        items=items,
+        columns=_result_columns({**values, **database.get_cross_section(market, end_date, fill_value=np.nan)}, mask),
+        selection=StockBitset.from_mask(database.stock_codes, mask)
+    )
+
+
+@tool
+def screen_rolling_window(
+    market: str,
+    end_date: str,
+    window_days: int,
+    aggregates: dict,
+    formula: str,
+    limit: int = None,
+    offset: int = 0,
+    sort_by: str = None,
+    count_only: bool = False
+    ) -> str:
+    """최근 N거래일 구간의 집계값(등락률, 최고/최저, 합계, 평균, 상승일 수) 조건으로 시장 전체 종목을 한 번에 스크리닝합니다.
+
+    "최근 10일간 등락률 10% 이상", "20일 신고가", "최근 5일 누적 거래량 100만 주 이상"처럼
+    하루의 가격이 아니라 여러 거래일에 걸친 조건에 사용합니다. 구간은 end_date까지의 저장소 거래일 기준이며
+    (주말/휴장일 제외), 거래가 없는 날은 집계에서 빠집니다.
+
+    Args:
+        market (str): 주식 시장 구분. "KOSPI" 또는 "KOSDAQ"
+        end_date (str): 구간 마지막 날짜. 형식: "YYYY-MM-DD" (거래일이 아니면 그 이전 마지막 거래일)
+        window_days (int): 구간 길이 (거래일 수, 예: 10)
+        aggregates (dict): 집계 변수명 → 집계 정의
+            - "agg": 집계 종류 (필수)
+                - "return": 등락률(%). (구간 마지막 종가 / 구간 직전 거래일 종가 - 1) × 100
+                - "max" / "min": 구간 최댓값 / 최솟값
+                - "sum": 구간 합계
+                - "mean": 구간 평균
+                - "up_days": 전 거래일보다 오른 날의 수
+            - "field": 집계할 가격 "open_price", "high_price", "low_price", "close_price", "volume" (선택)
+              생략하면 sum은 "volume", 나머지는 "close_price"
+            - "days": 이 집계만 다른 구간 길이 (선택, 생략하면 window_days)
+            변수명은 영문/숫자/밑줄로 짓고, 가격 변수명(close_price 등)과 겹치면 안 됨
+            예: {"ret10": {"agg": "return"}, "high20": {"agg": "max", "field": "high_price", "days": 20}}
+        formula (str): 조건식. aggregates의 변수명과 open_price, high_price, low_price, close_price, volume
+            (end_date 기준), 그리고 각 변수명 뒤에 _rank/_percentile/_zscore를 붙인 시장 대비 값을 사용 가능.
+            사칙연산, 비교, and/or/not, abs/min/max/round/pow만 사용 가능
+        limit (int): 반환할 최대 종목 수 (선택). 생략하면 결과가 50개를 넘을 때 첫 50개와 핸들만 반환
+        offset (int): 건너뛸 종목 수 (기본값: 0)
+        sort_by (str): 정렬 기준 변수명 (선택). aggregates의 변수명 또는 가격 변수명, 앞에 "-"를 붙이면 내림차순
+        count_only (bool): True면 조건을 만족하는 종목 수만 반환 (기본값: False)
+
+    Returns:
+        str: 조건을 만족하는 종목과 집계값 JSON (들여쓰기 없는 간결한 형식)
+        [{"stock_code": "005930", "ret10": 12.4}, ...]
+        결과가 50개를 넘거나 limit/offset을 주면 {"total", "offset", "limit", "items", "next_offset", "handle"} 형식
+        (다음 페이지는 get_screen_page(handle, offset=next_offset)로 조회)
+        count_only=True면 {"total": 전체 개수}
+
+    Examples:
+        # 최근 10거래일 등락률 10% 이상인 KOSPI 종목 (등락률 높은 순)
+        screen_rolling_window(
+            market="KOSPI",
+            end_date="2024-01-15",
+            window_days=10,
+            aggregates={"ret10": {"agg": "return"}},
+            formula="ret10 >= 10",
+            sort_by="-ret10"
+        )
+
+        # 당일 고가가 최근 20거래일 최고가와 같은 (20일 신고가) 종목
+        screen_rolling_window(
+            market="KOSDAQ",
+            end_date="2024-01-15",
+            window_days=20,
+            aggregates={"high20": {"agg": "max", "field": "high_price"}},
+            formula="high_price >= high20"
+        )
+
+        # 최근 5일 누적 거래량 100만 주 이상이면서 5일 중 4일 이상 상승한 종목
+        screen_rolling_window(
+            market="KOSPI",
+            end_date="2024-01-15",
+            window_days=5,
+            aggregates={"vol5": {"agg": "sum", "field": "volume"}, "ups": {"agg": "up_days"}},
+            formula="vol5 >= 1000000 and ups >= 4"
+        )
+    """
+    if not aggregates:
+        return json.dumps({"error": "aggregates에 집계를 하나 이상 지정해야 합니다."}, ensure_ascii=False)
+    normalized = {}
+    for name, definition in aggregates.items():
+        if not name.isidentifier() or name in SCREEN_VARIABLES or name in FORMULA_FUNCTIONS:
+            return json.dumps({"error": f"사용할 수 없는 집계 변수명입니다: {name}"}, ensure_ascii=False)
+        if not isinstance(definition, dict):
+            return json.dumps({"error": f"집계 정의는 agg(집계 이름)를 담은 딕셔너리여야 합니다: {name}={definition!r}"}, ensure_ascii=False)
+        aggregate = definition.get("agg")
+        if aggregate not in WINDOW_AGGREGATES:
+            return json.dumps({"error": f"알 수 없는 구간 집계입니다: {aggregate} ({name}, 사용 가능: {', '.join(WINDOW_AGGREGATES)})"}, ensure_ascii=False)
+        field = definition.get("field") or WINDOW_AGGREGATES[aggregate][1]
+        if field not in _PRICE_COLUMNS:
+            return json.dumps({"error": f"알 수 없는 가격 필드입니다: {field} ({name})"}, ensure_ascii=False)
+        days = definition.get("days")
+        days = window_days if days is None else days
         try:
-            indicator_value = indicator_fn(indicator_histories)
-        except Exception as e:
-            print(f"지표 계산 중 오류: {e}")
-            continue
-        
-        criteria_history = database.find_stock_history_by_stock_code_and_date(stock_code, criteria_date)
-        variables = {
-            "indicator_value": indicator_value,
-            "open_price": criteria_history.open_price,
-            "high_price": criteria_history.high_price,
-            "low_price": criteria_history.low_price,
-            "close_price": criteria_history.close_price,
-            "volume": criteria_history.volume
-            }
-        expression_result = _evaluate_expression(formula, variables)
-        if expression_result:
-            result.append(stock_code)
-            
-    return json.dumps(result, ensure_ascii=False, indent=2, default=str)
+            days = int(days)
+        except (TypeError, ValueError):
+            return json.dumps({"error": f"구간 길이는 거래일 수(정수)여야 합니다: {days!r} ({name})"}, ensure_ascii=False)
+        if days < 1:
+            return json.dumps({"error": f"구간 길이는 1거래일 이상이어야 합니다: {days} ({name})"}, ensure_ascii=False)
+        normalized[name] = (aggregate, field, days)
+
+    try:
+        compiled = compile_formula(formula, _formula_variables((*_PRICE_COLUMNS, *aggregates)))
+    except FormulaError as e:
+        return json.dumps({"error": str(e)}, ensure_ascii=False)
+    # 거래일이 아닌 날짜는 그 이전 마지막 거래일 기준
+    end_date = database.previous_trading_date(end_date, days=0)
+    if end_date is None:
+        return json.dumps({"error": "end_date 이전 거래일 데이터가 없습니다."}, ensure_ascii=False)
+
+    cache_key = ("screen_rolling_window", market, end_date, tuple(normalized.items()), compiled.canonical)
+    return _screen_page(cache_key, lambda: _screen_rolling_window(market, end_date, normalized, compiled), offset, limit, sort_by, count_only)
+
+
+# 구간 스크리닝 결과 형식
+RANGE_MODES = ("hits", "first", "last")
+
+
+def _screen_date_range(window: MarketWindow, compiled: CompiledFormula, mode: str) -> ScreenResult:
+    """screen_date_range의 스크리닝 실행"""
+    # 구간 전체를 (종목 × 거래일) 행렬 하나로 평가
+    hits = range_hits(window, compiled)
+    dates = window.window_dates
+    if mode == "hits":
+        # 날짜 순, 같은 날은 종목 순
+        days, rows = np.nonzero(hits.T)
+        items = [{"stock_code": window.stock_codes[i], "date": dates[j]} for j, i in zip(days, rows)]
+        columns = {name: window.field(name)[rows, days] for name in _PRICE_COLUMNS}
+    else:
+        counts = hits.sum(axis=1)
+        rows = np.flatnonzero(counts)
+        days = hits.argmax(axis=1) if mode == "first" else hits.shape[1] - 1 - hits[:, ::-1].argmax(axis=1)
+        items = [{"stock_code": window.stock_codes[i], "date": dates[days[i]], "hits": int(counts[i])} for i in rows]
+        columns = {"hits": counts[rows].astype(float)}
+    return ScreenResult(items=items, columns=columns, selection=StockBitset.from_mask(database.stock_codes, hits.any(axis=1)))
+
+
+@tool
+def screen_date_range(
+    market: str,
+    start_date: str,
+    end_date: str,
+    formula: str,
+    mode: str = "hits",
+    limit: int = None,
+    offset: int = 0,
+    sort_by: str = None,
+    count_only: bool = False
+    ) -> str:
+    """기간 안의 모든 거래일에 대해 조건식을 한 번에 평가해 조건을 만족한 (종목, 날짜)를 찾습니다.
+
+    "지난 한 달 동안 거래량이 전날의 5배 이상 터진 날", "1월 중 RSI가 30 아래로 내려간 종목과 날짜"처럼
+    '언제' 조건이 성립했는지 묻는 질문에 사용합니다. 날짜마다 filter_stocks_by_indicator_auto를
+    반복 호출하지 않고 기간 전체를 한 번에 계산합니다.
+
+    Args:
+        market (str): 주식 시장 구분. "KOSPI" 또는 "KOSDAQ"
+        start_date (str): 기간 시작 날짜. 형식: "YYYY-MM-DD" (예: "2024-01-01")
+        end_date (str): 기간 종료 날짜. 형식: "YYYY-MM-DD" (예: "2024-01-31")
+        formula (str): 각 거래일에 평가할 조건식. 사용 가능한 변수 (모두 그 거래일 기준):
+            - open_price, high_price, low_price, close_price, volume: 그날 가격
+            - prev_open_price, prev_high_price, prev_low_price, prev_close_price, prev_volume: 전 거래일 가격
+            - 적재 시점 지표: rsi_14, ma_5, ma_20, ma_60, ma_120, bollinger_upper, bollinger_lower, volume_ratio_20,
+              golden_cross_5_20, golden_cross_20_60, golden_cross_60_120, dead_cross_5_20, dead_cross_20_60, dead_cross_60_120
+              (교차는 발생일에 1, 아니면 0)
+            - 각 변수명 뒤에 _rank/_percentile/_zscore를 붙인 그날의 시장 대비 값 (예: volume_rank)
+            사칙연산, 비교, and/or/not, abs/min/max/round/pow만 사용 가능. 거래가 없는 날은 조건 불만족
+        mode (str): 결과 형식 (기본값: "hits")
+            - "hits": 조건을 만족한 모든 (종목, 날짜). 날짜 순
+            - "first": 종목별 처음 만족한 날짜와 만족한 날 수
+            - "last": 종목별 마지막으로 만족한 날짜와 만족한 날 수
+        limit (int): 반환할 최대 항목 수 (선택). 생략하면 결과가 50개를 넘을 때 첫 50개와 핸들만 반환
+        offset (int): 건너뛸 항목 수 (기본값: 0)
+        sort_by (str): 정렬 기준 (선택). 앞에 "-"를 붙이면 내림차순
+            mode="hits"면 그날 가격 변수명 (예: "-volume"), "first"/"last"면 "hits" (예: "-hits")
+        count_only (bool): True면 항목 수만 반환 (기본값: False)
+
+    Returns:
+        str: 간결한 JSON
+        mode="hits": [{"stock_code": "005930", "date": "2024-01-15"}, ...]
+        mode="first"/"last": [{"stock_code": "005930", "date": "2024-01-03", "hits": 4}, ...]
+        결과가 50개를 넘거나 limit/offset을 주면 {"total", "offset", "limit", "items", "next_offset", "handle"} 형식
+        (다음 페이지는 get_screen_page(handle, offset=next_offset)로 조회)
+        count_only=True면 {"total": 전체 개수}
+
+    Examples:
+        # 1월 중 거래량이 전 거래일의 5배 이상이었던 날 (거래량 많은 순)
+        screen_date_range(
+            market="KOSPI",
+            start_date="2024-01-01",
+            end_date="2024-01-31",
+            formula="volume >= prev_volume * 5",
+            sort_by="-volume"
+        )
+
+        # 1월 중 RSI가 30 아래로 내려간 종목별 첫 날짜
+        screen_date_range(market="KOSDAQ", start_date="2024-01-01", end_date="2024-01-31", formula="rsi_14 < 30", mode="first")
+
+        # 1월 중 20일/60일 골든크로스가 마지막으로 발생한 날짜
+        screen_date_range(market="KOSPI", start_date="2024-01-01", end_date="2024-01-31", formula="golden_cross_20_60 == 1", mode="last")
+    """
+    if mode not in RANGE_MODES:
+        return json.dumps({"error": f"알 수 없는 결과 형식입니다: {mode} (사용 가능: {', '.join(RANGE_MODES)})"}, ensure_ascii=False)
+    window = database.get_market_window(market, start_date, end_date)
+    try:
+        compiled = compile_formula(formula, _formula_variables(range_variable_names(window)))
+    except FormulaError as e:
+        return json.dumps({"error": str(e)}, ensure_ascii=False)
+
+    cache_key = ("screen_date_range", market, window.start, window.stop, compiled.canonical, mode)
+    return _screen_page(cache_key, lambda: _screen_date_range(window, compiled, mode), offset, limit, sort_by, count_only)
+
+
+def _find_cross_events(window: MarketWindow, cross_type: str, short_period: int, long_period: int) -> ScreenResult:
+    """find_cross_events의 스크리닝 실행"""
+    counts, first_days = query_cross_events(window, cross_type, short_period, long_period)
+    rows = np.flatnonzero(counts)
+    items = [
+        {"stock_code": window.stock_codes[i], "count": int(counts[i]), "first_date": window.dates[first_days[i]]}
+        for i in rows
+    ]
+    return ScreenResult(
+        items=items,
+        columns={"count": counts[rows].astype(float), "first_date": first_days[rows].astype(float)},
+        selection=StockBitset.from_mask(database.stock_codes, counts > 0)
+    )
+
+
+@tool
+def find_cross_events(
+    market: str,
+    start_date: str,
+    end_date: str,
+    cross_type: str = "golden",
+    short_period: int = 5,
+    long_period: int = 20,
+    limit: int = None,
+    offset: int = 0,
+    sort_by: str = None,
+    count_only: bool = False
+    ) -> str:
+    """기간 내 이동평균 골든크로스/데드크로스가 발생한 종목과 발생 횟수, 첫 발생일을 조회합니다.
+
+    저장소 적재 시점에 만들어 둔 교차 발생일 색인(5/20, 20/60, 60/120일)을 이진 탐색으로 조회하므로
+    기간 길이와 무관하게 빠릅니다. 색인에 없는 이동평균 조합은 직접 계산합니다.
+
+    Args:
+        market (str): 주식 시장 구분. "KOSPI" 또는 "KOSDAQ"
+        start_date (str): 조회 시작 날짜. 형식: "YYYY-MM-DD" (예: "2024-01-01")
+        end_date (str): 조회 종료 날짜. 형식: "YYYY-MM-DD" (예: "2024-01-31")
+        cross_type (str): "golden"(골든크로스) 또는 "dead"(데드크로스) (기본값: "golden")
+        short_period (int): 단기 이동평균 길이 (기본값: 5). 1 이상
+        long_period (int): 장기 이동평균 길이 (기본값: 20). short_period보다 커야 함
+        limit (int): 반환할 최대 종목 수 (선택). 생략하면 결과가 50개를 넘을 때 첫 50개와 핸들만 반환
+        offset (int): 건너뛸 종목 수 (기본값: 0)
+        sort_by (str): 정렬 기준 (선택). "count"(발생 횟수) 또는 "first_date"(첫 발생일), 앞에 "-"를 붙이면 내림차순
+        count_only (bool): True면 교차가 발생한 종목 수만 반환 (기본값: False)
+
+    Returns:
+        str: 교차가 발생한 종목 목록의 간결한 JSON
+        [{"stock_code": "005930", "count": 2, "first_date": "2024-01-08"}, ...]
+        결과가 50개를 넘거나 limit/offset을 주면 {"total", "offset", "limit", "items", "next_offset", "handle"} 형식
+        (다음 페이지는 get_screen_page(handle, offset=next_offset)로 조회)
+        count_only=True면 {"total": 전체 개수}
+
+    Examples:
+        # 1월 중 5일/20일 골든크로스가 발생한 KOSPI 종목
+        find_cross_events("KOSPI", "2024-01-01", "2024-01-31")
+
+        # 1분기 20일/60일 데드크로스가 발생한 KOSDAQ 종목
+        find_cross_events("KOSDAQ", "2024-01-01", "2024-03-31", cross_type="dead", short_period=20, long_period=60)
+
+        # 1월 중 5일/20일 골든크로스가 가장 먼저 발생한 종목 10개
+        find_cross_events("KOSPI", "2024-01-01", "2024-01-31", sort_by="first_date", limit=10)
+    """
+    if cross_type not in CROSS_KINDS:
+        return json.dumps({"error": "cross_type은 'golden' 또는 'dead'이어야 합니다."}, ensure_ascii=False)
+    for name, period in (("short_period", short_period), ("long_period", long_period)):
+        if not isinstance(period, int) or isinstance(period, bool) or period < 1:
+            return json.dumps({"error": f"{name}은 1 이상의 정수여야 합니다: {period!r}"}, ensure_ascii=False)
+    if short_period >= long_period:
+        return json.dumps({"error": f"short_period({short_period})는 long_period({long_period})보다 작아야 합니다."}, ensure_ascii=False)
+
+    window = database.get_market_window(market, start_date, end_date)
+    cache_key = ("find_cross_events", market, window.start, window.stop, cross_type, short_period, long_period)
+    return _screen_page(cache_key, lambda: _find_cross_events(window, cross_type, short_period, long_period), offset, limit, sort_by, count_only)
+
+
+def _scan_candlestick_pattern(window: MarketWindow, pattern: str, pattern_params: dict) -> ScreenResult:
+    """scan_candlestick_pattern의 스크리닝 실행"""
+    hits = scan_pattern(window, pattern, **pattern_params)
+    dates = window.window_dates
+    counts = hits.sum(axis=1)
+    rows = np.flatnonzero(counts)
+    items = [
+        {"stock_code": window.stock_codes[i], "count": int(counts[i]), "dates": [dates[d] for d in np.flatnonzero(hits[i])]}
+        for i in rows
+    ]
+    return ScreenResult(
+        items=items,
+        columns={"count": counts[rows].astype(float)},
+        selection=StockBitset.from_mask(database.stock_codes, counts > 0)
+    )
+
+
+@tool
+def scan_candlestick_pattern(
+    market: str,
+    start_date: str,
+    end_date: str,
+    pattern: str,
+    pattern_params: dict = None,
+    limit: int = None,
+    offset: int = 0,
+    sort_by: str = None,
+    count_only: bool = False
+    ) -> str:
+    """기간 내 캔들 패턴(연속 양봉, 적삼병, 흑삼병, 갭, 도지, 장악형 등)이 나타난 종목과 날짜를 조회합니다.
+
+    시장 전체 종목의 시가/고가/저가/종가로 패턴을 한 번에 판정합니다.
+    날짜는 패턴이 완성된 거래일(예: 적삼병은 세 번째 양봉일)입니다.
+
+    Args:
+        market (str): 주식 시장 구분. "KOSPI" 또는 "KOSDAQ"
+        start_date (str): 조회 시작 날짜. 형식: "YYYY-MM-DD" (예: "2024-01-01")
+        end_date (str): 조회 종료 날짜. 형식: "YYYY-MM-DD" (예: "2024-01-31")
+        pattern (str): 캔들 패턴 이름.
+            사용 가능한 패턴:
+            - "bullish": 양봉 (종가 > 시가)
+            - "bearish": 음봉 (종가 < 시가)
+            - "consecutive_bullish": N일 연속 양봉 (기본 3일)
+            - "consecutive_bearish": N일 연속 음봉 (기본 3일)
+            - "three_white_soldiers": 적삼병 (3일 연속 양봉, 종가 상승, 시가가 전일 몸통 안)
+            - "three_black_crows": 흑삼병 (3일 연속 음봉, 종가 하락, 시가가 전일 몸통 안)
+            - "gap_up": 갭 상승 (당일 저가 > 전일 고가)
+            - "gap_down": 갭 하락 (당일 고가 < 전일 저가)
+            - "doji": 도지 (몸통이 고가-저가 폭의 10% 이하)
+            - "bullish_engulfing": 상승 장악형
+            - "bearish_engulfing": 하락 장악형
+        pattern_params (dict): 패턴 파라미터 (선택)
+            - "consecutive_bullish", "consecutive_bearish": {"days": 5}
+            - "doji": {"body_ratio": 0.05}
+            days는 1 이상의 정수, body_ratio는 0보다 크고 1보다 작은 값. 그 외 패턴은 파라미터 없음
+        limit (int): 반환할 최대 종목 수 (선택). 생략하면 결과가 50개를 넘을 때 첫 50개와 핸들만 반환
+        offset (int): 건너뛸 종목 수 (기본값: 0)
+        sort_by (str): 정렬 기준 (선택). "count"(패턴이 나타난 날 수), 앞에 "-"를 붙이면 내림차순
+        count_only (bool): True면 패턴이 나타난 종목 수만 반환 (기본값: False)
+
+    Returns:
+        str: 패턴이 나타난 종목 목록의 간결한 JSON
+        [{"stock_code": "005930", "count": 2, "dates": ["2024-01-08", "2024-01-22"]}, ...]
+        결과가 50개를 넘거나 limit/offset을 주면 {"total", "offset", "limit", "items", "next_offset", "handle"} 형식
+        (다음 페이지는 get_screen_page(handle, offset=next_offset)로 조회)
+        count_only=True면 {"total": 전체 개수}
+
+    Examples:
+        # 1월 중 적삼병이 나타난 KOSPI 종목
+        scan_candlestick_pattern("KOSPI", "2024-01-01", "2024-01-31", "three_white_soldiers")
+
+        # 2024-01-15에 5일 연속 음봉인 KOSDAQ 종목
+        scan_candlestick_pattern("KOSDAQ", "2024-01-15", "2024-01-15", "consecutive_bearish", {"days": 5})
+
+        # 1월 중 도지가 가장 자주 나타난 KOSPI 종목 20개
+        scan_candlestick_pattern("KOSPI", "2024-01-01", "2024-01-31", "doji", sort_by="-count", limit=20)
+    """
+    if pattern not in CANDLE_PATTERNS:
+        return json.dumps({"error": f"사용 가능한 패턴: {', '.join(CANDLE_PATTERNS)}"}, ensure_ascii=False)
+    pattern_params = {} if pattern_params is None else pattern_params
+    try:
+        check_pattern_params(pattern, pattern_params)
+    except ValueError as e:
+        return json.dumps({"error": str(e)}, ensure_ascii=False)
+
+    window = database.get_market_window(market, start_date, end_date)
+    cache_key = ("scan_candlestick_pattern", market, window.start, window.stop, pattern, tuple(sorted(pattern_params.items())))
+    return _screen_page(cache_key, lambda: _scan_candlestick_pattern(window, pattern, pattern_params), offset, limit, sort_by, count_only)
+
+
+def _get_streaks(window: MarketWindow, streak_type: str, min_length: int, stock_code: str, with_longest: bool) -> ScreenResult:
+    """get_streaks의 조회 실행"""
+    streaks = window.streams["streaks"]
+    day = window.stop - 1
+    current = streaks.current(streak_type, day)
+    longest = streaks.longest(streak_type, window.start, window.stop) if with_longest else None
+
+    if stock_code is not None:
+        mask = np.array([code == stock_code for code in window.stock_codes], dtype=bool)
+    else:
+        mask = current >= min_length
+    rows = np.flatnonzero(mask)
+
+    items = []
+    for i in rows:
+        item = {
+            "stock_code": window.stock_codes[i],
+            "current_streak": int(current[i]),
+            "streak_start_date": window.dates[day - current[i] + 1] if current[i] else None
+        }
+        if longest is not None:
+            item["longest_streak"] = int(longest[i])
+        items.append(item)
+    columns = {"current_streak": current[rows].astype(float)}
+    if longest is not None:
+        columns["longest_streak"] = longest[rows].astype(float)
+    return ScreenResult(items=items, columns=columns, selection=StockBitset.from_mask(database.stock_codes, mask))
+
+
+@tool
+def get_streaks(
+    market: str,
+    date: str,
+    streak_type: str,
+    min_length: int = 1,
+    stock_code: str = None,
+    start_date: str = None,
+    limit: int = None,
+    offset: int = 0,
+    sort_by: str = None,
+    count_only: bool = False
+    ) -> str:
+    """기준일까지 연속 양봉/음봉, 연속 상승, 연속 거래량 증가가 며칠째 이어지는지 조회합니다.
+
+    저장소 적재 시점에 계산해 둔 종목별 연속 길이를 조회하므로 종목 수와 기간에 관계없이 빠릅니다.
+    "넷마블 음봉 연속 며칠째야?"(stock_code 지정) 또는 "5일 이상 연속 상승 중인 종목"(min_length 지정)에 사용합니다.
+    date가 거래일이 아니면 그 이전 마지막 거래일 기준입니다.
+
+    Args:
+        market (str): 주식 시장 구분. "KOSPI" 또는 "KOSDAQ"
+        date (str): 기준 날짜. 형식: "YYYY-MM-DD" (예: "2024-01-15")
+        streak_type (str): 연속 조건.
+            - "up_candle": 양봉 (종가 > 시가)
+            - "down_candle": 음봉 (종가 < 시가)
+            - "close_rise": 종가 상승 (전 거래일 종가 대비)
+            - "volume_increase": 거래량 증가 (전 거래일 거래량 대비)
+        min_length (int): 기준일 연속 일수가 이 값 이상인 종목만 반환 (기본값: 1). stock_code를 주면 무시
+        stock_code (str): 6자리 종목 코드 (선택). 주면 해당 종목만 반환
+        start_date (str): 최장 연속 일수를 구할 기간의 시작 날짜 (선택). 형식: "YYYY-MM-DD". date보다 늦을 수 없음
+        limit (int): 반환할 최대 종목 수 (선택). 생략하면 결과가 50개를 넘을 때 첫 50개와 핸들만 반환
+        offset (int): 건너뛸 종목 수 (기본값: 0)
+        sort_by (str): 정렬 기준 (선택). "current_streak" 또는 "longest_streak"(start_date를 준 경우), 앞에 "-"를 붙이면 내림차순
+        count_only (bool): True면 종목 수만 반환 (기본값: False)
+
+    Returns:
+        str: 종목별 연속 정보의 간결한 JSON
+        [{"stock_code": "251270", "current_streak": 4, "streak_start_date": "2024-01-10", "longest_streak": 6}, ...]
+        longest_streak는 start_date를 준 경우에만 포함 (start_date ~ date 구간 안의 최장 연속 일수)
+        결과가 50개를 넘거나 limit/offset을 주면 {"total", "offset", "limit", "items", "next_offset", "handle"} 형식
+        (다음 페이지는 get_screen_page(handle, offset=next_offset)로 조회)
+        count_only=True면 {"total": 전체 개수}
+
+    Examples:
+        # 넷마블(251270)의 2024-01-15 기준 음봉 연속 일수
+        get_streaks("KOSPI", "2024-01-15", "down_candle", stock_code="251270")
+
+        # 2024-01-15 기준 5일 이상 연속 상승 중인 KOSDAQ 종목
+        get_streaks("KOSDAQ", "2024-01-15", "close_rise", min_length=5)
+
+        # 1월 중 최장 연속 양봉 일수와 현재 연속 일수
+        get_streaks("KOSPI", "2024-01-31", "up_candle", stock_code="005930", start_date="2024-01-01")
+
+        # 2024-01-15 기준 연속 음봉이 가장 긴 KOSPI 종목 10개
+        get_streaks("KOSPI", "2024-01-15", "down_candle", sort_by="-current_streak", limit=10)
+    """
+    if streak_type not in STREAK_CONDITIONS:
+        return json.dumps({"error": f"사용 가능한 streak_type: {', '.join(STREAK_CONDITIONS)}"}, ensure_ascii=False)
+    if start_date is not None and start_date > date:
+        return json.dumps({"error": f"start_date({start_date})가 date({date})보다 늦습니다."}, ensure_ascii=False)
+
+    window = database.get_market_window(market, start_date or date, date)
+    if window.stop == 0:
+        return json.dumps([], ensure_ascii=False)
+
+    cache_key = ("get_streaks", market, window.start if start_date else None, window.stop, streak_type,
+                 None if stock_code is not None else min_length, stock_code)
+    return _screen_page(cache_key, lambda: _get_streaks(window, streak_type, min_length, stock_code, start_date is not None),
+                        offset, limit, sort_by, count_only)
 
 
 @tool
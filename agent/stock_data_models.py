@@ -1,6 +1,8 @@
 from datetime import datetime
 from typing import List, Dict, Any
-from dataclasses import dataclass
+from dataclasses import dataclass, field as dataclass_field, replace
+
+import numpy as np
 
 
 @dataclass
@@ -42,4 +44,65 @@ class Stock:
             종목명=data.get('종목명', ''),
             종목코드=data.get('종목코드', ''),
             거래이력=거래이력
-        ) 
\ No newline at end of file
+        ) 
+
+
+@dataclass
+class MarketWindow:
+    """시장 전체 가격 행렬(종목 × 거래일)과 지표 계산 구간"""
+    stock_codes: List[str]  # 행 순서대로의 종목코드
+    dates: List[str]  # 저장소 거래일 달력 (YYYY-MM-DD, 오름차순)
+    arrays: Dict[str, np.ndarray]  # 필드명 → (종목 × 거래일) 행렬, 거래가 없는 칸은 NaN
+    start: int  # 지표 구간 시작 열 (포함)
+    stop: int  # 지표 구간 끝 열 (미포함)
+    streams: Dict[str, Any] = dataclass_field(default_factory=dict)  # 저장소가 적재 시점에 갱신하는 증분 지표 상태
+    prefix_sums: Dict[str, Any] = dataclass_field(default_factory=dict)  # 필드명 → 저장소가 유지하는 누적합 (rolling.PrefixSums)
+    tables: Dict[str, np.ndarray] = dataclass_field(default_factory=dict)  # 지표 테이블명 → 적재 시점에 계산해 둔 (종목 × 거래일) 지표 행렬
+
+    def field(self, name: str) -> np.ndarray:
+        """지표 구간에 해당하는 필드 행렬을 반환합니다."""
+        return self.arrays[name][:, self.start:self.stop]
+
+    def history(self, name: str) -> np.ndarray:
+        """저장소 첫 거래일부터 지표 구간 끝까지의 필드 행렬을 반환합니다."""
+        return self.arrays[name][:, :self.stop]
+
+    @property
+    def is_latest(self) -> bool:
+        """지표 구간이 저장소의 마지막 거래일까지 포함하는지 여부"""
+        return self.stop == len(self.dates)
+
+    @property
+    def window_dates(self) -> List[str]:
+        """지표 구간의 거래일 목록"""
+        return self.dates[self.start:self.stop]
+
+    def select_rows(self, rows: np.ndarray, lookback: int = None) -> "MarketWindow":
+        """
+        rows 위치의 종목만 담은 같은 구간을 반환합니다.
+
+        lookback을 주면 구간 시작일 앞 lookback 거래일부터 구간 끝까지의 열만 복사하고,
+        생략하면 저장소 첫 거래일부터 복사합니다(첫 거래일부터 누적하는 지표용).
+        가격 행렬/지표 테이블/누적합은 같이 자르고, 시장 전체 기준으로 유지하는 증분 상태(streams)는 뺍니다.
+
+        Args:
+            rows: 선택할 종목의 행 위치
+            lookback: 지표가 구간 시작일 앞에서 읽는 과거 거래일 수 상한 (선택)
+
+        Returns:
+            MarketWindow: 선택한 종목과 잘라낸 열의 구간 (start/stop은 잘라낸 열 기준)
+        """
+        first = 0 if lookback is None else max(self.start - lookback, 0)
+        return MarketWindow(
+            stock_codes=[self.stock_codes[i] for i in rows],
+            dates=self.dates[first:],
+            arrays={name: matrix[rows, first:self.stop] for name, matrix in self.arrays.items()},
+            start=self.start - first,
+            stop=self.stop - first,
+            # 누적합은 저장소 첫 거래일부터의 누적값이므로 열을 잘라도 구간 차이는 그대로입니다
+            prefix_sums={
+                name: replace(prefix, **{part: getattr(prefix, part)[rows, first:self.stop + 1] for part in ("sums", "squares", "counts")})
+                for name, prefix in self.prefix_sums.items()
+            },
+            tables={name: table[rows, first:self.stop] for name, table in self.tables.items()}
+        )
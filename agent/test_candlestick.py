@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+캔들 패턴 판정(candlestick)과 연속 길이(streak) 테스트
+"""
+
+import numpy as np
+from stock_data_models import MarketWindow
+from funcions import candlestick
+from funcions.streak import STREAK_CONDITIONS, STREAK_DTYPE, build_streak_index
+from test_indicator_batch import _make_market
+
+
+def _bar(arrays, row: int, t: int):
+    """t번째 거래일 봉 (시가, 고가, 저가, 종가). 저장소 이전이면 NaN"""
+    if t < 0:
+        return (np.nan,) * 4
+    return tuple(arrays[name][row, t] for name in ("open_price", "high_price", "low_price", "close_price"))
+
+
+def _expected(pattern: str, arrays, row: int, t: int) -> bool:
+    """한 봉씩 직접 판정한 기대값"""
+    o, h, l, c = _bar(arrays, row, t)
+    po, ph, pl, pc = _bar(arrays, row, t - 1)
+    bars = [_bar(arrays, row, t - lag) for lag in range(3)]
+    if pattern == "consecutive_bullish":
+        return all(bc > bo for bo, _, _, bc in bars)
+    if pattern == "consecutive_bearish":
+        return all(bc < bo for bo, _, _, bc in bars)
+    if pattern == "three_white_soldiers":
+        return all(bc > bo for bo, _, _, bc in bars) and all(
+            bars[i][3] > bars[i + 1][3] and bars[i + 1][0] <= bars[i][0] <= bars[i + 1][3] for i in range(2))
+    if pattern == "three_black_crows":
+        return all(bc < bo for bo, _, _, bc in bars) and all(
+            bars[i][3] < bars[i + 1][3] and bars[i + 1][3] <= bars[i][0] <= bars[i + 1][0] for i in range(2))
+    if pattern == "gap_up":
+        return l > ph
+    if pattern == "gap_down":
+        return h < pl
+    if pattern == "doji":
+        return abs(c - o) <= 0.1 * (h - l)
+    if pattern == "bullish_engulfing":
+        return pc < po and c > o and o <= pc and c >= po
+    if pattern == "bearish_engulfing":
+        return pc > po and c < o and o >= pc and c <= po
+    return c > o if pattern == "bullish" else c < o
+
+
+def test_patterns_match_bar_by_bar():
+    """벡터화한 패턴 판정이 봉 단위 직접 판정과 같은지 확인합니다."""
+    codes, dates, arrays = _make_market(n_days=60)
+    # 패턴이 충분히 나오도록 시가를 전일 종가 근처로 맞춤
+    rng = np.random.default_rng(3)
+    arrays["open_price"][:, 1:] = arrays["close_price"][:, :-1] * (1 + rng.normal(0, 0.01, (len(codes), 59)))
+    arrays["high_price"] = np.fmax(arrays["high_price"], arrays["open_price"])
+    arrays["low_price"] = np.fmin(arrays["low_price"], arrays["open_price"])
+
+    for start, stop in [(0, 60), (1, 2), (40, 60), (30, 30)]:
+        window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=start, stop=stop)
+        for pattern in candlestick.CANDLE_PATTERNS:
+            hits = candlestick.scan_pattern(window, pattern)
+            assert hits.shape == (len(codes), stop - start)
+            for row in range(len(codes)):
+                for t in range(start, stop):
+                    assert hits[row, t - start] == _expected(pattern, arrays, row, t), f"{pattern} {codes[row]} {dates[t]}"
+    print("✅ 캔들 패턴 판정이 봉 단위 판정과 일치합니다")
+
+
+def test_unknown_pattern():
+    """알 수 없는 패턴 이름은 ValueError를 냅니다."""
+    codes, dates, arrays = _make_market()
+    window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=len(dates))
+    try:
+        candlestick.scan_pattern(window, "hammer")
+    except ValueError:
+        print("✅ 알 수 없는 패턴을 거부합니다")
+        return
+    raise AssertionError("ValueError가 발생해야 합니다")
+
+
+def test_pattern_params():
+    """패턴 함수가 받지 않는 파라미터와 범위를 벗어난 days/body_ratio는 ValueError를 냅니다."""
+    codes, dates, arrays = _make_market()
+    window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=len(dates))
+    for pattern, params in [
+        ("consecutive_bullish", {"n": 3}),
+        ("gap_up", {"days": 2}),
+        ("consecutive_bearish", {"days": 0}),
+        ("consecutive_bearish", {"days": 2.5}),
+        ("consecutive_bullish", {"days": True}),
+        ("doji", {"body_ratio": 0}),
+        ("doji", {"body_ratio": 1.5}),
+        ("doji", {"body_ratio": "0.1"}),
+    ]:
+        try:
+            candlestick.scan_pattern(window, pattern, **params)
+        except ValueError:
+            continue
+        raise AssertionError(f"{pattern} {params}: ValueError가 발생해야 합니다")
+    assert candlestick.scan_pattern(window, "consecutive_bullish", days=1).sum() == candlestick.bullish(window).sum()
+    candlestick.scan_pattern(window, "doji", body_ratio=0.05)
+    print("✅ 올바르지 않은 패턴 파라미터를 거부합니다")
+
+
+def test_streak_index():
+    """연속 길이 색인이 직접 센 값과 같고, 하루씩 이어 붙인 결과가 전체 계산과 같은지 확인합니다."""
+    codes, dates, arrays = _make_market(n_days=60, missing_rate=0.05)
+    full = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=len(dates))
+    rebuilt = build_streak_index(full)
+
+    streamed = build_streak_index(MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=30))
+    for stop in range(31, len(dates) + 1):
+        streamed.append_day(MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=stop))
+
+    for name, condition in STREAK_CONDITIONS.items():
+        flags = condition(full)
+        assert (streamed.lengths[name] == rebuilt.lengths[name]).all()
+        assert streamed.lengths[name].dtype == rebuilt.lengths[name].dtype == STREAK_DTYPE
+        for row in range(len(codes)):
+            run = 0
+            for t in range(len(dates)):
+                run = run + 1 if flags[row, t] else 0
+                assert rebuilt.current(name, t)[row] == run
+
+        for start, stop in [(0, 60), (20, 35), (59, 60), (10, 10)]:
+            expected = [max([0] + [min(rebuilt.lengths[name][row, t], t - start + 1) for t in range(start, stop)]) for row in range(len(codes))]
+            assert list(rebuilt.longest(name, start, stop)) == expected
+        assert (rebuilt.at_least(name, 45, 2) == (rebuilt.current(name, 45) >= 2)).all()
+    print("✅ 연속 길이 색인이 직접 센 값과 일치합니다")
+
+
+if __name__ == "__main__":
+    test_patterns_match_bar_by_bar()
+    test_unknown_pattern()
+    test_pattern_params()
+    test_streak_index()
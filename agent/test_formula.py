@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+스크리닝 조건식 컴파일/벡터 평가(formula) 테스트
+"""
+
+import numpy as np
+from funcions.formula import FormulaError, compile_formula
+from funcions.stock_filter_tools import StockFilterTools
+from stock_data_models import History, Stock
+
+VARIABLES = frozenset({"indicator_value", "close_price", "volume"})
+
+
+def _row_eval(formula: str, row: dict[str, float]) -> bool:
+    """종목 한 개씩 파이썬으로 평가한 기대값 (0으로 나누면 False)"""
+    try:
+        return bool(eval(formula, {"__builtins__": {}, "abs": abs, "min": min, "max": max, "round": round, "pow": pow}, row))
+    except ZeroDivisionError:
+        return False
+
+
+def test_vectorized_matches_row_eval():
+    """시장 전체 벡터 평가가 종목별 파이썬 평가와 같은지 확인합니다."""
+    rng = np.random.default_rng(11)
+    columns = {
+        "indicator_value": np.round(rng.normal(50, 20, 200)),
+        "close_price": np.round(rng.uniform(1000, 5000, 200)),
+        "volume": rng.integers(0, 5, 200).astype(float) * 1000,
+    }
+    columns["indicator_value"][:5] = 0
+    formulas = [
+        "indicator_value <= 30",
+        "30 < indicator_value <= 70",
+        "close_price / indicator_value > 60",
+        "volume >= 2000 and not indicator_value > 50",
+        "indicator_value < 20 or volume == 0",
+        "abs(indicator_value - 50) < 10",
+        "max(indicator_value, 40) == indicator_value and min(close_price, 3000) < 3000",
+        "round(close_price / 1000) == 3",
+        "pow(indicator_value, 2) > 2500",
+        "round(close_price / 7, 1) > 400.5",
+        "indicator_value > 2 ** -1",
+        "close_price ** -1 < 0.0005",
+        "True + indicator_value > 50",
+        "close_price // 1000 % 2 == 1",
+        "-indicator_value < -60",
+        "indicator_value * 0.1",
+    ]
+    for formula in formulas:
+        compiled = compile_formula(formula, VARIABLES)
+        mask = compiled.evaluate(columns)
+        assert mask.dtype == bool and mask.shape == (200, )
+        for i in range(200):
+            row = {name: float(values[i]) for name, values in columns.items()}
+            assert mask[i] == _row_eval(formula, row), f"{formula} {row}"
+    assert compile_formula("indicator_value <= 30", VARIABLES) is compile_formula("indicator_value <= 30", VARIABLES)
+    print("✅ 벡터 평가가 종목별 평가와 일치합니다")
+
+
+def test_rejects_unsafe_formulas():
+    """허용되지 않은 구문/변수와 문법 오류는 False로 삼키지 않고 FormulaError를 냅니다."""
+    for formula in [
+        "__import__('os').system('ls')",
+        "close_price.__class__",
+        "open_price > 0",
+        "[x for x in (1, 2)]",
+        "close_price if volume else 0",
+        "'a' == 'a'",
+        "close_price >",
+        "round(close_price, ndigits=1)",
+        "close_price in (1, 2)",
+        "max() > 1",
+        "min() > 1",
+        "abs(close_price, volume) > 1",
+        "pow(close_price) > 1",
+        "round(close_price, 1.5) > 1",
+        "round(close_price, volume) > 1",
+        "max(*close_price) > 1",
+    ]:
+        try:
+            compile_formula(formula, VARIABLES)
+        except FormulaError:
+            continue
+        raise AssertionError(f"FormulaError가 발생해야 합니다: {formula}")
+    print("✅ 허용되지 않은 수식을 거부합니다")
+
+
+def test_float_evaluation():
+    """상수를 실수로 평가해 음수/큰 거듭제곱이 오류나 정수 넘침 없이 계산되고, 평가 오류는 FormulaError가 되는지 확인합니다."""
+    columns = {"indicator_value": np.array([0.4, 0.6, 2.0]), "close_price": np.array([1.0, 2.0, 3.0]), "volume": np.zeros(3)}
+    assert compile_formula("indicator_value > 2 ** -1", VARIABLES).evaluate(columns).tolist() == [False, True, True]
+    # 정수로 계산하면 넘쳐서 음수/0이 되는 값도 inf로 비교
+    assert compile_formula("2 ** 100 ** 3 > close_price", VARIABLES).evaluate(columns).all()
+    assert compile_formula("pow(10, 30) * close_price > 1e30", VARIABLES).evaluate(columns).tolist() == [False, True, True]
+
+    compiled = compile_formula("close_price > volume", VARIABLES)
+    try:
+        compiled.evaluate({**columns, "volume": np.zeros(2)})  # 길이가 다른 벡터
+    except FormulaError:
+        pass
+    else:
+        raise AssertionError("FormulaError가 발생해야 합니다")
+    print("✅ 수식을 실수로 평가하고 평가 오류를 FormulaError로 바꿉니다")
+
+
+def test_canonical_formula():
+    """공백과 불필요한 괄호만 다른 수식은 같은 정규화 수식(캐시 키)을 갖습니다."""
+    canonical = compile_formula("indicator_value>=70 and volume>1000", VARIABLES).canonical
+    assert compile_formula("  (indicator_value >= 70) and (volume > 1000) ", VARIABLES).canonical == canonical
+    assert compile_formula("indicator_value >= 70 or volume > 1000", VARIABLES).canonical != canonical
+    print("✅ 수식을 정규화합니다")
+
+
+def test_stock_filter_tools():
+    """두 거래내역 비교 필터가 종목별 파이썬 평가와 같은 종목을 같은 순서로 반환하는지 확인합니다."""
+    rng = np.random.default_rng(3)
+
+    def make_stock(code: str, date: str) -> Stock:
+        open_price, close_price = rng.integers(90, 110, 2)
+        history = History(date, float(open_price), 120.0, 80.0, float(close_price), int(rng.integers(0, 4)) * 100)
+        old = History("2000-01-02", 1.0, 1.0, 1.0, 1.0, 1)
+        return Stock(종목명=code, 종목코드=code, 거래이력={"2000-01-02": old, date: history})
+
+    codes = [f"{i:06d}" for i in range(60)]
+    비교군 = [make_stock(code, "2024-01-02") for code in codes[:50]]
+    비교대상 = [make_stock(code, "2024-01-03") for code in reversed(codes[10:])]
+    비교군_딕트 = {stock.종목코드: stock.거래이력["2024-01-02"] for stock in 비교군}
+    tools = StockFilterTools()
+
+    for 수식, 조건, 임계값 in [("비교대상_판매량 / 비교군_판매량", ">=", 2), ("비교대상_종가 - 비교군_종가", ">", 0), ("비교대상_시가", "=", 100)]:
+        expected = []
+        for stock in 비교대상:
+            if stock.종목코드 not in 비교군_딕트:
+                continue
+            current, previous = stock.거래이력["2024-01-03"], 비교군_딕트[stock.종목코드]
+            row = {f"{prefix}_{name}": float(getattr(history, field))
+                   for prefix, history in (("비교대상", current), ("비교군", previous))
+                   for name, field in (("시가", "open_price"), ("종가", "close_price"), ("판매량", "volume"))}
+            value = eval(수식, {"__builtins__": {}}, row) if row["비교군_판매량"] or "판매량" not in 수식 else None
+            if value is not None and {">=": value >= 임계값, ">": value > 임계값, "=": abs(value - 임계값) < 1e-10}[조건]:
+                expected.append(stock.종목코드)
+        assert [stock.종목코드 for stock in tools.복수_거래내역_종목_필터(비교대상, 비교군, 수식, 조건, 임계값)] == expected, 수식
+    # 지원하지 않는 조건/잘못된 수식은 빈 결과가 아니라 예외
+    for 수식, 조건 in [("비교대상_종가", "~"), ("비교대상_종가 +", ">"), ("없는_변수", ">")]:
+        for call in (lambda: tools.복수_거래내역_종목_필터(비교대상, 비교군, 수식, 조건, 0),
+                     lambda: tools.단일_거래내역_종목_필터(비교대상, 수식.replace("비교대상_", ""), 조건, 0)):
+            try:
+                call()
+            except FormulaError:
+                continue
+            raise AssertionError(f"{수식} {조건}: FormulaError가 발생해야 합니다")
+    print("✅ 두 거래내역 비교 필터가 종목별 평가와 일치합니다")
+
+
+if __name__ == "__main__":
+    test_vectorized_matches_row_eval()
+    test_rejects_unsafe_formulas()
+    test_float_evaluation()
+    test_canonical_formula()
+    test_stock_filter_tools()
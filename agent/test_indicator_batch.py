@@ -0,0 +1,1030 @@
+#!/usr/bin/env python3
+"""
+시장 전체 지표 계산(indicator_batch)과 종목별 참조 구현(indicator) 비교 테스트
+"""
+
+import math
+import numpy as np
+from stock_data_models import History, MarketWindow
+from funcions import indicator, indicator_batch
+from funcions.rolling import build_prefix_sums, append_prefix_sums, rolling_mean, rolling_std
+from funcions.event_index import CROSS_KINDS, build_cross_event_index, query_cross_events
+from funcions.indicator_graph import IndicatorEvaluator, check_params, normalize_params
+from funcions.indicator_tables import TABLE_DTYPE, build_indicator_tables, append_indicator_tables
+from funcions.cross_section import cross_rank, cross_percentile, cross_zscore, cross_section_variables
+from funcions.parallel_screen import ParallelScreener, chunk_bounds
+from funcions.formula import compile_formula
+from funcions.screen_planner import IndicatorRequest, plan_screen
+from funcions.indicator_cache import IndicatorCache
+from funcions.screen_result import PAGE_SIZE, ScreenResult, format_page
+from funcions.stock_bitset import SET_OPERATIONS, StockBitset
+from funcions.stock_set_tools import StockSetTools
+from funcions.window_aggregates import WINDOW_AGGREGATES, window_aggregate
+from funcions.range_screen import range_hits, range_variable_names
+from funcions.column_buffer import append_column
+
+CROSS_COUNTERS = {
+    "detect_golden_cross": "count_golden_cross",
+    "count_golden_cross": "count_golden_cross",
+    "detect_dead_cross": "count_dead_cross",
+    "count_dead_cross": "count_dead_cross",
+}
+
+
+def _make_market(n_stocks: int = 6, n_days: int = 60, seed: int = 7, missing_rate: float = 0.1):
+    """거래정지(빈 칸)와 짧은 이력이 섞인 가상의 시장 데이터를 만듭니다."""
+    rng = np.random.default_rng(seed)
+    dates = [f"2025-{1 + d // 28:02d}-{1 + d % 28:02d}" for d in range(n_days)]
+    shape = (n_stocks, n_days)
+
+    closes = 10000 * np.cumprod(1 + rng.normal(0, 0.03, shape), axis=1)
+    arrays = {
+        "open_price": closes * (1 + rng.normal(0, 0.01, shape)),
+        "high_price": closes * 1.02,
+        "low_price": closes * 0.98,
+        "close_price": closes,
+        "volume": rng.integers(1000, 100000, shape).astype(float),
+    }
+
+    missing = rng.random(shape) < missing_rate
+    missing[1, :45] = True  # 상장한 지 얼마 안 된 종목
+    missing[2, :] = True    # 이력이 없는 종목
+    for matrix in arrays.values():
+        matrix[missing] = np.nan
+
+    codes = [f"{i:06d}" for i in range(n_stocks)]
+    return codes, dates, arrays
+
+
+def _histories(arrays, dates, row: int, start: int, stop: int) -> list[History]:
+    return [
+        History(
+            date=dates[j],
+            open_price=arrays["open_price"][row, j],
+            high_price=arrays["high_price"][row, j],
+            low_price=arrays["low_price"][row, j],
+            close_price=arrays["close_price"][row, j],
+            volume=int(arrays["volume"][row, j]),
+        )
+        for j in range(start, stop)
+        if not math.isnan(arrays["close_price"][row, j])
+    ]
+
+
+def _same(expected: float, actual: float, rel_tol: float = 1e-9) -> bool:
+    if math.isnan(expected):
+        return math.isnan(actual)
+    return math.isclose(expected, actual, rel_tol=rel_tol, abs_tol=1e-9)
+
+
+def _calendar_ma(closes: np.ndarray, t: int, period: int) -> float:
+    """저장소 달력 기준 t일까지 period 거래일 이동평균 (구간에 거래정지일이 있으면 NaN)"""
+    if t - period + 1 < 0:
+        return float("nan")
+    bars = closes[t - period + 1:t + 1]
+    return float("nan") if np.isnan(bars).any() else float(bars.mean())
+
+
+def _calendar_expected(name: str, closes: np.ndarray, start: int, stop: int,
+                       short_period: int = 5, long_period: int = 20, k: float = 1.0) -> float:
+    """
+    이동평균 계열 배치 지표의 기대값을 날짜마다 직접 계산합니다.
+
+    배치 지표의 기간은 저장소 달력의 거래일이므로 거래정지일도 기간에 포함되고, 그 기간의 값은 NaN입니다.
+    (거래정지일을 건너뛰고 이어 붙인 봉으로 계산하는 참조 구현과는 거래정지가 있는 종목에서 다릅니다.)
+    """
+    if name in CROSS_COUNTERS:
+        golden = "golden" in name
+        count = 0
+        for t in range(max(start, 1), stop):
+            if np.isnan(closes[t]):
+                continue
+            prev_short, prev_long = _calendar_ma(closes, t - 1, short_period), _calendar_ma(closes, t - 1, long_period)
+            curr_short, curr_long = _calendar_ma(closes, t, short_period), _calendar_ma(closes, t, long_period)
+            if golden:
+                count += prev_short <= prev_long and curr_short > curr_long
+            else:
+                count += prev_short >= prev_long and curr_short < curr_long
+        return float(count) if name.startswith("count") else float(count > 0)
+    # 볼린저 밴드 터치 (구간 마지막 거래일)
+    t = stop - 1
+    if t < 0 or t - 19 < 0 or np.isnan(closes[t - 19:t + 1]).any():
+        return 0.0
+    bars = closes[t - 19:t + 1]
+    if name == "detect_bollinger_lower_touch":
+        return float(closes[t] <= bars.mean() - k * bars.std())
+    return float(closes[t] >= bars.mean() + k * bars.std())
+
+
+# 저장소 달력 거래일 기준 기간을 쓰는 배치 지표 (거래정지가 있으면 참조 구현과 다름)
+CALENDAR_WINDOWED = {*CROSS_COUNTERS, "detect_bollinger_lower_touch", "detect_bollinger_upper_touch"}
+
+
+def _expected(name: str, arrays, dates, row: int, start: int, stop: int) -> float:
+    """참조 구현으로 [start, stop) 구간의 기대값을 계산합니다."""
+    if name in CROSS_COUNTERS:
+        # 이동평균 계열은 구간 이전 이력도 사용하므로 전체 이력의 교차 횟수 차이로 비교
+        counter = getattr(indicator, CROSS_COUNTERS[name])
+        count = counter(_histories(arrays, dates, row, 0, stop)) - counter(_histories(arrays, dates, row, 0, start))
+        return count if name.startswith("count") else float(count > 0)
+    if name in ("calculate_rsi", "detect_bollinger_lower_touch", "detect_bollinger_upper_touch"):
+        return getattr(indicator, name)(_histories(arrays, dates, row, 0, stop))
+    try:
+        return getattr(indicator, name)(_histories(arrays, dates, row, start, stop))
+    except ZeroDivisionError:
+        return float("nan")
+
+
+def test_batch_matches_reference():
+    """
+    모든 배치 지표가 종목별 참조 구현과 같은 값을 내는지 확인합니다.
+
+    거래정지가 없는 시장은 모든 지표를 참조 구현과 비교하고, 거래정지가 섞인 시장은
+    저장소 달력 기준 기간을 쓰는 이동평균 계열 지표만 날짜별 직접 계산과 비교합니다.
+    """
+    for missing_rate in (0.0, 0.1):
+        codes, dates, arrays = _make_market(missing_rate=missing_rate)
+
+        for start, stop in [(0, 60), (10, 40), (50, 60), (30, 30)]:
+            window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=start, stop=stop)
+            for name, batch_fn in indicator_batch.BATCH_INDICATORS.items():
+                if not hasattr(indicator, name):
+                    continue  # 참조 구현이 없는 지표
+                values = batch_fn(window)
+                assert len(values) == len(codes)
+
+                for row in range(len(codes)):
+                    if missing_rate and name in CALENDAR_WINDOWED:
+                        expected = _calendar_expected(name, arrays["close_price"][row], start, stop)
+                    else:
+                        expected = _expected(name, arrays, dates, row, start, stop)
+                    assert _same(expected, values[row]), f"{name} {codes[row]} [{start}:{stop}] missing={missing_rate}: {expected} != {values[row]}"
+
+    print("✅ 배치 지표가 참조 구현과 일치합니다")
+
+
+def test_cross_window_parameters():
+    """교차 감지의 이동평균 길이 파라미터가 참조 구현의 상수 변경과 같은 결과를 내는지 확인합니다."""
+    codes, dates, arrays = _make_market(missing_rate=0.0)
+    window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=20, stop=60)
+
+    short_window, long_window = indicator.SHORT_WINDOW, indicator.LONG_WINDOW
+    indicator.SHORT_WINDOW, indicator.LONG_WINDOW = 3, 10
+    try:
+        for name in CROSS_COUNTERS:
+            values = indicator_batch.BATCH_INDICATORS[name](window, short_period=3, long_period=10)
+            for row in range(len(codes)):
+                assert _same(_expected(name, arrays, dates, row, 20, 60), values[row])
+    finally:
+        indicator.SHORT_WINDOW, indicator.LONG_WINDOW = short_window, long_window
+
+    # 거래정지가 섞인 시장은 저장소 달력 기준 직접 계산과 비교
+    codes, dates, arrays = _make_market()
+    window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=20, stop=60)
+    for name in CROSS_COUNTERS:
+        values = indicator_batch.BATCH_INDICATORS[name](window, short_period=3, long_period=10)
+        for row in range(len(codes)):
+            expected = _calendar_expected(name, arrays["close_price"][row], 20, 60, short_period=3, long_period=10)
+            assert _same(expected, values[row]), f"{name} {codes[row]}: {expected} != {values[row]}"
+    print("✅ 이동평균 길이 파라미터가 반영됩니다")
+
+
+def test_bollinger_touch_over_range():
+    """구간 전체의 볼린저 밴드 터치 행렬이 날짜별 참조 구현 결과와 같은지 확인합니다."""
+    for missing_rate in (0.0, 0.1):
+        codes, dates, arrays = _make_market(missing_rate=missing_rate)
+        window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=25, stop=60)
+
+        for upper, name in [(False, "detect_bollinger_lower_touch"), (True, "detect_bollinger_upper_touch")]:
+            touches = indicator_batch.bollinger_touch_matrix(window, upper=upper)
+            assert touches.shape == (len(codes), 35)
+            for row in range(len(codes)):
+                for t in range(25, 60):
+                    if missing_rate:
+                        expected = _calendar_expected(name, arrays["close_price"][row], t, t + 1)
+                    else:
+                        expected = getattr(indicator, name)(_histories(arrays, dates, row, 0, t + 1))
+                    assert expected == float(touches[row, t - 25]), f"{name} {codes[row]} {t}"
+    print("✅ 볼린저 밴드 터치 행렬이 날짜별 참조 구현과 일치합니다")
+
+
+def test_rolling_prefix_sums():
+    """누적합 기반 이동평균/표준편차가 직접 계산한 값과 같은지 확인합니다."""
+    _, _, arrays = _make_market()
+    closes = arrays["close_price"]
+
+    prefix = build_prefix_sums(closes[:, :40])
+    for j in range(40, closes.shape[1]):
+        prefix = append_prefix_sums(prefix, closes[:, j])
+
+    for period, min_periods in [(5, None), (20, None), (20, 15)]:
+        means = rolling_mean(prefix, period, 0, closes.shape[1], min_periods)
+        stds = rolling_std(prefix, period, 0, closes.shape[1], min_periods)
+        for row in range(closes.shape[0]):
+            for t in range(closes.shape[1]):
+                values = closes[row, max(0, t - period + 1):t + 1]
+                values = values[~np.isnan(values)]
+                if len(values) < (min_periods or period):
+                    assert np.isnan(means[row, t]) and np.isnan(stds[row, t])
+                else:
+                    assert math.isclose(means[row, t], values.mean(), rel_tol=1e-9)
+                    assert math.isclose(stds[row, t], values.std(), rel_tol=1e-6, abs_tol=1e-6)
+    print("✅ 누적합 이동평균/표준편차가 직접 계산과 일치합니다")
+
+
+def test_append_column():
+    """열 추가가 여유 열 버퍼를 재사용해 가끔만 옮겨 담고, 이전에 돌려준 행렬은 바뀌지 않는지 확인합니다."""
+    rng = np.random.default_rng(3)
+    matrix = rng.normal(size=(5, 10))
+    expected = matrix.copy()
+    views, reallocations = [], 0
+    for _ in range(1000):
+        column = rng.normal(size=5)
+        appended = append_column(matrix, column)
+        reallocations += appended.base is not matrix.base
+        expected = np.concatenate([expected, column[:, None]], axis=1)
+        views.append((appended, expected))
+        matrix = appended
+    assert reallocations < 30  # 일정 비율로 늘리므로 옮겨 담는 횟수는 열 수의 로그 수준
+    for view, values in views[::50]:
+        assert np.array_equal(view, values)
+
+    # 이전 행렬에서 갈라져 열을 붙여도 최신 행렬은 바뀌지 않음
+    old, latest = views[10][0], views[-1][0]
+    snapshot = latest.copy()
+    branched = append_column(old, np.zeros(5))
+    assert np.array_equal(latest, snapshot) and np.array_equal(branched[:, :-1], old) and not branched[:, -1].any()
+
+    # 자료형이 넓어지면 새 버퍼로 옮겨 담음
+    counts = append_column(np.zeros((2, 3), dtype=int), np.array([1, 2]))
+    assert counts.dtype == int and append_column(counts, np.array([0.5, 1.5])).dtype == float
+    print("✅ 열 추가가 버퍼를 재사용하고 이전 행렬을 바꾸지 않습니다")
+
+
+def test_rsi_streaming_update():
+    """적재 시점의 O(1) RSI 갱신이 전체 재계산과 같은 값을 내는지 확인합니다."""
+    codes, dates, arrays = _make_market()
+    closes = arrays["close_price"]
+
+    state = indicator_batch.init_market_rsi_state(closes[:, :30])
+    for j in range(30, closes.shape[1]):
+        indicator_batch.update_market_rsi_state(state, closes[:, j])
+
+    expected = indicator_batch.market_rsi_from_state(indicator_batch.init_market_rsi_state(closes))
+    actual = indicator_batch.market_rsi_from_state(state)
+    assert all(_same(e, a) for e, a in zip(expected, actual))
+
+    window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=len(dates), streams={"rsi": state})
+    assert all(_same(e, a) for e, a in zip(expected, indicator_batch.calculate_rsi(window)))
+    print("✅ RSI 증분 갱신이 전체 재계산과 일치합니다")
+
+
+def _naive_ema(values: np.ndarray, period: int) -> list[float]:
+    """
+    날짜별 재귀 지수이동평균. 첫 유효 값으로 시드하고 거래가 없는 날(NaN)은 전날 값을 유지합니다.
+
+    유효 값이 period개 미만인 날은 NaN입니다.
+    """
+    alpha = 2 / (period + 1)
+    ema, count, result = None, 0, []
+    for value in values:
+        if not math.isnan(value):
+            ema = value if ema is None else ema + alpha * (value - ema)
+            count += 1
+        result.append(ema if count >= period else float("nan"))
+    return result
+
+
+def _naive_macd(closes: np.ndarray, fast: int, slow: int, signal: int) -> tuple[list[float], list[float]]:
+    """날짜별 MACD와 시그널. 시그널은 거래가 있는 날의 MACD만 이어 붙인 지수이동평균입니다."""
+    macd = [f - s for f, s in zip(_naive_ema(closes, fast), _naive_ema(closes, slow))]
+    traded = [m if not math.isnan(close) else float("nan") for m, close in zip(macd, closes)]
+    return macd, _naive_ema(np.array(traded), signal)
+
+
+def test_ema_macd_reference():
+    """EMA/MACD 계열 배치 지표가 거래정지가 섞인 시장에서도 종목별 재귀 계산과 같은지 확인합니다."""
+    crosses_seen = 0
+    for missing_rate in (0.0, 0.1):
+        codes, dates, arrays = _make_market(n_days=80, missing_rate=missing_rate)
+        closes = arrays["close_price"]
+        for start, stop in [(0, 80), (30, 80), (45, 60), (79, 80), (40, 40)]:
+            window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=start, stop=stop)
+            for period in (5, 20):
+                values = indicator_batch.calculate_ema(window, period=period)
+                for row in range(len(codes)):
+                    expected = _naive_ema(closes[row, :stop], period)[-1] if stop else float("nan")
+                    assert _same(expected, values[row]), f"ema{period} {codes[row]} [{start}:{stop}]"
+
+            for fast, slow, signal in [(12, 26, 9), (3, 6, 4)]:
+                params = {"fast_period": fast, "slow_period": slow, "signal_period": signal}
+                macd = indicator_batch.calculate_macd(window, **params)
+                signal_values = indicator_batch.calculate_macd_signal(window, **params)
+                histogram = indicator_batch.calculate_macd_histogram(window, **params)
+                golden = indicator_batch.detect_macd_golden_cross(window, **params)
+                dead = indicator_batch.detect_macd_dead_cross(window, **params)
+                for row in range(len(codes)):
+                    m, s = _naive_macd(closes[row, :stop], fast, slow, signal)
+                    if stop:
+                        assert _same(m[-1], macd[row]) and _same(s[-1], signal_values[row])
+                        assert _same(m[-1] - s[-1], histogram[row])
+
+                    # 교차: 그날 거래가 있고 전 거래일(달력상 전날, 거래정지면 유지된 값) 대비 MACD와 시그널의 위아래가 바뀜
+                    expected_golden = expected_dead = False
+                    for t in range(max(start, 1), stop):
+                        if math.isnan(closes[row, t]):
+                            continue
+                        expected_golden |= m[t - 1] <= s[t - 1] and m[t] > s[t]
+                        expected_dead |= m[t - 1] >= s[t - 1] and m[t] < s[t]
+                    assert golden[row] == float(expected_golden), f"macd golden {codes[row]} [{start}:{stop}] {params}"
+                    assert dead[row] == float(expected_dead), f"macd dead {codes[row]} [{start}:{stop}] {params}"
+                    crosses_seen += expected_golden + expected_dead
+    assert crosses_seen > 0
+    print("✅ EMA/MACD 배치 지표가 종목별 재귀 계산과 일치합니다")
+
+
+def test_macd_streaming_update():
+    """적재 시점의 MACD 상태 갱신이 처음부터 다시 반영한 상태와 같고, 마지막 거래일 지표가 상태를 재사용하는지 확인합니다."""
+    codes, dates, arrays = _make_market()
+    closes = arrays["close_price"]
+
+    state = indicator_batch.init_market_macd_state(closes[:, :30])
+    for j in range(30, closes.shape[1]):
+        indicator_batch.update_market_macd_state(state, closes[:, j])
+        replayed = indicator_batch.init_market_macd_state(closes[:, :j + 1])
+        for expected, actual in zip(indicator_batch.market_macd_from_state(replayed), indicator_batch.market_macd_from_state(state)):
+            assert np.allclose(expected, actual, rtol=1e-9, atol=1e-9, equal_nan=True), j
+
+    plain = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=40, stop=len(dates))
+    streamed = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=40, stop=len(dates), streams={"macd": state})
+    for name in ("calculate_macd", "calculate_macd_signal", "calculate_macd_histogram"):
+        expected = indicator_batch.BATCH_INDICATORS[name](plain)
+        assert np.allclose(expected, indicator_batch.BATCH_INDICATORS[name](streamed), rtol=1e-9, atol=1e-9, equal_nan=True), name
+    assert not np.isnan(indicator_batch.calculate_macd(streamed)[0])
+
+    # 마지막 거래일 EMA는 기간이 같은 스트림 EMA 상태를 그대로 사용
+    for period, ema_state in ((12, state.fast), (26, state.slow)):
+        assert np.array_equal(indicator_batch.calculate_ema(streamed, period), indicator_batch.market_ema_from_state(ema_state), equal_nan=True)
+        assert np.allclose(indicator_batch.calculate_ema(plain, period), indicator_batch.calculate_ema(streamed, period), rtol=1e-9, atol=1e-9, equal_nan=True)
+    print("✅ MACD 증분 갱신이 전체 재계산과 일치합니다")
+
+
+def test_ema_matrix():
+    """블록 단위 EMA 행렬과 상태가 하루씩 update_market_ema_state에 반영한 결과와 같은지 확인합니다."""
+    rng = np.random.default_rng(7)
+    values = 100 + rng.standard_normal((6, 150)).cumsum(axis=1)
+    values[rng.random(values.shape) < 0.2] = np.nan
+    values[1, :90] = np.nan   # 블록 경계를 넘어 늦게 시작하는 종목
+    values[2] = np.nan        # 값이 없는 종목
+    values[3, 64] = 50.0      # 블록 첫 열 값
+
+    for period in (1, 2, 5, 20):
+        for split in (0, 30, 64, 150):
+            state = indicator_batch.init_market_ema_state(values.shape[0], period)
+            for j in range(split):
+                indicator_batch.update_market_ema_state(state, values[:, j])
+            before = indicator_batch.MarketEMAState(value=state.value.copy(), count=state.count.copy(), period=period)
+            matrix, final = indicator_batch.ema_matrix(values[:, split:], period, before)
+            assert np.array_equal(before.value, state.value, equal_nan=True)
+
+            for j in range(split, values.shape[1]):
+                indicator_batch.update_market_ema_state(state, values[:, j])
+                expected = indicator_batch.market_ema_from_state(state)
+                assert np.allclose(expected, matrix[:, j - split], rtol=1e-9, atol=1e-9, equal_nan=True), (period, split, j)
+            assert np.array_equal(final.count, state.count)
+            assert np.allclose(final.value, state.value, rtol=1e-9, atol=1e-9, equal_nan=True), (period, split)
+    print("✅ EMA 행렬 계산이 하루씩 갱신한 결과와 일치합니다")
+
+
+def test_ema_history():
+    """저장소 EMA 이력이 과거 구간은 잘라 쓰고 늦은 구간은 이어 계산하며, 재사용한 MACD 지표가 직접 계산과 같은지 확인합니다."""
+    codes, dates, arrays = _make_market(n_days=80, missing_rate=0.1)
+    closes = arrays["close_price"]
+    history = indicator_batch.MarketEMAHistory(max_series=2)
+
+    expected = indicator_batch.ema_matrix(closes, 5)[0]
+    for stop in (50, 80, 30):
+        matrix = history.get("close_price", 5, stop, lambda begin: closes[:, begin:stop])
+        assert matrix.shape == (len(codes), stop)
+        assert np.allclose(expected[:, :stop], matrix, rtol=1e-9, atol=1e-9, equal_nan=True), stop
+        assert not matrix.flags.writeable
+    history.get("close_price", 10, 80, lambda begin: closes[:, begin:])
+    history.get("close_price", 20, 80, lambda begin: closes[:, begin:])
+    assert len(history._series) == 2 and ("close_price", 5) not in history._series
+
+    for start, stop in ((0, 80), (30, 60), (45, 80), (79, 80)):
+        plain = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=start, stop=stop)
+        cached = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=start, stop=stop,
+                              streams={"ema": indicator_batch.MarketEMAHistory()})
+        for _ in range(2):
+            for name in ("calculate_macd", "calculate_macd_signal", "calculate_macd_histogram", "detect_macd_golden_cross", "detect_macd_dead_cross"):
+                fn = indicator_batch.BATCH_INDICATORS[name]
+                assert np.allclose(fn(plain), fn(cached), rtol=1e-9, atol=1e-9, equal_nan=True), (name, start, stop)
+            assert np.allclose(indicator_batch.calculate_ema(plain, 7), indicator_batch.calculate_ema(cached, 7), rtol=1e-9, atol=1e-9, equal_nan=True)
+        assert ("close_price", 26) in cached.streams["ema"]._series
+    print("✅ 저장소 EMA 이력을 재사용한 MACD/EMA 지표가 직접 계산과 일치합니다")
+
+
+def test_cross_event_index():
+    """교차 발생일 색인의 구간 조회가 교차 행렬과 같고, 하루씩 추가한 색인이 전체 재구성과 같은지 확인합니다."""
+    codes, dates, arrays = _make_market(n_days=80)
+    pairs = ((3, 10), (5, 20))
+    full = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=len(dates))
+    rebuilt = build_cross_event_index(full, pairs)
+
+    streamed = build_cross_event_index(MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=50), pairs)
+    for stop in range(51, len(dates) + 1):
+        streamed.append_day(MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=stop))
+
+    for start, stop in [(0, 80), (20, 45), (79, 80), (30, 30)]:
+        window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=start, stop=stop, streams={"cross_events": streamed})
+        for pair in pairs:
+            for kind in CROSS_KINDS:
+                crosses = indicator_batch.cross_matrix(window, *pair, golden=kind == "golden")
+                counts, first = query_cross_events(window, kind, *pair)
+                assert (counts == crosses.sum(axis=1)).all()
+                assert (counts == rebuilt.count(kind, *pair, start, stop)).all()
+                for row in range(len(codes)):
+                    days = np.nonzero(crosses[row])[0] + start
+                    assert first[row] == (days[0] if len(days) else -1)
+                    assert (streamed.stock_events(kind, *pair, row, start, stop) == days).all()
+    print("✅ 교차 발생일 색인 조회가 교차 행렬과 일치합니다")
+
+
+def test_volume_ratio():
+    """거래량 비율과 기간 평균 거래량이 직접 계산한 값과 같은지 확인합니다."""
+    codes, dates, arrays = _make_market(missing_rate=0.05)
+    volumes = arrays["volume"]
+
+    for stop in [1, 2, 21, 40, 60]:
+        window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=stop)
+        ratios = indicator_batch.calculate_volume_ratio(window, period=20)
+        averages = indicator_batch.calculate_average_volume(window, period=5)
+        for row in range(len(codes)):
+            previous = volumes[row, max(0, stop - 21):stop - 1]
+            if stop < 2 or np.isnan(previous).any() or len(previous) < 20 or np.isnan(volumes[row, stop - 1]):
+                assert np.isnan(ratios[row])
+            else:
+                assert math.isclose(ratios[row], volumes[row, stop - 1] / previous.mean(), rel_tol=1e-9)
+
+            recent = volumes[row, max(0, stop - 5):stop]
+            expected = recent.mean() if len(recent) == 5 and not np.isnan(recent).any() else float("nan")
+            assert _same(expected, averages[row])
+    print("✅ 거래량 비율이 직접 계산과 일치합니다")
+
+
+def _naive_series(arrays, row: int, n_days: int, period: int = 14, d_period: int = 3):
+    """ATR, OBV, 스토캐스틱 %K/%D를 거래일마다 직접 계산합니다."""
+    high, low, close, volume = (arrays[name][row] for name in ("high_price", "low_price", "close_price", "volume"))
+    nan = float("nan")
+    ranges, obv, percent_k = [], [], []
+    for t in range(n_days):
+        prev_close = close[t - 1] if t > 0 else nan
+        candidates = [high[t] - low[t]] + [abs(x - prev_close) for x in (high[t], low[t]) if not math.isnan(prev_close)]
+        ranges.append(nan if math.isnan(high[t]) else max(candidates))
+        flow = 0.0 if t == 0 or math.isnan(close[t] - prev_close) else math.copysign(volume[t], close[t] - prev_close) * (close[t] != prev_close)
+        obv.append((obv[-1] if obv else 0.0) + flow)
+        if t + 1 < period or np.isnan(high[t - period + 1:t + 1]).any() or np.isnan(low[t - period + 1:t + 1]).any():
+            percent_k.append(nan)
+        else:
+            hh, ll = high[t - period + 1:t + 1].max(), low[t - period + 1:t + 1].min()
+            percent_k.append(100 * (close[t] - ll) / (hh - ll) if hh > ll else nan)
+    atr = [nan if t + 1 < period else sum(ranges[t - period + 1:t + 1]) / period for t in range(n_days)]
+    percent_d = [nan if t + 1 < d_period else sum(percent_k[t - d_period + 1:t + 1]) / d_period for t in range(n_days)]
+    return atr, obv, percent_k, percent_d
+
+
+def test_atr_obv_stochastic():
+    """ATR, OBV, 스토캐스틱 지표와 돌파/다이버전스 감지가 거래일별 직접 계산과 같은지 확인합니다."""
+    codes, dates, arrays = _make_market(n_days=60, missing_rate=0.03)
+    batch = indicator_batch.BATCH_INDICATORS
+
+    for start, stop in [(0, 60), (0, 1), (15, 40), (45, 60), (30, 30)]:
+        window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=start, stop=stop)
+        values = {name: batch[name](window) for name in batch if "atr" in name or "obv" in name or "stochastic" in name}
+        for row in range(len(codes)):
+            atr, obv, percent_k, percent_d = _naive_series(arrays, row, len(dates))
+            close = arrays["close_price"][row]
+            if stop > 0:
+                assert _same(atr[stop - 1], values["calculate_atr"][row])
+                assert _same(obv[stop - 1], values["calculate_obv"][row])
+                assert _same(percent_k[stop - 1], values["calculate_stochastic_k"][row])
+                assert _same(percent_d[stop - 1], values["calculate_stochastic_d"][row])
+
+            days = range(max(start, 1), stop)
+            breakout = any(close[t] > close[t - 1] + atr[t - 1] for t in days)
+            golden = any(percent_k[t - 1] <= percent_d[t - 1] and percent_k[t] > percent_d[t] for t in days)
+            dead = any(percent_k[t - 1] >= percent_d[t - 1] and percent_k[t] < percent_d[t] for t in days)
+            assert values["detect_atr_breakout"][row] == float(breakout)
+            assert values["detect_stochastic_golden_cross"][row] == float(golden)
+            assert values["detect_stochastic_dead_cross"][row] == float(dead)
+
+            if stop - start >= 2:
+                price_change, obv_change = close[stop - 1] - close[start], obv[stop - 1] - obv[start]
+                assert values["detect_obv_bullish_divergence"][row] == float(price_change < 0 and obv_change > 0)
+                assert values["detect_obv_bearish_divergence"][row] == float(price_change > 0 and obv_change < 0)
+    print("✅ ATR, OBV, 스토캐스틱 지표가 직접 계산과 일치합니다")
+
+
+def test_evaluator_matches_batch():
+    """선언형 평가기가 모든 지표에서 indicator_batch 함수와 같은 값을 내는지 확인합니다."""
+    codes, dates, arrays = _make_market(missing_rate=0.05)
+    full = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=len(dates))
+    streams = {"cross_events": build_cross_event_index(full), "rsi": indicator_batch.init_market_rsi_state(arrays["close_price"])}
+    tables = build_indicator_tables(full)
+    params = {"calculate_moving_average": [{}, {"period": 10}, {"period": 20}], "calculate_average_volume": [{}, {"period": 5}]}
+
+    for start, stop in [(0, 60), (0, 1), (0, 0), (10, 40), (59, 60), (30, 30)]:
+        for window_streams, window_tables in (({}, {}), (streams, {}), ({}, tables)):
+            window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=start, stop=stop,
+                                  streams=window_streams, tables=window_tables)
+            evaluator = IndicatorEvaluator(window)
+            for name, batch_fn in indicator_batch.BATCH_INDICATORS.items():
+                for kwargs in params.get(name, [{}]):
+                    expected, actual = batch_fn(window, **kwargs), evaluator.evaluate(name, **kwargs)
+                    # float32 테이블을 읽으면 float32 반올림만큼 다를 수 있음
+                    rel_tol = 1e-6 if window_tables else 1e-9
+                    assert all(_same(e, a, rel_tol) for e, a in zip(expected, actual)), f"{name} {kwargs} [{start}:{stop}]"
+    print("✅ 선언형 평가기가 배치 지표와 일치합니다")
+
+
+def test_evaluator_shares_intermediates():
+    """여러 지표가 같은 중간 계산(20일 이동평균)을 요청해도 한 번만 계산하는지 확인합니다."""
+    codes, dates, arrays = _make_market()
+    evaluator = IndicatorEvaluator(MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=30, stop=60))
+
+    evaluator.evaluate("calculate_moving_average", period=20)
+    evaluator.evaluate("count_bollinger_lower_touch")
+    evaluator.evaluate("detect_golden_cross")
+    evaluator.evaluate("detect_golden_cross", short_period=5, long_period=20)
+    assert evaluator.computed.count(("rolling_mean", "close_price", 20, 20)) == 1
+    assert len(evaluator.computed) == len(set(evaluator.computed))
+    assert set(evaluator.inputs("detect_golden_cross")) <= set(evaluator.computed)
+    print("✅ 지표 간 중간 계산을 공유합니다")
+
+
+def test_indicator_tables():
+    """적재 시점 지표 테이블을 하루씩 이어 붙인 결과가 전체 계산과 같고, 평가기가 테이블을 조회하는지 확인합니다."""
+    codes, dates, arrays = _make_market(n_days=60, missing_rate=0.05)
+    full = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=len(dates))
+    rebuilt = build_indicator_tables(full)
+
+    streamed = build_indicator_tables(MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=40))
+    state = indicator_batch.init_market_rsi_state(arrays["close_price"][:, :40])
+    for stop in range(41, len(dates) + 1):
+        indicator_batch.update_market_rsi_state(state, arrays["close_price"][:, stop - 1])
+        append_indicator_tables(streamed, MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=stop), state)
+
+    for name, matrix in rebuilt.items():
+        assert matrix.shape == (len(codes), len(dates))
+        assert np.array_equal(matrix, streamed[name], equal_nan=True), name
+        # 실수 테이블은 float32, 교차 테이블은 bool로 보관 (이어 붙여도 유지)
+        assert matrix.dtype == streamed[name].dtype == (bool if "cross" in name else TABLE_DTYPE), name
+
+    evaluator = IndicatorEvaluator(MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=20, stop=50, tables=rebuilt))
+    evaluator.evaluate("calculate_rsi")
+    evaluator.evaluate("count_golden_cross", short_period=20, long_period=60)
+    evaluator.evaluate("detect_bollinger_lower_touch")
+    evaluator.evaluate("calculate_volume_ratio")
+    assert evaluator.computed == [("field", "close_price")]
+    print("✅ 지표 테이블 증분 갱신이 전체 계산과 일치하고 평가기가 테이블을 조회합니다")
+
+
+def test_min_periods():
+    """min_periods를 주면 거래정지로 빈 봉이 있어도 유효 봉이 min_periods 이상이면 값을 내는지 확인합니다."""
+    codes, dates, arrays = _make_market(missing_rate=0.2)
+    closes = arrays["close_price"]
+    window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=40, stop=60)
+    evaluator = IndicatorEvaluator(window)
+
+    for min_periods in (None, 1, 15, 20, 30):
+        required = 20 if min_periods is None else min(min_periods, 20)
+        values = evaluator.evaluate("calculate_moving_average", period=20, min_periods=min_periods)
+        for row in range(len(codes)):
+            bars = closes[row, 40:60]
+            valid = bars[~np.isnan(bars)]
+            expected = valid.mean() if len(valid) >= required else np.nan
+            assert _same(expected, values[row]), f"{codes[row]} min_periods={min_periods}"
+
+    # 생략하면 기간 전체 기준이므로 적재 시점 테이블과 같은 값을 씁니다
+    assert (evaluator.inputs("calculate_moving_average", period=20)
+            == evaluator.inputs("calculate_moving_average", period=20, min_periods=20))
+    print("✅ min_periods가 유효 봉 개수 기준으로 적용됩니다")
+
+
+def test_check_params():
+    """지표 함수가 받지 않는 파라미터나 잘못된 값은 캐시 키를 만들기 전에 ValueError로 거부하는지 확인합니다."""
+    valid = [
+        ("calculate_rsi", {}),
+        ("calculate_moving_average", {"period": 60, "min_periods": 40}),
+        ("detect_golden_cross", {"short_period": 20, "long_period": 60}),
+        ("detect_bollinger_lower_touch", {"period": 20, "k": 2.0}),
+        ("calculate_macd", {"fast_period": 12, "slow_period": 26, "signal_period": 9}),
+        ("calculate_average_volume", {"period": None}),
+    ]
+    for name, params in valid:
+        check_params(name, params)
+        hash(normalize_params(name, params))
+
+    invalid = [
+        ("calculate_rsi", {"period": 14}),  # 받지 않는 파라미터
+        ("calculate_macd", {"min_periods": 10}),
+        ("calculate_stochastic_k", {"min_periods": 10}),
+        ("calculate_moving_average", {"period": [5]}),  # 해시할 수 없는 값
+        ("calculate_moving_average", {"period": 0}),
+        ("calculate_moving_average", {"period": 2.5}),
+        ("detect_golden_cross", {"short_period": True}),
+        ("detect_bollinger_lower_touch", {"k": "2"}),
+        ("detect_bollinger_lower_touch", {"k": float("nan")}),
+        ("calculate_rsi", [("period", 14)]),
+    ]
+    for name, params in invalid:
+        try:
+            check_params(name, params)
+        except ValueError:
+            continue
+        raise AssertionError(f"{name} {params}")
+    print("✅ 지표 파라미터를 지표 함수 정의로 검사합니다")
+
+
+def test_cross_section():
+    """날짜별 순위/백분위/표준점수가 종목을 하나씩 비교한 값과 같은지 확인합니다."""
+    codes, dates, arrays = _make_market(n_stocks=12, missing_rate=0.2)
+    closes = arrays["close_price"].copy()
+    closes[3, :] = closes[4, :]  # 동점
+    ranks, percentiles, zscores = cross_rank(closes), cross_percentile(closes), cross_zscore(closes)
+
+    for j in range(len(dates)):
+        column = closes[:, j]
+        valid = column[~np.isnan(column)]
+        assert np.array_equal(cross_rank(column), ranks[:, j], equal_nan=True)
+        for i, value in enumerate(column):
+            if np.isnan(value):
+                assert np.isnan(ranks[i, j]) and np.isnan(percentiles[i, j]) and np.isnan(zscores[i, j])
+                continue
+            assert ranks[i, j] == 1 + (valid > value).sum()
+            assert math.isclose(percentiles[i, j], 100 * (valid <= value).sum() / len(valid))
+            expected = (value - valid.mean()) / valid.std() if valid.std() > 0 else 0.0
+            assert math.isclose(zscores[i, j], expected, abs_tol=1e-12)
+    assert np.isnan(cross_percentile(np.full(3, np.nan))).all()
+    print("✅ 횡단면 순위/백분위/표준점수가 직접 비교한 값과 일치합니다")
+
+
+def test_parallel_screen():
+    """종목을 나눠 프로세스 풀에서 계산한 지표가 단일 프로세스 계산과 같은 순서, 같은 값인지 확인합니다."""
+    codes, dates, arrays = _make_market(n_stocks=11, missing_rate=0.05)
+    assert chunk_bounds(11, 4) == [(0, 2), (2, 5), (5, 8), (8, 11)]
+    assert chunk_bounds(2, 8) == [(0, 1), (1, 2)]
+
+    screener = ParallelScreener(2)
+    try:
+        for start, stop in [(0, 60), (30, 60), (59, 60)]:
+            window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=start, stop=stop)
+            for name in indicator_batch.BATCH_INDICATORS:
+                expected = np.asarray(IndicatorEvaluator(window).evaluate(name), dtype=float)
+                assert np.array_equal(screener.evaluate(window, 1, name), expected, equal_nan=True), f"{name} [{start}:{stop}]"
+    finally:
+        screener.close()
+    print("✅ 병렬 지표 계산이 단일 프로세스 계산과 일치합니다")
+
+
+def test_screen_planner():
+    """가격 조건을 먼저 적용하는 실행 계획이 시장 전체를 한 번에 평가한 결과와 같고, 지표는 후보 종목만 계산하는지 확인합니다."""
+    codes, dates, arrays = _make_market(n_stocks=40, missing_rate=0.05)
+    window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=40, stop=60)
+    requests = {
+        "rsi": IndicatorRequest("calculate_rsi", {}, window),
+        "ma": IndicatorRequest("calculate_moving_average", {"period": 10}, window),
+        "gc": IndicatorRequest("count_golden_cross", {}, window),
+    }
+    prices = {name: arrays[name][:, 59] for name in ("close_price", "volume")}
+    columns = {**prices, **cross_section_variables(prices)}
+    full = {name: IndicatorEvaluator(window).evaluate(request.fn, **request.params) for name, request in requests.items()}
+    expected_columns = {**columns, **full, **cross_section_variables(full)}
+    variables = frozenset(expected_columns)
+    median_close = float(np.nanmedian(prices["close_price"]))
+
+    for formula in [
+        f"close_price < {median_close} and rsi > 50",
+        f"rsi > 40 and close_price > ma and volume > 30000 and close_price < {median_close}",
+        "rsi_percentile >= 50 and volume_rank <= 20",
+        f"(rsi > 60 or gc >= 1) and close_price > {median_close}",
+        "rsi > 50 or close_price > ma",
+        "volume > 1e9 and rsi > 0",
+        # 지표 값이 없는 종목(NaN)은 != / not 비교로도 조건을 만족하지 않음
+        "rsi != 50",
+        "not rsi > 50 and not gc >= 1",
+    ]:
+        compiled = compile_formula(formula, variables)
+        used = [name for name in requests if name in formula]
+        has_values = np.logical_and.reduce([~np.isnan(full[name]) for name in used])
+        plan = plan_screen(compiled, requests, len(codes))
+        seen = []
+
+        def evaluate(name, request, rows):
+            seen.append((name, None if rows is None else len(rows)))
+            evaluator = IndicatorEvaluator(window if rows is None else window.select_rows(rows))
+            return evaluator.evaluate(request.fn, **request.params)
+
+        mask, values = plan.execute(columns, evaluate)
+        assert np.array_equal(mask, compiled.evaluate(expected_columns) & has_values), formula
+        assert not mask[2], formula  # 이력이 없는 종목
+        for name, vector in values.items():
+            computed = ~np.isnan(vector)
+            assert np.array_equal(vector[computed], full[name][computed]), f"{formula} {name}"
+            assert computed[mask & ~np.isnan(full[name])].all(), f"{formula} {name}"
+        assert len(plan.steps) == len(plan.explain().splitlines()) - 1
+        if "close_price <" in formula or "volume >" in formula:
+            # 가격 조건 뒤에는 지표를 후보 종목만 계산
+            assert all(rows is not None and rows < len(codes) for _, rows in seen), f"{formula} {seen}"
+        if "rsi_percentile" in formula:
+            assert ("rsi", None) in seen
+    print("✅ 실행 계획이 한 번에 평가한 결과와 일치하고 지표는 후보 종목만 계산합니다")
+
+
+def test_screen_pushdown_columns():
+    """후보 종목 계산이 지표가 읽는 과거 거래일만 복사해도 시장 전체 계산과 같고, 적재 시점 값은 시장 전체를 조회하는지 확인합니다."""
+    codes, dates, arrays = _make_market(n_stocks=12, n_days=120, missing_rate=0.1)
+    rows = np.array([0, 1, 3, 4, 7, 11])
+    params = {
+        "calculate_moving_average": [{}, {"period": 20}, {"period": 20, "min_periods": 5}],
+        "detect_golden_cross": [{}, {"short_period": 20, "long_period": 60, "min_periods": 30}],
+        "count_bollinger_lower_touch": [{}, {"min_periods": 10}],
+        "calculate_volume_ratio": [{}, {"min_periods": 5}],
+        "detect_atr_breakout": [{}],
+        "detect_stochastic_golden_cross": [{}],
+    }
+    for prefix_sums in ({}, {name: build_prefix_sums(arrays[name]) for name in ("close_price", "volume")}):
+        window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=80, stop=110, prefix_sums=prefix_sums)
+        for name in indicator_batch.BATCH_INDICATORS:
+            for kwargs in params.get(name, [{}]):
+                request = IndicatorRequest(name, kwargs, window)
+                subset = window.select_rows(rows, request.lookback())
+                if request.lookback() is not None:
+                    assert subset.start == min(request.lookback(), 80) and subset.window_dates == window.window_dates
+                    assert subset.arrays["close_price"].shape[1] == subset.stop == 30 + subset.start
+                expected = IndicatorEvaluator(window).evaluate(name, **kwargs)[rows]
+                values = IndicatorEvaluator(subset).evaluate(name, **kwargs)
+                # 누적합을 다시 만들면 누적 시작점이 달라 부동소수점 오차만큼 다를 수 있음
+                assert np.allclose(expected, values, rtol=1e-9, atol=1e-9, equal_nan=True), f"{name} {kwargs}"
+
+    # 적재 시점 테이블로 조회하는 지표는 후보만 잘라 다시 계산하지 않고 시장 전체 값을 씀
+    window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=80, stop=110)
+    window.tables = build_indicator_tables(MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=len(dates)))
+    requests = {
+        "rsi": IndicatorRequest("calculate_rsi", {}, window),
+        "gc": IndicatorRequest("count_golden_cross", {"short_period": 20, "long_period": 60}, window),
+        "ema": IndicatorRequest("calculate_ema", {}, window),
+    }
+    assert requests["rsi"].precomputed and requests["gc"].precomputed and not requests["ema"].precomputed
+    median_close = float(np.nanmedian(arrays["close_price"][:, 109]))
+    columns = {"close_price": arrays["close_price"][:, 109]}
+    compiled = compile_formula(f"close_price < {median_close} and rsi > 0 and gc >= 0 and ema > 0", frozenset({"close_price", *requests}))
+    plan = plan_screen(compiled, requests, len(codes))
+    seen = {}
+
+    def evaluate(name, request, rows):
+        seen[name] = rows
+        return IndicatorEvaluator(window if rows is None else window.select_rows(rows, request.lookback())).evaluate(request.fn, **request.params)
+
+    plan.execute(columns, evaluate)
+    assert seen["rsi"] is None and seen["gc"] is None and seen["ema"] is not None
+    assert "시장 전체 조회" in plan.explain()
+
+    # 후보 종목 계산 비용에는 가격 행렬 복사가 들어가고, 적재 시점 값 조회는 후보 수와 무관
+    ma = IndicatorRequest("calculate_moving_average", {"period": 20}, window)
+    assert ma.cost(6) > ma.cost(12) / 2
+    assert requests["rsi"].cost(6) == requests["rsi"].cost(12) == len(codes)
+    print("✅ 후보 종목 계산이 필요한 과거 거래일만 복사하고 적재 시점 값은 시장 전체를 조회합니다")
+
+
+def test_indicator_cache():
+    """캐시 적중, 항목 수 기준 LRU 제거 순서, 저장소 버전 무효화, 적중/미스 통계를 확인합니다."""
+    cache = IndicatorCache(maxsize=3)
+    calls = []
+
+    def compute(key, value=None):
+        def run():
+            calls.append(key)
+            return np.full(3, float(len(calls))) if value is None else value
+        return run
+
+    first = cache.get_or_compute("a", 1, compute("a"))
+    assert np.array_equal(cache.get_or_compute("a", 1, compute("a")), first) and calls == ["a"]  # 적중
+    assert not first.flags.writeable  # 캐시된 배열은 읽기 전용
+    cache.get_or_compute("b", 1, compute("b"))
+    cache.get_or_compute("c", 1, compute("c"))
+    cache.get_or_compute("a", 1, compute("a"))  # a를 최근 사용으로 올림 → 가장 오래된 항목은 b
+    cache.get_or_compute("d", 1, compute("d"))
+    assert cache.get("b", 1) is None and all(cache.get(key, 1) is not None for key in "acd")
+    assert cache.evictions == 1 and calls == ["a", "b", "c", "d"]
+    cache.get("c", 1)  # get도 최근 사용으로 올림 → 다음 제거 대상은 a
+    cache.get_or_compute("e", 1, compute("e"))
+    assert cache.get("a", 1) is None and all(cache.get(key, 1) is not None for key in "cde")
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["size"]) == (2, 5, 3) and stats["hit_rate"] == 2 / 7
+
+    # 저장소 버전이 바뀌면 모든 항목을 비우고 다시 계산
+    assert cache.get("e", 2) is None
+    assert cache.get_or_compute("e", 2, compute("e", "새 값")) == "새 값" and calls[-1] == "e"
+    assert cache.stats()["size"] == 1 and cache.get("d", 2) is None and cache.get("d", 1) is None
+    assert (cache.hits, cache.misses) == (2, 6)
+
+    cache.clear()
+    assert cache.stats() == {"size": 0, "maxsize": 3, "nbytes": 0, "hits": 0, "misses": 0, "evictions": 0, "hit_rate": 0.0}
+    print("✅ 캐시가 적중/LRU 제거/버전 무효화/통계를 올바르게 처리합니다")
+
+
+def test_cache_byte_eviction():
+    """총 크기 제한을 넘으면 오래 쓰지 않은 항목부터 지우고, 저장소 버전이 바뀌면 비우는지 확인합니다."""
+    cache = IndicatorCache(maxsize=100, max_bytes=250)
+    for key in "abc":
+        assert cache.get_or_compute(key, 1, lambda: key * 100) == key * 100
+    assert cache.stats()["size"] == 2 and cache.nbytes == 200 and cache.evictions == 1
+    assert cache.get_or_compute("b", 1, lambda: "다시 계산") == "b" * 100  # 적중
+    cache.get_or_compute("big", 1, lambda: "x" * 1000)  # 제한보다 큰 결과는 보관하지 않음
+    assert cache.stats()["size"] == 2 and cache.nbytes == 200
+    assert cache.get_or_compute("b", 2, lambda: "새 버전") == "새 버전"
+    assert cache.stats()["size"] == 1 and cache.nbytes == len("새 버전".encode("utf-8"))
+    print("✅ 캐시가 총 크기 기준으로 항목을 제거합니다")
+
+
+def test_screen_pages():
+    """스크리닝 결과를 개수/정렬/페이지 단위로 간결하게 내보내고, 큰 결과는 핸들과 첫 페이지만 반환하는지 확인합니다."""
+    import json
+    values = np.array([3.0, np.nan, 1.0, 2.0] * 30)
+    items = [f"{i:06d}" for i in range(len(values))]
+    result = ScreenResult(items=items, columns={"indicator_value": values})
+
+    assert format_page(result, "h", count_only=True) == '{"total":120}'
+    first = json.loads(format_page(result, "h"))
+    assert first["items"] == items[:PAGE_SIZE] and first["next_offset"] == PAGE_SIZE and first["handle"] == "h"
+    pages, offset = [], 0
+    while offset is not None:
+        page = json.loads(format_page(result, "h", offset=offset, limit=40, sort_by="-indicator_value"))
+        pages += page["items"]
+        offset = page["next_offset"]
+    ranked = [items[i] for i in np.argsort(-values, kind="stable")]
+    assert pages == ranked and pages[-30:] == items[1::4]  # 값이 없는 종목은 뒤로
+
+    small = ScreenResult(items=items[:3], columns={"indicator_value": values[:3]})
+    assert format_page(small, "h") == '["000000","000001","000002"]'
+    assert format_page(small, "h", sort_by="indicator_value") == '["000002","000000","000001"]'
+    assert json.loads(format_page(small, "h", paged=True))["next_offset"] is None
+    for offset, limit in ((-1, None), (0, 0), (10, -5)):
+        try:
+            format_page(result, "h", offset=offset, limit=limit)
+        except ValueError:
+            continue
+        raise AssertionError(f"offset={offset}, limit={limit}: ValueError가 발생해야 합니다")
+    assert format_page(result, "h", offset=0, limit=0, count_only=True) == '{"total":120}'
+    try:
+        format_page(small, "h", sort_by="rsi")
+    except ValueError:
+        print("✅ 스크리닝 결과를 페이지 단위로 반환합니다")
+        return
+    raise AssertionError("ValueError가 발생해야 합니다")
+
+
+def test_stock_bitset():
+    """종목 비트셋 집합 연산이 파이썬 집합 연산과 같고, Stock 리스트 연산은 기존 순서를 유지하는지 확인합니다."""
+    from stock_data_models import Stock
+    rng = np.random.default_rng(5)
+    for n_stocks in (1, 63, 64, 65, 130):
+        universe = [f"{i:06d}" for i in range(n_stocks)]
+        masks = [rng.random(n_stocks) < 0.4 for _ in range(2)]
+        left, right = (StockBitset.from_mask(universe, mask) for mask in masks)
+        sets = [{code for code, selected in zip(universe, mask) if selected} for mask in masks]
+        expected = {
+            "intersection": sets[0] & sets[1],
+            "union": sets[0] | sets[1],
+            "difference": sets[0] - sets[1],
+            "xor": sets[0] ^ sets[1],
+        }
+        for name, op in SET_OPERATIONS.items():
+            result = op(left, right)
+            assert result.words.dtype == np.uint64 and len(result.words) == (n_stocks + 63) // 64
+            assert result.to_codes() == sorted(expected[name]) and result.count() == len(expected[name]), (n_stocks, name)
+        # 차집합 결과의 남는 비트가 켜지지 않음
+        assert (StockBitset.empty(universe) - left).count() == 0 and np.array_equal(left.to_mask(), masks[0])
+        assert StockBitset.from_codes(universe, sorted(sets[0]) + ["999999"]) == left
+        if sets[0]:
+            assert min(sets[0]) in left
+    try:
+        StockBitset.empty(["a"]) | StockBitset.empty(["b"])
+        raise AssertionError("ValueError가 발생해야 합니다")
+    except ValueError:
+        pass
+
+    stock = lambda code: Stock(종목명=code, 종목코드=code, 거래이력={})
+    first, second = [stock("C"), stock("A"), stock("B")], [stock("B"), stock("D"), stock("A")]
+    tools = StockSetTools()
+    assert [s.종목코드 for s in tools.종목_합집합(first, second)] == ["C", "A", "B", "D"]
+    assert [s.종목코드 for s in tools.종목_교집합(first, second)] == ["A", "B"]
+    assert [s.종목코드 for s in tools.종목_차집합(first, second)] == ["C"]
+    assert [s.종목코드 for s in tools.종목_XOR집합(first, second)] == ["C", "D"]
+    assert all(isinstance(op(first, second), list) for op in (tools.종목_합집합, tools.종목_교집합, tools.종목_차집합, tools.종목_XOR집합))
+    assert isinstance(tools.종목_교집합(left, right), StockBitset)
+
+    # 비트셋과 Stock 리스트를 섞으면 비트셋 종목 목록 기준 비트셋 (목록에 없는 종목은 무시)
+    universe = ["A", "B", "C", "D", "E"]
+    selected = StockBitset.from_codes(universe, ["A", "C", "E"])
+    assert tools.종목_교집합(selected, first).to_codes() == ["A", "C"]
+    assert tools.종목_합집합(second + [stock("Z")], selected).to_codes() == ["A", "B", "C", "D", "E"]
+    assert tools.종목_차집합(selected, first).to_codes() == ["E"]
+    assert tools.종목_XOR집합(first, selected).to_codes() == ["B", "E"]
+    print("✅ 종목 비트셋 집합 연산이 집합 연산과 일치합니다")
+
+
+def test_window_aggregates():
+    """최근 N거래일 구간 집계가 종목별 파이썬 계산과 같은지 확인합니다. (누적합 경로와 행렬 경로 모두)"""
+    codes, dates, arrays = _make_market()
+    prefix_sums = {field: build_prefix_sums(arrays[field]) for field in ("close_price", "volume")}
+    for start, stop in [(0, 10), (40, 50), (50, 60), (59, 60)]:
+        windows = [
+            MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=start, stop=stop, prefix_sums=prefix_sums),
+            MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=start, stop=stop),
+        ]
+        for row in range(len(codes)):
+            closes = [(j, arrays["close_price"][row, j]) for j in range(start, stop) if not math.isnan(arrays["close_price"][row, j])]
+            volumes = [arrays["volume"][row, j] for j, _ in closes]
+            highs = [arrays["high_price"][row, j] for j, _ in closes]
+            before = arrays["close_price"][row, start - 1] if start > 0 else float("nan")
+            base = closes[0][1] if closes and math.isnan(before) else before
+            up_days = sum(
+                1 for j, close in closes
+                if not math.isnan(previous := (arrays["close_price"][row, j - 1] if j > 0 else float("nan"))) and close > previous
+            )
+            expected = {
+                ("return", None): (closes[-1][1] / base - 1) * 100 if closes else float("nan"),
+                ("max", "high_price"): max(highs) if closes else float("nan"),
+                ("min", None): min(close for _, close in closes) if closes else float("nan"),
+                ("sum", None): sum(volumes) if closes else float("nan"),
+                ("mean", None): sum(close for _, close in closes) / len(closes) if closes else float("nan"),
+                ("up_days", None): float(up_days) if closes else float("nan"),
+            }
+            assert {aggregate for aggregate, _ in expected} == set(WINDOW_AGGREGATES)
+            for window in windows:
+                for (aggregate, field), value in expected.items():
+                    actual = window_aggregate(window, aggregate, field)[row]
+                    assert _same(value, actual), (start, stop, row, aggregate, value, actual)
+    print("✅ 최근 N거래일 구간 집계가 종목별 계산과 일치합니다")
+
+
+def test_range_hits():
+    """구간 전체를 행렬 하나로 평가한 결과가 날짜마다 시장 전체를 평가한 결과와 같은지 확인합니다."""
+    codes, dates, arrays = _make_market(n_stocks=12, n_days=60)
+    tables = build_indicator_tables(MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=0, stop=len(dates)))
+    formulas = [
+        "volume >= prev_volume * 1.5",
+        "rsi_14 < 45 or golden_cross_5_20 == 1",
+        "close_price > ma_20 and volume_rank <= 3",
+        "close_price < prev_low_price",
+    ]
+    for start, stop in [(0, 60), (30, 45), (59, 60), (20, 20)]:
+        window = MarketWindow(stock_codes=codes, dates=dates, arrays=arrays, start=start, stop=stop, tables=tables)
+        names = range_variable_names(window)
+        for formula in formulas:
+            compiled = compile_formula(formula, frozenset(names) | {"volume_rank"})
+            hits = range_hits(window, compiled)
+            assert hits.shape == (len(codes), stop - start)
+            for j in range(start, stop):
+                column = {name: arrays[name][:, j] for name in arrays}
+                column.update({f"prev_{name}": arrays[name][:, j - 1] if j > 0 else np.full(len(codes), np.nan) for name in arrays})
+                column.update({name: table[:, j].astype(float) for name, table in tables.items()})
+                column["volume_rank"] = cross_rank(column["volume"])
+                expected = compile_formula(formula, frozenset(column)).evaluate(column) & ~np.isnan(column["close_price"])
+                assert np.array_equal(hits[:, j - start], expected), (formula, start, stop, j)
+    print("✅ 기간 전체 조건 평가가 날짜별 평가와 일치합니다")
+
+
+if __name__ == "__main__":
+    test_batch_matches_reference()
+    test_cross_window_parameters()
+    test_bollinger_touch_over_range()
+    test_rolling_prefix_sums()
+    test_append_column()
+    test_rsi_streaming_update()
+    test_ema_macd_reference()
+    test_macd_streaming_update()
+    test_ema_matrix()
+    test_ema_history()
+    test_cross_event_index()
+    test_volume_ratio()
+    test_atr_obv_stochastic()
+    test_evaluator_matches_batch()
+    test_evaluator_shares_intermediates()
+    test_indicator_tables()
+    test_min_periods()
+    test_check_params()
+    test_cross_section()
+    test_parallel_screen()
+    test_screen_planner()
+    test_screen_pushdown_columns()
+    test_indicator_cache()
+    test_cache_byte_eviction()
+    test_screen_pages()
+    test_stock_bitset()
+    test_window_aggregates()
+    test_range_hits()
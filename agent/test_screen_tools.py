@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+여러 지표 스크리닝 도구(screen_stocks) 테스트
+
+저장소(korean_stocks.db)의 실제 데이터로 도구를 호출합니다.
+"""
+
+import json
+from datetime import date, timedelta
+from database import database
+from funcions.candlestick import scan_pattern
+from funcions.event_index import query_cross_events
+from my_tools import (filter_stocks_by_indicator_auto, find_cross_events, get_streaks, scan_candlestick_pattern, screen_date_comparison,
+                      screen_rolling_window, screen_stocks)
+
+MARKET = "KOSPI"
+# 결과를 한 페이지로 모두 받기 위한 limit
+ALL = 1_000_000
+
+
+def _codes(result: str) -> set[str]:
+    """도구 결과 JSON의 종목코드 집합"""
+    parsed = json.loads(result)
+    assert "error" not in parsed, parsed
+    return {item["stock_code"] if isinstance(item, dict) else item for item in parsed["items"]}
+
+
+def test_screen_stocks_matches_intersected_filters():
+    """screen_stocks 한 번의 결과가 지표마다 filter_stocks_by_indicator_auto를 호출해 교집합을 구한 결과와 같은지 확인합니다."""
+    dates = database.trading_dates
+    criteria_date, start_date = dates[-1], dates[-30]
+    common = {"market": MARKET, "criteria_date": criteria_date, "indicator_start_date": start_date, "indicator_end_date": criteria_date}
+
+    cases = [
+        # 지표마다 다른 lookback_days
+        (
+            {
+                "rsi": {"fn": "calculate_rsi"},
+                "touches": {"fn": "count_bollinger_lower_touch", "lookback_days": 10},
+                "ma": {"fn": "calculate_moving_average", "params": {"period": 20}, "lookback_days": 5},
+            },
+            "rsi >= 50 and touches >= 1 and close_price > ma",
+            None,
+            [
+                {"indicator_fn": "calculate_rsi", "formula": "indicator_value >= 50"},
+                {"indicator_fn": "count_bollinger_lower_touch", "formula": "indicator_value >= 1", "lookback_days": 10},
+                {"indicator_fn": "calculate_moving_average", "formula": "close_price > indicator_value",
+                 "indicator_params": {"period": 20}, "lookback_days": 5},
+            ],
+        ),
+        # 도구 전체 lookback_days와 지표별 lookback_days
+        (
+            {
+                "gc": {"fn": "count_golden_cross", "params": {"short_period": 5, "long_period": 20}},
+                "vol": {"fn": "calculate_volume_ratio", "lookback_days": 1},
+            },
+            "gc >= 1 and vol > 0.5",
+            20,
+            [
+                {"indicator_fn": "count_golden_cross", "formula": "indicator_value >= 1",
+                 "indicator_params": {"short_period": 5, "long_period": 20}, "lookback_days": 20},
+                {"indicator_fn": "calculate_volume_ratio", "formula": "indicator_value > 0.5", "lookback_days": 1},
+            ],
+        ),
+    ]
+    for indicators, formula, lookback_days, filters in cases:
+        combined = _codes(screen_stocks.invoke({**common, "indicators": indicators, "formula": formula,
+                                                "lookback_days": lookback_days, "limit": ALL}))
+        expected = None
+        for arguments in filters:
+            codes = _codes(filter_stocks_by_indicator_auto.invoke({**common, **arguments, "limit": ALL}))
+            expected = codes if expected is None else expected & codes
+        assert combined == expected, f"{formula}: {sorted(combined ^ expected)}"
+    print("✅ 여러 지표 스크리닝이 지표별 필터 결과의 교집합과 일치합니다")
+
+
+def test_screen_stocks_rejects_bad_definitions():
+    """잘못된 지표 정의/파라미터/수식은 예외 없이 오류 JSON으로 반환하는지 확인합니다."""
+    date = database.trading_dates[-1]
+    common = {"market": MARKET, "criteria_date": date, "indicator_start_date": date, "indicator_end_date": date}
+    for indicators, formula in [
+        ({"r": "calculate_rsi"}, "r > 50"),
+        ({"r": {"fn": "calculate_rsi", "params": {"period": 14}}}, "r > 50"),
+        ({"r": {"fn": "calculate_moving_average", "params": {"period": [5]}}}, "r > 50"),
+        ({"r": {"fn": "unknown_indicator"}}, "r > 50"),
+        ({"close_price": {"fn": "calculate_rsi"}}, "close_price > 50"),
+        ({"r": {"fn": "calculate_rsi"}}, "unknown > 50"),
+        ({"r": {"fn": "calculate_rsi"}}, "max() > 1"),
+        ({}, "close_price > 0"),
+    ]:
+        result = json.loads(screen_stocks.invoke({**common, "indicators": indicators, "formula": formula}))
+        assert isinstance(result, dict) and "error" in result, (indicators, formula, result)
+    print("✅ 잘못된 지표 정의를 오류로 반환합니다")
+
+
+def test_filter_excludes_missing_indicator_values():
+    """지표 값이 없는(NaN) 종목은 != / not 조건식으로도 선택되지 않는지 확인합니다."""
+    dates = database.trading_dates
+    # 이력이 RSI 기간보다 짧아 대부분 종목의 RSI가 없는 구간
+    common = {"market": MARKET, "criteria_date": dates[2], "indicator_start_date": dates[0], "indicator_end_date": dates[2],
+              "indicator_fn": "calculate_rsi", "limit": ALL}
+    has_value = _codes(filter_stocks_by_indicator_auto.invoke({**common, "formula": "indicator_value >= 0"}))
+    for formula in ["indicator_value != 50", "not indicator_value > 50"]:
+        codes = _codes(filter_stocks_by_indicator_auto.invoke({**common, "formula": formula}))
+        assert codes <= has_value, f"{formula}: {sorted(codes - has_value)}"
+    print("✅ 지표 값이 없는 종목은 조건을 만족하지 않습니다")
+
+
+def test_screen_rolling_window_rejects_bad_definitions():
+    """잘못된 집계 정의와 구간 길이는 예외 없이 오류 JSON으로 반환하는지 확인합니다."""
+    common = {"market": MARKET, "end_date": database.trading_dates[-1], "window_days": 5}
+    for aggregates, formula in [
+        ({"vol": "sum"}, "vol > 0"),
+        ({"vol": ["sum", "volume"]}, "vol > 0"),
+        ({"vol": {"agg": "sum", "days": "abc"}}, "vol > 0"),
+        ({"vol": {"agg": "sum", "days": [5]}}, "vol > 0"),
+        ({"vol": {"agg": "sum", "days": 0}}, "vol > 0"),
+        ({"vol": {"agg": "sum", "days": -3}}, "vol > 0"),
+        ({"vol": {"agg": "median"}}, "vol > 0"),
+    ]:
+        result = json.loads(screen_rolling_window.invoke({**common, "aggregates": aggregates, "formula": formula}))
+        assert isinstance(result, dict) and "error" in result, (aggregates, result)
+    # days를 주면 window_days 대신 사용
+    short = {"vol": {"agg": "sum", "days": 1}}
+    single_day = screen_rolling_window.invoke({**common, "aggregates": short, "formula": "vol > 0", "limit": ALL})
+    one_day = screen_rolling_window.invoke({**common, "window_days": 1, "aggregates": {"vol": {"agg": "sum"}},
+                                            "formula": "vol > 0", "limit": ALL})
+    assert json.loads(single_day)["items"] == json.loads(one_day)["items"]
+    print("✅ 잘못된 구간 집계 정의를 오류로 반환합니다")
+
+
+def _all_pages(tool, arguments: dict) -> list:
+    """next_offset을 따라가며 모은 도구 결과의 모든 항목 (페이지 크기 7)"""
+    items, offset = [], 0
+    while offset is not None:
+        page = json.loads(tool.invoke({**arguments, "offset": offset, "limit": 7}))
+        assert "error" not in page and len(page["items"]) <= 7, page
+        items += page["items"]
+        offset = page["next_offset"]
+    return items
+
+
+def test_scan_candlestick_pattern_pages():
+    """캔들 패턴 스캔 결과를 간결한 페이지 형식으로 반환하고, 잘못된 파라미터는 오류 JSON으로 반환하는지 확인합니다."""
+    dates = database.trading_dates
+    common = {"market": MARKET, "start_date": dates[-20], "end_date": dates[-1]}
+    window = database.get_market_window(MARKET, dates[-20], dates[-1])
+    for pattern, params in [("bullish", None), ("consecutive_bearish", {"days": 2}), ("doji", {"body_ratio": 0.3})]:
+        arguments = {**common, "pattern": pattern, "pattern_params": params}
+        hits = scan_pattern(window, pattern, **(params or {}))
+        expected = [
+            {"stock_code": code, "count": int(hits[i].sum()), "dates": [window.window_dates[d] for d in hits[i].nonzero()[0]]}
+            for i, code in enumerate(window.stock_codes) if hits[i].any()
+        ]
+        assert _all_pages(scan_candlestick_pattern, arguments) == expected, pattern
+        counts = [item["count"] for item in _all_pages(scan_candlestick_pattern, {**arguments, "sort_by": "-count"})]
+        assert counts == sorted(counts, reverse=True)
+        total = json.loads(scan_candlestick_pattern.invoke({**arguments, "count_only": True}))
+        assert total == {"total": len(expected)}
+        assert "\n" not in scan_candlestick_pattern.invoke(arguments)
+
+    for pattern, params in [("consecutive_bullish", {"n": 3}), ("gap_up", {"days": 2}),
+                            ("consecutive_bearish", {"days": 0}), ("doji", {"body_ratio": 1.5})]:
+        result = json.loads(scan_candlestick_pattern.invoke({**common, "pattern": pattern, "pattern_params": params}))
+        assert isinstance(result, dict) and "error" in result, (pattern, params, result)
+    print("✅ 캔들 패턴 스캔 결과를 페이지 단위로 반환하고 잘못된 파라미터를 거부합니다")
+
+
+def test_find_cross_events_pages():
+    """교차 발생 조회 결과를 간결한 페이지 형식으로 반환하고, 잘못된 이동평균 길이는 오류 JSON으로 반환하는지 확인합니다."""
+    dates = database.trading_dates
+    common = {"market": MARKET, "start_date": dates[-40], "end_date": dates[-1]}
+    window = database.get_market_window(MARKET, dates[-40], dates[-1])
+    for cross_type, short_period, long_period in [("golden", 5, 20), ("dead", 5, 20), ("golden", 3, 10)]:
+        arguments = {**common, "cross_type": cross_type, "short_period": short_period, "long_period": long_period}
+        counts, first_days = query_cross_events(window, cross_type, short_period, long_period)
+        expected = [
+            {"stock_code": code, "count": int(counts[i]), "first_date": window.dates[first_days[i]]}
+            for i, code in enumerate(window.stock_codes) if counts[i]
+        ]
+        assert _all_pages(find_cross_events, arguments) == expected, arguments
+        first = [item["first_date"] for item in _all_pages(find_cross_events, {**arguments, "sort_by": "first_date"})]
+        assert first == sorted(first)
+        assert json.loads(find_cross_events.invoke({**arguments, "count_only": True})) == {"total": len(expected)}
+
+    for short_period, long_period in [(0, 20), (-5, 20), (20, 20), (60, 20)]:
+        result = json.loads(find_cross_events.invoke({**common, "short_period": short_period, "long_period": long_period}))
+        assert isinstance(result, dict) and "error" in result, (short_period, long_period, result)
+    print("✅ 교차 발생 조회 결과를 페이지 단위로 반환하고 잘못된 이동평균 길이를 거부합니다")
+
+
+def test_get_streaks_pages():
+    """연속 길이 조회 결과를 간결한 페이지 형식으로 반환하고, 시작일이 기준일보다 늦으면 오류 JSON으로 반환하는지 확인합니다."""
+    dates = database.trading_dates
+    streaks = database.streams["streaks"]
+    day = len(dates) - 1
+    for streak_type in ("up_candle", "close_rise"):
+        arguments = {"market": MARKET, "date": dates[day], "streak_type": streak_type, "start_date": dates[day - 20]}
+        current = streaks.current(streak_type, day)
+        longest = streaks.longest(streak_type, day - 20, day + 1)
+        expected = [
+            {"stock_code": code, "current_streak": int(current[i]),
+             "streak_start_date": dates[day - current[i] + 1] if current[i] else None, "longest_streak": int(longest[i])}
+            for i, code in enumerate(database.stock_codes) if current[i] >= 1
+        ]
+        assert _all_pages(get_streaks, arguments) == expected, streak_type
+        ranked = [item["longest_streak"] for item in _all_pages(get_streaks, {**arguments, "sort_by": "-longest_streak"})]
+        assert ranked == sorted(ranked, reverse=True)
+        code = database.stock_codes[3]
+        single = json.loads(get_streaks.invoke({**arguments, "stock_code": code}))
+        assert [item["stock_code"] for item in single] == [code]
+
+    inverted = json.loads(get_streaks.invoke({"market": MARKET, "date": dates[-10], "streak_type": "up_candle", "start_date": dates[-1]}))
+    assert isinstance(inverted, dict) and "error" in inverted, inverted
+    print("✅ 연속 길이 조회 결과를 페이지 단위로 반환하고 뒤집힌 기간을 거부합니다")
+
+
+def _non_trading_day() -> tuple[str, str]:
+    """저장소 거래일 사이의 거래일이 아닌 날짜(주말/휴일)와 그 이전 마지막 거래일"""
+    dates = database.trading_dates
+    for previous, following in zip(dates[-30:], dates[-29:]):
+        day = date.fromisoformat(str(previous)) + timedelta(days=1)
+        if day.isoformat() < str(following):
+            return day.isoformat(), previous
+    raise AssertionError("최근 거래일 사이에 거래일이 아닌 날짜가 없습니다")
+
+
+def test_screen_date_comparison_non_trading_dates():
+    """거래일이 아닌 target_date/reference_date는 그 이전 마지막 거래일 기준으로 스크리닝하는지 확인합니다."""
+    holiday, trading_day = _non_trading_day()
+    formula = "curr_close_price > prev_close_price"
+    reference = database.trading_dates[database.trading_dates.index(trading_day) - 5]
+    for arguments, normalized in [
+        ({"target_date": holiday}, {"target_date": trading_day}),
+        ({"target_date": database.trading_dates[-1], "reference_date": holiday},
+         {"target_date": database.trading_dates[-1], "reference_date": trading_day}),
+        ({"target_date": holiday, "reference_date": reference}, {"target_date": trading_day, "reference_date": reference}),
+    ]:
+        common = {"market": MARKET, "formula": formula, "limit": ALL}
+        codes = _codes(screen_date_comparison.invoke({**common, **arguments}))
+        assert codes and codes == _codes(screen_date_comparison.invoke({**common, **normalized})), arguments
+
+    result = json.loads(screen_date_comparison.invoke({"market": MARKET, "formula": formula, "target_date": "1900-01-01"}))
+    assert "error" in result, result
+    print("✅ 거래일이 아닌 비교 날짜를 이전 거래일로 맞춥니다")
+
+
+if __name__ == "__main__":
+    test_screen_stocks_matches_intersected_filters()
+    test_screen_stocks_rejects_bad_definitions()
+    test_filter_excludes_missing_indicator_values()
+    test_screen_rolling_window_rejects_bad_definitions()
+    test_screen_date_comparison_non_trading_dates()
+    test_scan_candlestick_pattern_pages()
+    test_find_cross_events_pages()
+    test_get_streaks_pages()
@@ -14,8 +14,8 @@ from pydantic import BaseModel, create_model
 
 # 순환 import 방지를 위해 함수 내에서 import
 def _get_tools():
-    from my_tools import get_current_date, calculate, filter_stocks_by_indicator_auto, get_stock_price_history
-    return [get_current_date, calculate, filter_stocks_by_indicator_auto, get_stock_price_history]
+    from my_tools import get_current_date, calculate, filter_stocks_by_indicator_auto, screen_stocks, get_screen_page, combine_screen_results, screen_date_comparison, screen_rolling_window, screen_date_range, find_cross_events, scan_candlestick_pattern, get_streaks, get_stock_price_history
+    return [get_current_date, calculate, filter_stocks_by_indicator_auto, screen_stocks, get_screen_page, combine_screen_results, screen_date_comparison, screen_rolling_window, screen_date_range, find_cross_events, scan_candlestick_pattern, get_streaks, get_stock_price_history]
 
 # ===== 도구 매핑 =====
 